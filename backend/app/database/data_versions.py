@@ -0,0 +1,81 @@
+"""
+Data Versions
+Per-user change counters behind the dashboard ETags
+
+Every stored batch of chatbot_history, sessions or crisis_alerts bumps the
+counter of each user in it (a write-behind listener, so the bump happens
+once the data is readable). A GET reads the counter before querying Mongo;
+the same counter value means nothing the endpoint reads has changed.
+
+Counters live in a fixed table indexed by a hash of the user id; users that
+share a slot just invalidate each other more often. Under app.prefork the
+table is an anonymous shared mapping created before the fork, with one
+column per worker: each worker only increments its own column and a user's
+version is the sum over all columns, so no locking is needed and a write in
+any worker is seen by all of them. Separate processes that don't share the
+mapping (maintenance jobs, uvicorn --workers) don't bump it; ETags also
+expire every CONDITIONAL_GET_MAX_AGE seconds to bound that staleness.
+"""
+
+import mmap
+import os
+import secrets
+import time
+import zlib
+from array import array
+from typing import List
+
+DATA_VERSION_SLOTS = int(os.getenv("DATA_VERSION_SLOTS", "65536"))
+# Seconds an ETag stays valid without any write (covers writes from other processes)
+CONDITIONAL_GET_MAX_AGE = float(os.getenv("CONDITIONAL_GET_MAX_AGE", "60"))
+
+
+class DataVersions:
+    """Per-user write counters, optionally shared between pre-forked workers"""
+
+    def __init__(self, slots: int = DATA_VERSION_SLOTS, max_age: float = CONDITIONAL_GET_MAX_AGE):
+        self.slots = max(1, slots)
+        self.max_age = max_age
+        self.columns = 1
+        self.column = 0
+        self._counters = array('Q', bytes(8 * self.slots))
+        # Changes on every (re)start, so ETags from an earlier run never match
+        self.epoch = secrets.token_hex(4)
+
+    def share(self, columns: int):
+        """Move the table to shared memory with one column per worker (call before forking)"""
+        self.columns = max(1, columns)
+        self.column = 0
+        buffer = mmap.mmap(-1, 8 * self.slots * self.columns)
+        self._counters = memoryview(buffer).cast('Q')
+
+    def use_column(self, column: int):
+        """Column this process increments (a worker's slot in the pre-fork master)"""
+        if not 0 <= column < self.columns:
+            raise ValueError(f"Column {column} out of range (table has {self.columns})")
+        self.column = column
+
+    def _slot(self, user_id: str) -> int:
+        return zlib.crc32(str(user_id).encode()) % self.slots
+
+    def bump(self, user_id: str):
+        self._counters[self.column * self.slots + self._slot(user_id)] += 1
+
+    def version(self, user_id: str) -> int:
+        slot = self._slot(user_id)
+        return sum(self._counters[column * self.slots + slot] for column in range(self.columns))
+
+    def etag(self, user_id: str) -> str:
+        """Weak ETag for everything the dashboard shows about one user, right now"""
+        window = int(time.time() // self.max_age) if self.max_age > 0 else 0
+        return f'W/"{self.epoch}-{self.version(user_id)}-{window}"'
+
+    async def bump_documents(self, db, documents: List[dict]):
+        """Write-behind listener: one bump per user in a stored batch"""
+        for user_id in {document.get("userId") for document in documents}:
+            if user_id is not None:
+                self.bump(user_id)
+
+
+# Process-wide table (shared with the workers when app.prefork calls share())
+data_versions = DataVersions()
@@ -9,10 +9,19 @@ Uses Motor for async database operations
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+import asyncio
 import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import logging
 
+from .data_versions import data_versions
+from .rollups import apply_mood_rollups
+from .user_stats import apply_alert_stats, apply_message_stats, apply_session_stats
+from ..services.metrics import METRICS_ENABLED, MongoCommandListener
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -20,6 +29,14 @@ logger = logging.getLogger(__name__)
 MONGO_URL = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "EmoHeal")
 
+# Write-behind buffer: flush a collection at WRITE_BATCH_MAX_DOCS documents or
+# every WRITE_BATCH_MAX_WAIT_MS; writers wait once WRITE_BUFFER_MAX_DEPTH is reached
+WRITE_BATCH_MAX_DOCS = int(os.getenv("WRITE_BATCH_MAX_DOCS", "100"))
+WRITE_BATCH_MAX_WAIT_MS = float(os.getenv("WRITE_BATCH_MAX_WAIT_MS", "50"))
+WRITE_BUFFER_MAX_DEPTH = int(os.getenv("WRITE_BUFFER_MAX_DEPTH", "10000"))
+WRITE_MAX_ATTEMPTS = 3
+DUPLICATE_KEY = 11000
+
 class MongoDB:
     """Singleton MongoDB connection manager"""
     client: AsyncIOMotorClient = None
@@ -28,7 +45,9 @@ class MongoDB:
 async def connect_to_mongo():
     """Connect to MongoDB on startup"""
     try:
-        MongoDB.client = AsyncIOMotorClient(MONGO_URL)
+        # Command monitoring feeds the Mongo latency histograms on /metrics
+        listeners = [MongoCommandListener()] if METRICS_ENABLED else []
+        MongoDB.client = AsyncIOMotorClient(MONGO_URL, event_listeners=listeners)
         MongoDB.db = MongoDB.client[DB_NAME]
         
         # Verify connection
@@ -52,15 +71,208 @@ async def get_database() -> AsyncIOMotorDatabase:
     return MongoDB.db
 
 async def create_indexes():
-    """Create database indexes for performance"""
+    """Apply the declared indexes and check every route query uses one"""
+    from .indexes import apply_indexes, verify_query_plans
+
     db = await get_database()
-    
-    # Index for fast user lookups
-    await db.chatbot_history.create_index("user_id")
-    await db.chatbot_history.create_index("timestamp")
-    
-    # Index for crisis alerts
-    await db.crisis_alerts.create_index("user_id")
-    await db.crisis_alerts.create_index("resolved")
-    
-    logger.info("✅ Database indexes created")
+    await apply_indexes(db)
+    await verify_query_plans(db)
+
+class WriteBehindBuffer:
+    """
+    Collects inserts from every session and writes them per collection with
+    insert_many(ordered=False), so a chat turn never waits on Mongo.
+
+    A collection is flushed when it holds `max_docs` documents, when its
+    documents have waited `max_wait_ms`, or right away for urgent writes
+    (crisis alerts). Batches that fail to reach Mongo are retried up to
+    WRITE_MAX_ATTEMPTS times with backoff; documents rejected by the server
+    are logged.
+
+    Listeners registered with `add_listener` receive every batch of
+    documents once it is stored (e.g. to maintain rollups).
+    """
+
+    def __init__(self, max_docs: int = WRITE_BATCH_MAX_DOCS, max_wait_ms: float = WRITE_BATCH_MAX_WAIT_MS,
+                 max_depth: int = WRITE_BUFFER_MAX_DEPTH, database: Optional[AsyncIOMotorDatabase] = None):
+        self.max_docs = max(1, max_docs)
+        self.max_wait = max(1.0, max_wait_ms) / 1000
+        self.max_depth = max(self.max_docs, max_depth)
+        self.database = database
+        # collection -> [(document, attempts)]
+        self._pending: Dict[str, List[Tuple[dict, int]]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self._space: Optional[asyncio.Event] = None
+        # collection -> monotonic time before which a failed collection isn't retried
+        self._retry_at: Dict[str, float] = {}
+        self._listeners: Dict[str, List[Callable[[AsyncIOMotorDatabase, List[dict]], Awaitable]]] = {}
+
+        # Metrics
+        self.flushes = 0
+        self.documents_written = 0
+        self.write_errors = 0
+        self.retries = 0
+        self.dropped = 0
+        self.listener_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def add_listener(self, collection: str, callback: Callable[[AsyncIOMotorDatabase, List[dict]], Awaitable]):
+        """Call `await callback(database, documents)` after each stored batch of `collection`"""
+        self._listeners.setdefault(collection, []).append(callback)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(batch) for batch in self._pending.values())
+
+    def start(self):
+        """Start the periodic flusher on the running loop"""
+        if self._flusher is None:
+            self._space = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out everything still buffered"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.drain()
+
+    async def insert(self, collection: str, document: dict, urgent: bool = False):
+        """Queue a document; urgent documents are flushed without waiting for a batch or a retry backoff"""
+        if self._flusher is None:
+            self.start()
+        while self.depth >= self.max_depth:
+            # Mongo can't keep up: hold the writer instead of growing without bound
+            self._space.clear()
+            self._spawn_flush(None)
+            await self._space.wait()
+
+        batch = self._pending.setdefault(collection, [])
+        batch.append((document, 0))
+        if urgent:
+            # A crisis alert must not sit out the backoff of an earlier failed write
+            self._spawn_flush(collection, force=True)
+        elif len(batch) >= self.max_docs:
+            self._spawn_flush(collection)
+
+    async def flush(self, collection: Optional[str] = None, force: bool = False):
+        """Write the buffered documents of one collection (or all) now"""
+        names = [collection] if collection else list(self._pending)
+        await asyncio.gather(*[self._flush_collection(name, force) for name in names])
+
+    async def drain(self):
+        """Flush until nothing is buffered or in flight (ignores retry backoff)"""
+        while self.depth or self._inflight:
+            await self.flush(force=True)
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "depth_by_collection": {name: len(batch) for name, batch in self._pending.items() if batch},
+            "flushes": self.flushes,
+            "documents_written": self.documents_written,
+            "write_errors": self.write_errors,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "listener_errors": self.listener_errors,
+            "flush_latency_ms": {
+                "last": round(self.last_flush_ms, 2),
+                "avg": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+                "max": round(self.max_flush_ms, 2)
+            }
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.max_wait)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Write-behind flush failed: {e}")
+
+    def _spawn_flush(self, collection: Optional[str], force: bool = False):
+        task = asyncio.create_task(self.flush(collection, force))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush_collection(self, name: str, force: bool = False):
+        if not force and time.monotonic() < self._retry_at.get(name, 0.0):
+            return
+        batch = self._pending.pop(name, None)
+        if not batch:
+            return
+
+        database = self.database if self.database is not None else await get_database()
+        started = time.perf_counter()
+        stored: List[dict] = []
+        try:
+            await database[name].insert_many([document for document, _ in batch], ordered=False)
+            stored = [document for document, _ in batch]
+            self._retry_at.pop(name, None)
+        except BulkWriteError as e:
+            # Unordered: everything except the rejected documents was written. A
+            # duplicate _id on a retried document means an earlier attempt got through
+            rejected = {}
+            for error in e.details.get("writeErrors", []):
+                attempts = batch[error["index"]][1]
+                if not (error.get("code") == DUPLICATE_KEY and attempts > 0):
+                    rejected[error["index"]] = error
+            stored = [document for index, (document, _) in enumerate(batch) if index not in rejected]
+            if rejected:
+                self.write_errors += len(rejected)
+                logger.error(f"❌ {len(rejected)} {name} documents rejected: {list(rejected.values())[:1]}")
+        except Exception as e:
+            self._requeue(name, batch, e)
+        written = len(stored)
+
+        if stored:
+            for listener in self._listeners.get(name, []):
+                try:
+                    await listener(database, stored)
+                except Exception as e:
+                    self.listener_errors += 1
+                    logger.error(f"❌ {name} write listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.documents_written += written
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        if self._space is not None and self.depth < self.max_depth:
+            self._space.set()
+
+    def _requeue(self, name: str, batch: List[Tuple[dict, int]], error: Exception):
+        retry = [(document, attempts + 1) for document, attempts in batch if attempts + 1 < WRITE_MAX_ATTEMPTS]
+        dropped = len(batch) - len(retry)
+        self.retries += len(retry)
+        self.dropped += dropped
+        self.write_errors += dropped
+        logger.error(f"❌ Writing {len(batch)} {name} documents failed ({dropped} dropped): {error}")
+        # Put them back in front of anything queued since, and back off 1s, 2s, ...
+        self._pending[name] = retry + self._pending.get(name, [])
+        attempts = max((attempts for _, attempts in retry), default=0)
+        self._retry_at[name] = time.monotonic() + 2 ** max(0, attempts - 1)
+
+
+# Application-wide buffer for chat history, sessions and crisis alerts
+write_buffer = WriteBehindBuffer()
+
+# Keep the daily mood rollups and per-user counters in step with stored records
+write_buffer.add_listener("chatbot_history", apply_mood_rollups)
+write_buffer.add_listener("chatbot_history", apply_message_stats)
+write_buffer.add_listener("sessions", apply_session_stats)
+write_buffer.add_listener("crisis_alerts", apply_alert_stats)
+# Last, so a new ETag is only handed out once the rollups and counters include the batch
+write_buffer.add_listener("chatbot_history", data_versions.bump_documents)
+write_buffer.add_listener("sessions", data_versions.bump_documents)
+write_buffer.add_listener("crisis_alerts", data_versions.bump_documents)
@@ -0,0 +1,221 @@
+"""
+Index Manager
+Declared Mongo indexes, applied idempotently, plus query-plan self-checks
+
+Every query the API runs is listed in QUERY_SHAPES next to the indexes
+meant to serve it. At startup `apply_indexes` creates whatever is missing
+(existing indexes are matched by key pattern, whatever their name) and
+`verify_query_plans` explains each shape; a plan that scans the whole
+collection (COLLSCAN) is an error, so a query/index drift shows up on
+deploy instead of as slow requests. INDEX_PLAN_CHECK=warn only logs it.
+
+Run (from backend/):
+    python -m app.database.indexes            # apply + verify
+    python -m app.database.indexes --check    # verify only
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# fail: refuse to start on a COLLSCAN | warn: log it | off: skip the explain checks
+INDEX_PLAN_CHECK = os.getenv("INDEX_PLAN_CHECK", "fail")
+# Drop indexes on managed collections that are no longer declared
+INDEX_DROP_OBSOLETE = os.getenv("INDEX_DROP_OBSOLETE", "false").lower() == "true"
+
+PROBE_USER = "__index_probe__"
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    unique: bool = False
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+INDEXES = [
+    # _id breaks timestamp ties for chat-history cursors; the prefix serves the other queries
+    IndexSpec("chatbot_history", [("userId", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+              "userId_timestamp_id"),
+    IndexSpec("crisis_alerts", [("userId", ASCENDING), ("resolved", ASCENDING)], "userId_resolved"),
+    IndexSpec("crisis_alerts", [("userId", ASCENDING), ("timestamp", DESCENDING)], "userId_timestamp"),
+    IndexSpec("sessions", [("userId", ASCENDING)], "userId"),
+    IndexSpec("mood_daily", [("userId", ASCENDING), ("day", ASCENDING)], "userId_day", unique=True),
+    IndexSpec("user_stats", [("userId", ASCENDING)], "userId", unique=True),
+]
+
+# One entry per query in routes/chatbot.py and the per-user maintenance jobs
+# (probe values stand in for request data)
+QUERY_SHAPES = [
+    QueryShape("chat_history", "chatbot_history", {"userId": PROBE_USER}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    QueryShape("chat_history_page", "chatbot_history",
+               {"userId": PROBE_USER, "$or": [{"timestamp": {"$lt": datetime(2000, 1, 1)}},
+                                              {"timestamp": datetime(2000, 1, 1), "_id": {"$lt": ObjectId()}}]},
+               [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    QueryShape("mood_summary", "chatbot_history",
+               {"userId": PROBE_USER, "timestamp": {"$gte": datetime(2000, 1, 1)}}),
+    QueryShape("crisis_alerts", "crisis_alerts", {"userId": PROBE_USER}, [("timestamp", DESCENDING)]),
+    QueryShape("crisis_alerts_by_state", "crisis_alerts",
+               {"userId": PROBE_USER, "resolved": False}, [("timestamp", DESCENDING)]),
+    QueryShape("unresolved_alert_count", "crisis_alerts", {"userId": PROBE_USER, "resolved": False}),
+    # user_stats reconcile --user
+    QueryShape("high_alert_count", "crisis_alerts", {"userId": PROBE_USER, "alert_level": "high"}),
+    QueryShape("session_count", "sessions", {"userId": PROBE_USER}),
+    QueryShape("user_stats", "user_stats", {"userId": PROBE_USER}),
+    QueryShape("mood_daily", "mood_daily", {"userId": PROBE_USER, "day": {"$gte": "2000-01-01"}}, [("day", ASCENDING)]),
+]
+
+
+class QueryPlanError(Exception):
+    """A declared query shape is not served by an index"""
+
+
+async def apply_indexes(db, indexes: List[IndexSpec] = INDEXES, drop_obsolete: bool = INDEX_DROP_OBSOLETE) -> Dict:
+    """Create missing indexes; safe to run on every start"""
+    report = {"created": [], "existing": [], "obsolete": [], "dropped": []}
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in indexes:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection, specs in by_collection.items():
+        existing = await db[collection].index_information()
+        # Mongo refuses a second index on the same keys, so match by key pattern, not name
+        by_keys = {tuple(_normalize_keys(info["key"])): name for name, info in existing.items()}
+        handled = {"_id_"}  # kept for a declared spec, or already dropped
+        missing = []
+        for spec in specs:
+            name = by_keys.get(tuple(spec.keys))
+            if name is not None and existing[name].get("unique", False) == spec.unique:
+                label = spec.name if name == spec.name else f"{name} (declared as {spec.name})"
+                report["existing"].append(f"{collection}.{label}")
+                handled.add(name)
+                continue
+            # Same keys with other options, or the declared name now means other keys
+            stale = [name] if name is not None else []
+            if spec.name in existing and spec.name != name:
+                stale.append(spec.name)
+            for stale_name in stale:
+                if stale_name not in handled:
+                    await db[collection].drop_index(stale_name)
+                    report["dropped"].append(f"{collection}.{stale_name}")
+                    handled.add(stale_name)
+            missing.append(IndexModel(spec.keys, name=spec.name, unique=spec.unique))
+        if missing:
+            await db[collection].create_indexes(missing)
+            report["created"].extend(f"{collection}.{model.document['name']}" for model in missing)
+
+        for name in existing:
+            if name in handled:
+                continue
+            if drop_obsolete:
+                await db[collection].drop_index(name)
+                report["dropped"].append(f"{collection}.{name}")
+            else:
+                report["obsolete"].append(f"{collection}.{name}")
+
+    if report["created"] or report["dropped"]:
+        logger.info(f"✅ Indexes created: {report['created']}, dropped: {report['dropped']}")
+    if report["obsolete"]:
+        logger.warning(f"⚠️ Undeclared indexes (set INDEX_DROP_OBSOLETE=true to drop): {report['obsolete']}")
+    return report
+
+
+def _normalize_keys(keys) -> List[Tuple[str, int]]:
+    # Indexes built by older servers/drivers may report directions as floats
+    return [(field, int(direction) if isinstance(direction, float) else direction) for field, direction in keys]
+
+
+def plan_stages(plan: Dict) -> List[str]:
+    """Every stage name in an explain() plan tree"""
+    stages = [plan["stage"]] if "stage" in plan else []
+    children = []
+    if "inputStage" in plan:
+        children.append(plan["inputStage"])
+    children.extend(plan.get("inputStages", []))
+    children.extend(shard.get("winningPlan", {}) for shard in plan.get("shards", []))
+    if "queryPlan" in plan:
+        children.append(plan["queryPlan"])
+    for child in children:
+        stages.extend(plan_stages(child))
+    return stages
+
+
+async def verify_query_plans(db, shapes: List[QueryShape] = QUERY_SHAPES, mode: str = INDEX_PLAN_CHECK) -> Dict:
+    """Explain every query shape; COLLSCAN raises (mode=fail) or is logged (mode=warn)"""
+    if mode == "off":
+        return {}
+
+    plans, scans = {}, []
+    for shape in shapes:
+        cursor = db[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            if mode == "fail":
+                raise
+            logger.error(f"❌ Could not explain {shape.name}: {e}")
+            continue
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        plans[shape.name] = stages
+        if "COLLSCAN" in stages:
+            scans.append(shape.name)
+
+    if scans:
+        message = f"Queries fall back to COLLSCAN: {scans} ({ {name: plans[name] for name in scans} })"
+        if mode == "fail":
+            raise QueryPlanError(message)
+        logger.error(f"❌ {message}")
+    else:
+        logger.info(f"✅ Query plans verified ({len(plans)} shapes use indexes)")
+    return plans
+
+
+def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .db import DB_NAME, MONGO_URL
+
+    parser = argparse.ArgumentParser(description="Apply and verify the EmoHeal Mongo indexes")
+    parser.add_argument("--check", action="store_true", help="only verify query plans")
+    parser.add_argument("--drop-obsolete", action="store_true", default=INDEX_DROP_OBSOLETE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        client = AsyncIOMotorClient(MONGO_URL)
+        try:
+            db = client[DB_NAME]
+            if not args.check:
+                await apply_indexes(db, drop_obsolete=args.drop_obsolete)
+            await verify_query_plans(db, mode="fail")
+        finally:
+            client.close()
+
+    try:
+        asyncio.run(run())
+    except QueryPlanError as e:
+        logger.error(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
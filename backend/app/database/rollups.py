@@ -0,0 +1,228 @@
+"""
+Mood Rollups
+Per-user, per-day mood counters in `mood_daily`, maintained as messages are stored
+
+One document per (userId, day):
+    {userId, day: "YYYY-MM-DD", count, sentimentSum, emotions: {emotion: count}}
+
+The write-behind buffer calls `apply_mood_rollups` with every stored batch
+of chatbot_history, which folds the batch into one $inc upsert per
+(user, day). /api/mood-summary then reads at most one small document per
+day instead of the raw messages.
+
+Rollups only cover turns stored after the listener was deployed, so run a
+full `rebuild` once after upgrading. It records its completion in
+`rollup_state`; until then MOOD_SUMMARY_SOURCE=auto keeps aggregating
+chatbot_history.
+
+Run (from backend/):
+    python -m app.database.rollups rebuild [--user USER_ID]   # recompute from chatbot_history
+    python -m app.database.rollups check [--user USER_ID]     # compare with chatbot_history
+
+Re-run `rebuild` after bulk changes to chatbot_history (e.g. app.jobs.backfill).
+Turns stored while a rebuild runs can be overwritten; `check` reports any drift.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MOOD_DAILY = "mood_daily"
+ROLLUP_STATE = "rollup_state"
+SENTIMENT_TOLERANCE = 1e-6
+
+
+def day_key(timestamp: datetime) -> str:
+    """Same day boundaries as the stored timestamps ($dateToString, UTC)"""
+    return timestamp.strftime("%Y-%m-%d")
+
+
+def _emotion_field(emotion: str) -> str:
+    # Field names can't contain '.' or start with '$'
+    return "emotions." + str(emotion).replace(".", "_").lstrip("$")
+
+
+def rollup_updates(messages: List[dict]) -> List[UpdateOne]:
+    """One $inc upsert per (user, day) for a batch of chatbot_history documents"""
+    increments: Dict[Tuple[str, str], Counter] = {}
+    for message in messages:
+        user_id, timestamp = message.get("userId"), message.get("timestamp")
+        if user_id is None or not isinstance(timestamp, datetime):
+            continue
+        counter = increments.setdefault((user_id, day_key(timestamp)), Counter())
+        counter["count"] += 1
+        counter["sentimentSum"] += (message.get("sentiment") or {}).get("compound", 0)
+        for emotion in message.get("emotionDetected") or []:
+            counter[_emotion_field(emotion)] += 1
+
+    return [
+        UpdateOne({"userId": user_id, "day": day}, {"$inc": dict(counter)}, upsert=True)
+        for (user_id, day), counter in increments.items()
+    ]
+
+
+async def apply_mood_rollups(db, messages: List[dict]):
+    """Write-behind listener for chatbot_history"""
+    updates = rollup_updates(messages)
+    if updates:
+        await db[MOOD_DAILY].bulk_write(updates, ordered=False)
+
+
+async def raw_daily(db, user_id: Optional[str] = None) -> AsyncIterator[Dict]:
+    """Rollup documents recomputed from chatbot_history, ordered by (userId, day)"""
+    match = {"timestamp": {"$type": "date"}, "userId": {"$exists": True}}
+    if user_id is not None:
+        match["userId"] = user_id
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "userId": 1,
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+            "compound": {"$ifNull": ["$sentiment.compound", 0]},
+            "emotionDetected": {"$ifNull": ["$emotionDetected", []]}
+        }},
+        {"$group": {
+            "_id": {"userId": "$userId", "day": "$day"},
+            "count": {"$sum": 1},
+            "sentimentSum": {"$sum": "$compound"},
+            "emotionLists": {"$push": "$emotionDetected"}
+        }},
+        {"$sort": {"_id.userId": 1, "_id.day": 1}}
+    ]
+    async for group in db.chatbot_history.aggregate(pipeline, allowDiskUse=True):
+        emotions = Counter()
+        for emotion_list in group["emotionLists"]:
+            for emotion in emotion_list:
+                emotions[_emotion_field(emotion)[len("emotions."):]] += 1
+        yield {
+            "userId": group["_id"]["userId"],
+            "day": group["_id"]["day"],
+            "count": group["count"],
+            "sentimentSum": group["sentimentSum"],
+            "emotions": dict(emotions)
+        }
+
+
+async def rebuild(db, user_id: Optional[str] = None, batch_size: int = 1000) -> Dict:
+    """Replace the rollups (of one user, or all) with values recomputed from chatbot_history"""
+    scope = {} if user_id is None else {"userId": user_id}
+    # Mark the existing rollups; every day that still has messages gets replaced
+    # (dropping the mark), so whatever is still marked afterwards is stale
+    mark = str(ObjectId())
+    await db[MOOD_DAILY].update_many(scope, {"$set": {"rebuildPending": mark}})
+
+    seen = 0
+    replacements = []
+    async for rollup in raw_daily(db, user_id):
+        replacements.append(ReplaceOne({"userId": rollup["userId"], "day": rollup["day"]}, rollup, upsert=True))
+        seen += 1
+        if len(replacements) >= batch_size:
+            await db[MOOD_DAILY].bulk_write(replacements, ordered=False)
+            replacements = []
+    if replacements:
+        await db[MOOD_DAILY].bulk_write(replacements, ordered=False)
+
+    stale = await db[MOOD_DAILY].delete_many({"rebuildPending": mark})
+    if user_id is None:
+        await db[ROLLUP_STATE].update_one(
+            {"_id": MOOD_DAILY}, {"$set": {"rebuiltAt": datetime.now(), "documents": seen}}, upsert=True
+        )
+    logger.info(f"✅ Rebuilt {seen} mood_daily documents ({stale.deleted_count} stale removed)")
+    return {"rebuilt": seen, "removed": stale.deleted_count}
+
+
+async def rollups_complete(db) -> bool:
+    """Whether a full rebuild has run, i.e. mood_daily also covers history older than the listener"""
+    return await db[ROLLUP_STATE].find_one({"_id": MOOD_DAILY}, {"_id": 1}) is not None
+
+
+async def check(db, user_id: Optional[str] = None, limit: int = 20) -> Dict:
+    """Merge-join raw daily aggregates with mood_daily and list differences"""
+    scope = {} if user_id is None else {"userId": user_id}
+    stored = db[MOOD_DAILY].find(scope, {"_id": 0}).sort([("userId", 1), ("day", 1)])
+    stored_iter = stored.__aiter__()
+    mismatches: List[Dict] = []
+    checked = 0
+
+    async def next_stored():
+        try:
+            return await stored_iter.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    current = await next_stored()
+    async for expected in raw_daily(db, user_id):
+        key = (expected["userId"], expected["day"])
+        while current is not None and (current["userId"], current["day"]) < key:
+            mismatches.append({"userId": current["userId"], "day": current["day"], "problem": "no messages"})
+            current = await next_stored()
+        checked += 1
+        if current is None or (current["userId"], current["day"]) != key:
+            mismatches.append({"userId": key[0], "day": key[1], "problem": "missing rollup"})
+            continue
+        problems = _compare(expected, current)
+        if problems:
+            mismatches.append({"userId": key[0], "day": key[1], "problem": problems})
+        current = await next_stored()
+    while current is not None:
+        mismatches.append({"userId": current["userId"], "day": current["day"], "problem": "no messages"})
+        current = await next_stored()
+
+    report = {"checked": checked, "mismatches": len(mismatches), "examples": mismatches[:limit]}
+    if mismatches:
+        logger.error(f"❌ mood_daily differs from chatbot_history on {len(mismatches)} days: {mismatches[:3]}")
+    else:
+        logger.info(f"✅ mood_daily consistent ({checked} days)")
+    return report
+
+
+def _compare(expected: Dict, stored: Dict) -> List[str]:
+    problems = []
+    if stored.get("count") != expected["count"]:
+        problems.append(f"count {stored.get('count')} != {expected['count']}")
+    if abs(stored.get("sentimentSum", 0) - expected["sentimentSum"]) > SENTIMENT_TOLERANCE:
+        problems.append(f"sentimentSum {stored.get('sentimentSum')} != {expected['sentimentSum']}")
+    stored_emotions = {k: v for k, v in (stored.get("emotions") or {}).items() if v}
+    if stored_emotions != expected["emotions"]:
+        problems.append(f"emotions {stored_emotions} != {expected['emotions']}")
+    return problems
+
+
+def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .db import DB_NAME, MONGO_URL
+
+    parser = argparse.ArgumentParser(description="Rebuild or check the mood_daily rollups")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user", default=None, help="limit to one userId")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        client = AsyncIOMotorClient(MONGO_URL)
+        try:
+            db = client[DB_NAME]
+            if args.command == "rebuild":
+                return await rebuild(db, args.user)
+            return await check(db, args.user)
+        finally:
+            client.close()
+
+    report = asyncio.run(run())
+    print(report)
+    return 1 if report.get("mismatches") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
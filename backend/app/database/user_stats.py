@@ -0,0 +1,207 @@
+"""
+User Stats
+One counter document per user in `user_stats`, maintained as records are stored
+
+    {userId, messages, sessions, highAlerts, lastMessageAt}
+
+The write-behind buffer hands every stored batch of chatbot_history,
+sessions and crisis_alerts to the listeners below, which fold it into one
+$inc/$max upsert per user. /api/user-stats is then a single point read
+instead of three counts and a sorted lookup.
+
+Run (from backend/):
+    python -m app.database.user_stats reconcile [--user USER_ID]   # recount and fix drift
+    python -m app.database.user_stats reconcile --dry-run          # only report drift
+
+Reconcile once after deploying (records stored before the counters existed
+are not counted) and after bulk changes to the source collections.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+USER_STATS = "user_stats"
+COUNTERS = ("messages", "sessions", "highAlerts")
+
+
+def empty_stats(user_id: str) -> Dict:
+    return {"userId": user_id, "messages": 0, "sessions": 0, "highAlerts": 0, "lastMessageAt": None}
+
+
+def _stats_updates(increments: Dict[str, Counter], latest: Dict[str, datetime]) -> List[UpdateOne]:
+    updates = []
+    for user_id, counter in increments.items():
+        update = {"$inc": dict(counter)}
+        if user_id in latest:
+            update["$max"] = {"lastMessageAt": latest[user_id]}
+        updates.append(UpdateOne({"userId": user_id}, update, upsert=True))
+    return updates
+
+
+def message_stats_updates(messages: List[dict]) -> List[UpdateOne]:
+    """$inc messages and $max lastMessageAt, one upsert per user"""
+    increments: Dict[str, Counter] = {}
+    latest: Dict[str, datetime] = {}
+    for message in messages:
+        user_id = message.get("userId")
+        if user_id is None:
+            continue
+        increments.setdefault(user_id, Counter())["messages"] += 1
+        timestamp = message.get("timestamp")
+        if isinstance(timestamp, datetime) and (user_id not in latest or timestamp > latest[user_id]):
+            latest[user_id] = timestamp
+    return _stats_updates(increments, latest)
+
+
+def session_stats_updates(sessions: List[dict]) -> List[UpdateOne]:
+    increments: Dict[str, Counter] = {}
+    for session in sessions:
+        if session.get("userId") is not None:
+            increments.setdefault(session["userId"], Counter())["sessions"] += 1
+    return _stats_updates(increments, {})
+
+
+def alert_stats_updates(alerts: List[dict]) -> List[UpdateOne]:
+    increments: Dict[str, Counter] = {}
+    for alert in alerts:
+        if alert.get("userId") is not None and alert.get("alert_level") == "high":
+            increments.setdefault(alert["userId"], Counter())["highAlerts"] += 1
+    return _stats_updates(increments, {})
+
+
+async def _apply(db, updates: List[UpdateOne]):
+    if updates:
+        await db[USER_STATS].bulk_write(updates, ordered=False)
+
+
+async def apply_message_stats(db, messages: List[dict]):
+    """Write-behind listener for chatbot_history"""
+    await _apply(db, message_stats_updates(messages))
+
+
+async def apply_session_stats(db, sessions: List[dict]):
+    """Write-behind listener for sessions"""
+    await _apply(db, session_stats_updates(sessions))
+
+
+async def apply_alert_stats(db, alerts: List[dict]):
+    """Write-behind listener for crisis_alerts"""
+    await _apply(db, alert_stats_updates(alerts))
+
+
+async def recount(db, user_id: Optional[str] = None) -> Dict[str, Dict]:
+    """Stats of every user (or one) counted from the source collections"""
+    scope = {"userId": {"$exists": True}} if user_id is None else {"userId": user_id}
+    expected: Dict[str, Dict] = {}
+
+    def stats_of(uid):
+        return expected.setdefault(uid, empty_stats(uid))
+
+    async for group in db.chatbot_history.aggregate([
+        {"$match": scope},
+        {"$group": {"_id": "$userId", "messages": {"$sum": 1}, "lastMessageAt": {"$max": "$timestamp"}}}
+    ], allowDiskUse=True):
+        stats = stats_of(group["_id"])
+        stats["messages"] = group["messages"]
+        stats["lastMessageAt"] = group["lastMessageAt"]
+
+    async for group in db.sessions.aggregate([
+        {"$match": scope},
+        {"$group": {"_id": "$userId", "sessions": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        stats_of(group["_id"])["sessions"] = group["sessions"]
+
+    async for group in db.crisis_alerts.aggregate([
+        {"$match": {**scope, "alert_level": "high"}},
+        {"$group": {"_id": "$userId", "highAlerts": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        stats_of(group["_id"])["highAlerts"] = group["highAlerts"]
+
+    return expected
+
+
+async def reconcile(db, user_id: Optional[str] = None, dry_run: bool = False,
+                    batch_size: int = 1000, limit: int = 20) -> Dict:
+    """Recount from the source collections and overwrite counters that drifted"""
+    expected = await recount(db, user_id)
+    scope = {} if user_id is None else {"userId": user_id}
+    mismatches: List[Dict] = []
+    fixes: List[UpdateOne] = []
+    checked = 0
+
+    async def queue(update: UpdateOne):
+        fixes.append(update)
+        if not dry_run and len(fixes) >= batch_size:
+            await db[USER_STATS].bulk_write(fixes, ordered=False)
+            fixes.clear()
+
+    async for stored in db[USER_STATS].find(scope, {"_id": 0}):
+        checked += 1
+        uid = stored.get("userId")
+        target = expected.pop(uid, None) or empty_stats(uid)
+        problems = _compare(target, stored)
+        if problems:
+            mismatches.append({"userId": uid, "problem": problems})
+            await queue(UpdateOne({"userId": uid}, {"$set": target}))
+    for uid, target in expected.items():
+        checked += 1
+        mismatches.append({"userId": uid, "problem": "missing stats"})
+        await queue(UpdateOne({"userId": uid}, {"$set": target}, upsert=True))
+    if fixes and not dry_run:
+        await db[USER_STATS].bulk_write(fixes, ordered=False)
+
+    report = {"checked": checked, "mismatches": len(mismatches), "fixed": 0 if dry_run else len(mismatches),
+              "examples": mismatches[:limit]}
+    if mismatches:
+        action = "found" if dry_run else "fixed"
+        logger.warning(f"⚠️ user_stats drift {action} for {len(mismatches)} users: {mismatches[:3]}")
+    else:
+        logger.info(f"✅ user_stats consistent ({checked} users)")
+    return report
+
+
+def _compare(expected: Dict, stored: Dict) -> List[str]:
+    problems = [
+        f"{name} {stored.get(name, 0)} != {expected[name]}"
+        for name in COUNTERS if stored.get(name, 0) != expected[name]
+    ]
+    if stored.get("lastMessageAt") != expected["lastMessageAt"]:
+        problems.append(f"lastMessageAt {stored.get('lastMessageAt')} != {expected['lastMessageAt']}")
+    return problems
+
+
+def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from .db import DB_NAME, MONGO_URL
+
+    parser = argparse.ArgumentParser(description="Recount the user_stats counters from the source collections")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.add_argument("--user", default=None, help="limit to one userId")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        client = AsyncIOMotorClient(MONGO_URL)
+        try:
+            return await reconcile(client[DB_NAME], args.user, dry_run=args.dry_run)
+        finally:
+            client.close()
+
+    report = asyncio.run(run())
+    print(report)
+    return 1 if args.dry_run and report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
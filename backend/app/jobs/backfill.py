@@ -0,0 +1,256 @@
+"""
+EmoHeal Backfill
+Re-runs crisis + NLP analysis over stored chatbot_history after lexicon updates
+
+Run (from backend/):
+    python -m app.jobs.backfill --workers 4
+    python -m app.jobs.backfill --dry-run --limit 1000
+
+`sentiment` and `emotionDetected` are recomputed for every message not yet
+stamped with the current `lexiconVersion` (the knowledge pack version, plus the risk model if one
+is configured). `crisisLevel` / `crisisConfidence` are only ever raised: a
+stored level (possibly escalated by the live conversation pattern) is never
+lowered by the re-analysis. Documents are streamed in _id order from a server-side
+cursor, analysed in chunks on a process pool and written back with
+unordered bulk_write updates. The last written _id is checkpointed after
+every chunk, so an interrupted run resumes where it stopped.
+
+Messages are scored on their own, like /api/analyze/batch: the
+conversation-pattern escalation of a live session is not replayed.
+Rebuild the mood rollups afterwards (python -m app.database.rollups rebuild).
+
+`run_backfill` takes any pymongo-compatible collection, so the job can be
+exercised against a local stand-in (e.g. mongomock) with `workers=0`.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import json_util
+from pymongo import UpdateOne
+
+from ..models.crisis_detector import RISK_MODEL_PATH
+from ..services.analysis_executor import (
+    _init_shared_worker, _init_worker, _worker_detect_crisis_batch, _worker_process_batch
+)
+from ..services.knowledge_pack import knowledge
+
+logger = logging.getLogger("emoheal.backfill")
+
+BACKFILL_CHUNK_SIZE = int(os.getenv("BACKFILL_CHUNK_SIZE", "256"))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", str(os.cpu_count() or 1)))
+BACKFILL_CHECKPOINT = os.getenv("BACKFILL_CHECKPOINT", "backfill_checkpoint.json")
+PROGRESS_INTERVAL = 10.0   # seconds between progress log lines
+
+CRISIS_LEVEL_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def lexicon_version(risk_model_path: Optional[str] = RISK_MODEL_PATH) -> str:
+    """Knowledge pack version, combined with the risk model when one is configured"""
+    version = knowledge.current().version
+    if not risk_model_path or not os.path.exists(risk_model_path):
+        return version
+    digest = hashlib.sha256(version.encode())
+    with open(risk_model_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _worker_reanalyze(messages: List[str]) -> List[Dict]:
+    """Pool job: the stored fields for each message of one chunk"""
+    crisis_results = _worker_detect_crisis_batch(messages)
+    nlp_results = _worker_process_batch(messages)
+    return [
+        {
+            "sentiment": nlp['sentiment'],
+            "emotionDetected": [e['emotion'] for e in nlp['emotions']],
+            "crisisLevel": crisis['level'],
+            "crisisConfidence": crisis.get('confidence', 0)
+        }
+        for crisis, nlp in zip(crisis_results, nlp_results)
+    ]
+
+
+def crisis_fields(result: Dict, stored_level: Optional[str]) -> Dict:
+    """The fields of a re-analysis to write, without ever lowering the stored crisis level"""
+    fields = dict(result)
+    if CRISIS_LEVEL_RANK.get(result["crisisLevel"], 0) < CRISIS_LEVEL_RANK.get(stored_level, -1):
+        del fields["crisisLevel"], fields["crisisConfidence"]
+    return fields
+
+
+def load_checkpoint(path: Optional[str], version: str) -> Optional[Dict]:
+    """Checkpoint of an interrupted run for the same lexicon version, if any"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json_util.loads(f.read())
+    if checkpoint.get("lexiconVersion") != version:
+        logger.info(f"Ignoring checkpoint for lexicon {checkpoint.get('lexiconVersion')}")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path: Optional[str], checkpoint: Dict):
+    """Write the checkpoint atomically (a crash never leaves a torn file)"""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(json_util.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+def run_backfill(collection, version: Optional[str] = None, workers: int = BACKFILL_WORKERS,
+                 chunk_size: int = BACKFILL_CHUNK_SIZE, checkpoint_path: Optional[str] = BACKFILL_CHECKPOINT,
+                 limit: Optional[int] = None, dry_run: bool = False,
+                 crisis_detector=None, nlp_processor=None) -> Dict:
+    """
+    Re-analyse `collection` (chatbot_history) and return the run statistics.
+
+    workers=0 analyses in this process, using `crisis_detector` /
+    `nlp_processor` when given instead of loading the models.
+    """
+    version = version or lexicon_version()
+    checkpoint = load_checkpoint(checkpoint_path, version) or {
+        "lexiconVersion": version, "lastId": None, "processed": 0, "updated": 0
+    }
+
+    query = {"lexiconVersion": {"$ne": version}, "userMessage": {"$type": "string"}}
+    if checkpoint["lastId"] is not None:
+        query["_id"] = {"$gt": checkpoint["lastId"]}
+        logger.info(f"Resuming after _id {checkpoint['lastId']} ({checkpoint['processed']} already processed)")
+
+    cursor = collection.find(query, {"userMessage": 1, "crisisLevel": 1}).sort("_id", 1).batch_size(chunk_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    elif crisis_detector is not None and nlp_processor is not None:
+        _init_shared_worker(crisis_detector, nlp_processor)
+    else:
+        _init_worker()
+
+    stats = {"lexiconVersion": version, "processed": 0, "updated": 0}
+    started = time.perf_counter()
+    last_report = started
+
+    def write(ids: List, stored_levels: List[Optional[str]], results: List[Dict]):
+        nonlocal last_report
+        stamped_at = datetime.now()
+        updated = 0
+        if not dry_run:
+            requests = [
+                UpdateOne({"_id": doc_id}, {"$set": {
+                    **crisis_fields(result, stored_level), "lexiconVersion": version, "reanalyzedAt": stamped_at
+                }})
+                for doc_id, stored_level, result in zip(ids, stored_levels, results)
+            ]
+            updated = collection.bulk_write(requests, ordered=False).modified_count
+
+        stats["processed"] += len(ids)
+        stats["updated"] += updated
+        checkpoint.update(lastId=ids[-1], processed=checkpoint["processed"] + len(ids),
+                          updated=checkpoint["updated"] + updated)
+        if not dry_run:
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            logger.info(f"📦 {stats['processed']} docs, {stats['processed'] / (now - started):.0f} docs/sec")
+
+    # Chunks are submitted ahead of time but written strictly in _id order,
+    # so the checkpoint never skips past an unwritten document
+    pending = deque()
+    max_pending = max(1, workers) * 2
+
+    def submit(ids: List, stored_levels: List[Optional[str]], messages: List[str]):
+        if pool is None:
+            write(ids, stored_levels, _worker_reanalyze(messages))
+            return
+        pending.append((ids, stored_levels, pool.submit(_worker_reanalyze, messages)))
+        while len(pending) >= max_pending:
+            done_ids, done_levels, future = pending.popleft()
+            write(done_ids, done_levels, future.result())
+
+    try:
+        ids, stored_levels, messages = [], [], []
+        for doc in cursor:
+            ids.append(doc["_id"])
+            stored_levels.append(doc.get("crisisLevel"))
+            messages.append(doc["userMessage"])
+            if len(ids) >= chunk_size:
+                submit(ids, stored_levels, messages)
+                ids, stored_levels, messages = [], [], []
+        if ids:
+            submit(ids, stored_levels, messages)
+        while pending:
+            done_ids, done_levels, future = pending.popleft()
+            write(done_ids, done_levels, future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["docs_per_sec"] = round(stats["processed"] / elapsed, 1) if elapsed > 0 else 0.0
+    if not dry_run and not limit and checkpoint_path and os.path.exists(checkpoint_path):
+        # Finished: a later run with the same version has nothing left to do
+        os.remove(checkpoint_path)
+    return stats
+
+
+def main():
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Re-analyse chatbot_history with the current lexicons")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME", "EmoHeal"))
+    parser.add_argument("--collection", default="chatbot_history")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="0 runs the analysis in-process")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT)
+    parser.add_argument("--lexicon-version", default=None, help="override the computed version stamp")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="analyse without writing anything")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    client = MongoClient(args.mongo_url)
+    try:
+        stats = run_backfill(
+            client[args.db][args.collection],
+            version=args.lexicon_version,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            checkpoint_path=args.checkpoint,
+            limit=args.limit,
+            dry_run=args.dry_run
+        )
+    finally:
+        client.close()
+
+    logger.info(f"✅ Backfill finished: {stats}")
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+EmoHeal Knowledge Pack Builder
+Compiles crisis keywords, the emotion/topic lexicon and response templates into one pack
+
+Run (from backend/):
+    python -m app.jobs.build_knowledge_pack
+    python -m app.jobs.build_knowledge_pack --lexicon data/emotion_lexicon.json --output /srv/emoheal/knowledge.pack
+
+The pack is written next to its final path and renamed into place, so
+running servers (which re-check KNOWLEDGE_PACK every
+KNOWLEDGE_PACK_CHECK_SECONDS) switch to it without a restart; WebSocket
+sessions stay open and their next message uses the new version.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from ..services.knowledge_pack import (
+    CRISIS_KEYWORDS_PATH, KNOWLEDGE_PACK_PATH, RESPONSES_PATH, KnowledgePack, build_pack, load_sources
+)
+
+logger = logging.getLogger("emoheal.knowledge_pack")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the EmoHeal knowledge pack")
+    parser.add_argument("--crisis-keywords", default=str(CRISIS_KEYWORDS_PATH))
+    parser.add_argument("--responses", default=str(RESPONSES_PATH))
+    parser.add_argument("--lexicon", default=None,
+                        help="JSON with mental_health_terms / therapy_topics / intensifiers overrides")
+    parser.add_argument("--output", default=KNOWLEDGE_PACK_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    sections = load_sources(args.crisis_keywords, args.responses, args.lexicon)
+    version = build_pack(sections, args.output)
+
+    # Read it back the way the services will
+    pack = KnowledgePack.open(args.output)
+    for name in sections:
+        pack.section(name)
+    logger.info(f"✅ Knowledge pack {version} written to {args.output}")
+    print(json.dumps({"version": version, "path": args.output}))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,41 +10,83 @@ Phase 5: Complete Backend with MongoDB
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+import asyncio
 import json
+import time
 from datetime import datetime
 import logging
-from typing import List, Dict
 
 # Import database module
-from .database.db import connect_to_mongo, close_mongo_connection, get_database, create_indexes
+from .database.db import connect_to_mongo, close_mongo_connection, create_indexes, write_buffer
 from .routes.chatbot import router as chatbot_router
+from .routes.analysis import router as analysis_router
 
-# Import AI services
-from .models.crisis_detector import CrisisDetector
-from .services.nlp_processor import NLPProcessor
-from .services.response_generator import TherapeuticResponseGenerator
+# Import AI services (heavy models are imported lazily by the registry)
+from .models.conversation_window import ConversationWindow
+from .services.analysis_executor import analysis_executor
+from .services.registry import services
+from .services.knowledge_pack import knowledge
+from .services.response_cache import response_cache
+from .services.metrics import (
+    ACTIVE_SESSIONS, CHAT_ERRORS, CHAT_MESSAGES, CRISIS_LEVELS, METRICS_ENABLED, StageTimer, metrics
+)
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # ============================================
 # INITIALIZE SERVICES
 # ============================================
 
-CRISIS_READY = False
-NLP_READY = False
+# `services` (model registry) and `analysis_executor` (worker pool that keeps
+# crisis + NLP analysis off the event loop) are application-wide singletons;
+# the executor picks up each service the moment it has loaded
+services.add_listener(analysis_executor.attach)
 
-try:
-    crisis_detector = CrisisDetector()
-    CRISIS_READY = True
-    print("✅ CrisisDetector loaded")
-except Exception as e:
-    print(f"⚠️ CrisisDetector failed: {e}")
+async def load_services():
+    """Load models off the event loop, then start the analysis workers"""
+    await services.load()
+
+    services.mark("analysis_workers", "loading")
+    started = time.perf_counter()
+    try:
+        await analysis_executor.start()
+    except Exception as e:
+        logger.error(f"❌ Analysis executor failed to start: {e}")
+        services.mark("analysis_workers", "failed", load_seconds=round(time.perf_counter() - started, 3), error=str(e))
+        return
+    # A pool that fell back to inline still serves requests; the reason shows in /ready
+    services.mark("analysis_workers", "ready", load_seconds=round(time.perf_counter() - started, 3),
+                  error=analysis_executor.degraded)
 
-try:
-    nlp_processor = NLPProcessor()
-    response_generator = TherapeuticResponseGenerator()
-    NLP_READY = True
-    print("✅ NLP & Response Generator loaded")
-except Exception as e:
-    print(f"⚠️ NLP failed: {e}")
+
+# ============================================
+# STARTUP & SHUTDOWN (LIFESPAN)
+# ============================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect the database, load services in the background, clean up on exit"""
+    await connect_to_mongo()
+    await create_indexes()
+    write_buffer.start()
+    loader = asyncio.create_task(load_services())
+    logger.info("🚀 EmoHeal API started with database (services loading)")
+
+    yield
+
+    loader.cancel()
+    try:
+        await loader
+    except (asyncio.CancelledError, Exception):
+        pass
+    await analysis_executor.shutdown()
+    await write_buffer.stop()
+    await close_mongo_connection()
+    logger.info("🔌 EmoHeal API stopped")
 
 # ============================================
 # CREATE FASTAPI APP
@@ -53,7 +95,8 @@ except Exception as e:
 app = FastAPI(
     title="EmoHeal Psychiatric Chatbot API",
     version="0.3.0",
-    description="AI-powered mental health support with crisis detection"
+    description="AI-powered mental health support with crisis detection",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -70,27 +113,7 @@ app.add_middleware(
 
 # Include API routes
 app.include_router(chatbot_router)
-
-# Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# ============================================
-# STARTUP & SHUTDOWN EVENTS
-# ============================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    await connect_to_mongo()
-    #await create_indexes()
-    logger.info("🚀 EmoHeal API started with database")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close database on shutdown"""
-    await close_mongo_connection()
-    logger.info("🔌 EmoHeal API stopped")
+app.include_router(analysis_router)
 
 # ============================================
 # ROOT ENDPOINTS
@@ -104,19 +127,22 @@ async def root():
         "version": "0.3.0",
         "status": "running",
         "modules": {
-            "crisis_detection": CRISIS_READY,
-            "nlp_processing": NLP_READY,
+            "crisis_detection": services.crisis_ready,
+            "nlp_processing": services.nlp_ready,
             "database": "connected"
         },
         "endpoints": {
             "websocket_chat": "ws://localhost:8000/ws/chat/{user_id}",
             "api_docs": "/docs",
             "health": "/health",
+            "readiness": "/ready",
+            "metrics": "/metrics",
             "database_health": "/api/health/database",
             "chat_history": "/api/chat-history/{user_id}",
             "mood_summary": "/api/mood-summary/{user_id}",
             "crisis_alerts": "/api/crisis-alerts/{user_id}",
-            "user_stats": "/api/user-stats/{user_id}"
+            "user_stats": "/api/user-stats/{user_id}",
+            "batch_analysis": "POST /api/analyze/batch"
         }
     }
 
@@ -126,14 +152,41 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "emoheal-psychiatric-chatbot",
-        "crisis_detector": CRISIS_READY,
-        "nlp_processor": NLP_READY
+        "crisis_detector": services.crisis_ready,
+        "nlp_processor": services.nlp_ready,
+        "nlp_cache": analysis_executor.cache.stats(),
+        "knowledge_pack": knowledge.stats(),
+        "write_buffer": write_buffer.stats(),
+        "response_cache": response_cache.stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 once every service is loaded, 503 before"""
+    readiness = services.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+# Queue depths and cache counters, read at scrape time
+metrics.gauge("emoheal_write_buffer_depth", "Documents waiting in the write-behind buffer",
+              function=lambda: write_buffer.depth)
+metrics.counter("emoheal_write_buffer_errors_total", "Documents the write-behind buffer failed to store",
+                function=lambda: write_buffer.write_errors)
+metrics.counter("emoheal_nlp_cache_hits_total", "NLP analyses answered from the cache",
+                function=lambda: analysis_executor.cache.hits)
+metrics.counter("emoheal_nlp_cache_misses_total", "NLP analyses computed",
+                function=lambda: analysis_executor.cache.misses)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of this process's metrics"""
+    if not METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/test-crisis")
 async def test_crisis():
     """Test crisis detection"""
-    if not CRISIS_READY:
+    if not services.crisis_ready:
         return {"error": "Crisis detector not ready"}
     
     tests = [
@@ -145,7 +198,7 @@ async def test_crisis():
     
     results = []
     for test in tests:
-        result = crisis_detector.detect_crisis_level(test, [])
+        result = services.crisis_detector.detect_crisis_level(test, [])
         results.append({"input": test, "result": result})
     
     return {"tests": results, "total": len(results)}
@@ -154,6 +207,159 @@ async def test_crisis():
 # WEBSOCKET CHAT ENDPOINT
 # ============================================
 
+# Clients opt in with ws://.../ws/chat/{user_id}?protocol=staged, or per
+# message with {"message": ..., "protocol": "staged"}
+STAGED_PROTOCOL = "staged"
+
+CRISIS_RESOURCES = {
+    "suicide_hotline": "988",
+    "crisis_text": "Text HOME to 741741",
+    "emergency": "911"
+}
+
+
+def crisis_alert_record(user_id: str, session_id: str, user_message: str, crisis_result: dict) -> dict:
+    return {
+        "userId": user_id,
+        "sessionId": session_id,
+        "alert_level": "high",
+        "trigger_message": user_message,
+        "detected_keywords": crisis_result.get('triggered_keywords', []),
+        "resolved": False,
+        "timestamp": datetime.now()
+    }
+
+
+def session_record(user_id: str, session_id: str) -> dict:
+    return {
+        "userId": user_id,
+        "sessionId": session_id,
+        "startedAt": datetime.now()
+    }
+
+
+def chat_history_record(user_id: str, session_id: str, user_message: str, bot_response: str,
+                        nlp_analysis, crisis_level: str, crisis_result) -> dict:
+    emotions = nlp_analysis.get('emotions', []) if nlp_analysis else []
+    return {
+        "userId": user_id,
+        "sessionId": session_id,
+        "userMessage": user_message,
+        "botResponse": bot_response,
+        "sentiment": nlp_analysis['sentiment'] if nlp_analysis else {},
+        "emotionDetected": [e['emotion'] for e in emotions],
+        "crisisLevel": crisis_level,
+        "crisisConfidence": crisis_result.get('confidence', 0) if crisis_result else 0,
+        "timestamp": datetime.now()
+    }
+
+
+def compose_response(user_message: str, nlp_analysis, crisis_level: str, conversation: ConversationWindow) -> str:
+    if services.nlp_ready and nlp_analysis:
+        return services.response_generator.generate_response(
+            nlp_analysis,
+            crisis_level,
+            conversation.history
+        )
+    return f"I hear you saying: '{user_message}'. Tell me more about how you're feeling."
+
+
+async def staged_turn(websocket: WebSocket, user_id: str, session_id: str,
+                      conversation: ConversationWindow, user_message: str, message_id, timer: StageTimer):
+    """
+    One chat turn over the staged protocol. Frames, all tagged with message_id:
+      ack          -> as soon as the message is read
+      crisis       -> level / confidence / action (final for high risk, with resources)
+      analysis     -> sentiment, emotions, topics
+      bot_response -> the reply (final)
+    NLP starts alongside crisis detection; records are buffered after sending.
+    """
+    await websocket.send_json({
+        "type": "ack",
+        "message_id": message_id,
+        "timestamp": datetime.now().isoformat()
+    })
+    timer.mark("send")
+
+    nlp_task = None
+    if services.nlp_ready:
+        nlp_task = asyncio.create_task(analysis_executor.process_message(user_message))
+
+    try:
+        # ---- STAGE 1: CRISIS DETECTION ----
+        crisis_level = "low"
+        crisis_result = None
+        if services.crisis_ready:
+            crisis_result = await analysis_executor.detect_crisis_level(user_message, conversation)
+            crisis_level = crisis_result['level']
+            CRISIS_LEVELS.labels(crisis_level).inc()
+        timer.mark("crisis")
+
+        crisis_frame = {
+            "type": "crisis",
+            "message_id": message_id,
+            "level": crisis_level,
+            "confidence": crisis_result.get('confidence', 0) if crisis_result else 0,
+            "action": crisis_result['action'] if crisis_result else None,
+            "final": crisis_level == 'high',
+            "timestamp": datetime.now().isoformat()
+        }
+        if crisis_level == 'high':
+            crisis_frame["message"] = crisis_result['message']
+            crisis_frame["resources"] = CRISIS_RESOURCES
+        await websocket.send_json(crisis_frame)
+        timer.mark("send")
+
+        if crisis_level == 'high':
+            await write_buffer.insert(
+                "crisis_alerts", crisis_alert_record(user_id, session_id, user_message, crisis_result), urgent=True
+            )
+            await write_buffer.insert(
+                "chatbot_history",
+                chat_history_record(user_id, session_id, user_message, "CRISIS_ALERT", None, "high", crisis_result)
+            )
+            timer.mark("db_insert")
+            return
+
+        # ---- STAGE 2: NLP ANALYSIS ----
+        nlp_analysis = await nlp_task if nlp_task is not None else None
+        nlp_task = None
+        timer.mark("nlp")
+        if nlp_analysis:
+            await websocket.send_json({
+                "type": "analysis",
+                "message_id": message_id,
+                "sentiment": nlp_analysis['sentiment'],
+                "emotions": nlp_analysis.get('emotions', []),
+                "topics": nlp_analysis.get('topics', []),
+                "timestamp": datetime.now().isoformat()
+            })
+            timer.mark("send")
+    finally:
+        if nlp_task is not None:
+            nlp_task.cancel()
+
+    # ---- STAGE 3: RESPONSE ----
+    bot_response = compose_response(user_message, nlp_analysis, crisis_level, conversation)
+    timer.mark("response")
+    await websocket.send_json({
+        "type": "bot_response",
+        "message_id": message_id,
+        "message": bot_response,
+        "crisis_level": crisis_level,
+        "final": True,
+        "timestamp": datetime.now().isoformat()
+    })
+    timer.mark("send")
+
+    # ---- STAGE 4: STORE IN DATABASE (write-behind) ----
+    await write_buffer.insert(
+        "chatbot_history",
+        chat_history_record(user_id, session_id, user_message, bot_response, nlp_analysis, crisis_level, crisis_result)
+    )
+    timer.mark("db_insert")
+
+
 @app.websocket("/ws/chat/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """
@@ -163,14 +369,21 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     - NLP emotion analysis
     - Response generation
     - Data storage in MongoDB
+    Staged clients (?protocol=staged) get ack / crisis / analysis / bot_response
+    frames per message; everyone else gets a single bot_response (or crisis_alert).
     """
     await websocket.accept()
-    db = await get_database()
+    ACTIVE_SESSIONS.inc()
     
     session_id = f"{user_id}_{datetime.now().timestamp()}"
-    conversation_history: List[Dict] = []
+    conversation = ConversationWindow()
+    staged_session = websocket.query_params.get("protocol") == STAGED_PROTOCOL
+    turn = 0
     
     try:
+        # Record the session (counted into user_stats when it is stored)
+        await write_buffer.insert("sessions", session_record(user_id, session_id))
+
         # Send welcome message
         await websocket.send_json({
             "type": "bot_response",
@@ -182,65 +395,65 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         while True:
             # Receive message from client
             data = await websocket.receive_text()
+            timer = StageTimer()
             message_data = json.loads(data)
             user_message = message_data.get("message", "").strip()
             
             if not user_message:
                 continue
+            turn += 1
+            timer.mark("receive")
             
-            # Add to conversation history
-            conversation_history.append({
-                "message": user_message,
-                "timestamp": datetime.now()
-            })
+            # Add to conversation history (bounded, updates pattern counts)
+            conversation.append(user_message)
+
+            if staged_session or message_data.get("protocol") == STAGED_PROTOCOL:
+                await staged_turn(
+                    websocket, user_id, session_id, conversation, user_message,
+                    message_data.get("id", turn), timer
+                )
+                timer.finish(STAGED_PROTOCOL)
+                CHAT_MESSAGES.labels(STAGED_PROTOCOL).inc()
+                logger.info(f"Chat: User={user_id}, staged turn {turn} processed")
+                continue
             
             # ---- STEP 1: CRISIS DETECTION ----
             crisis_level = "low"
             crisis_result = None
             
-            if CRISIS_READY:
-                crisis_result = crisis_detector.detect_crisis_level(user_message, conversation_history)
+            if services.crisis_ready:
+                crisis_result = await analysis_executor.detect_crisis_level(user_message, conversation)
                 crisis_level = crisis_result['level']
+                CRISIS_LEVELS.labels(crisis_level).inc()
+                timer.mark("crisis")
                 
                 # If HIGH CRISIS, handle immediately
                 if crisis_level == 'high':
-                    # Log crisis alert to database
-                    await db.crisis_alerts.insert_one({
-                        "user_id": user_id,
-                        "session_id": session_id,
-                        "alert_level": "high",
-                        "trigger_message": user_message,
-                        "detected_keywords": crisis_result.get('triggered_keywords', []),
-                        "resolved": False,
-                        "timestamp": datetime.now()
-                    })
+                    # Log crisis alert to database (flushed immediately)
+                    await write_buffer.insert(
+                        "crisis_alerts", crisis_alert_record(user_id, session_id, user_message, crisis_result), urgent=True
+                    )
+                    timer.mark("db_insert")
                     
                     # Send crisis alert to user
                     response = {
                         "type": "crisis_alert",
                         "message": crisis_result['message'],
                         "level": "high",
-                        "resources": {
-                            "suicide_hotline": "988",
-                            "crisis_text": "Text HOME to 741741",
-                            "emergency": "911"
-                        },
+                        "resources": CRISIS_RESOURCES,
                         "timestamp": datetime.now().isoformat()
                     }
                     await websocket.send_json(response)
+                    timer.mark("send")
                     
                     # Store message in database
-                    await db.chatbot_history.insert_one({
-                        "userId": user_id,
-                        "sessionId": session_id,
-                        "userMessage": user_message,
-                        "botResponse": "CRISIS_ALERT",
-                        "sentiment": {},
-                        "emotionDetected": [],
-                        "crisisLevel": "high",
-                        "crisisConfidence": crisis_result.get('confidence', 0),
-                        "timestamp": datetime.now()
-                    })
+                    await write_buffer.insert(
+                        "chatbot_history",
+                        chat_history_record(user_id, session_id, user_message, "CRISIS_ALERT", None, "high", crisis_result)
+                    )
+                    timer.mark("db_insert")
+                    timer.finish("legacy")
+                    CHAT_MESSAGES.labels("legacy").inc()
                     
                     # Skip normal response and continue
                     continue
@@ -249,32 +462,21 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             nlp_analysis = None
             emotions = []
             
-            if NLP_READY:
-                nlp_analysis = nlp_processor.process_message(user_message)
+            if services.nlp_ready:
+                nlp_analysis = await analysis_executor.process_message(user_message)
                 emotions = nlp_analysis.get('emotions', [])
+                timer.mark("nlp")
             
             # ---- STEP 3: RESPONSE GENERATION ----
-            if NLP_READY and nlp_analysis:
-                bot_response = response_generator.generate_response(
-                    nlp_analysis,
-                    crisis_level,
-                    conversation_history
-                )
-            else:
-                bot_response = f"I hear you saying: '{user_message}'. Tell me more about how you're feeling."
+            bot_response = compose_response(user_message, nlp_analysis, crisis_level, conversation)
+            timer.mark("response")
             
-            # ---- STEP 4: STORE IN DATABASE ----
-            await db.chatbot_history.insert_one({
-                "userId": user_id,
-                "sessionId": session_id,
-                "userMessage": user_message,
-                "botResponse": bot_response,
-                "sentiment": nlp_analysis['sentiment'] if nlp_analysis else {},
-                "emotionDetected": [e['emotion'] for e in emotions] if emotions else [],
-                "crisisLevel": crisis_level,
-                "crisisConfidence": crisis_result.get('confidence', 0) if crisis_result else 0,
-                "timestamp": datetime.now()
-            })
+            # ---- STEP 4: STORE IN DATABASE (write-behind) ----
+            await write_buffer.insert(
+                "chatbot_history",
+                chat_history_record(user_id, session_id, user_message, bot_response, nlp_analysis, crisis_level, crisis_result)
+            )
+            timer.mark("db_insert")
             
             # ---- STEP 5: SEND RESPONSE TO USER ----
             response_data = {
@@ -290,14 +492,22 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                 response_data["topics"] = nlp_analysis.get('topics', [])
             
             await websocket.send_json(response_data)
+            timer.mark("send")
+            timer.finish("legacy")
+            CHAT_MESSAGES.labels("legacy").inc()
             
             logger.info(f"Chat: User={user_id}, Crisis={crisis_level}, Message processed")
     
     except WebSocketDisconnect:
         logger.info(f"User {user_id} disconnected")
     except Exception as e:
+        CHAT_ERRORS.labels(type(e).__name__).inc()
         logger.error(f"WebSocket error: {str(e)}")
         try:
             await websocket.close()
         except:
             pass
+    finally:
+        # The session's last messages go out with the next timed flush
+        # (WRITE_BATCH_MAX_WAIT_MS); shutdown drains whatever is left
+        ACTIVE_SESSIONS.dec()
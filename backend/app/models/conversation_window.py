@@ -0,0 +1,70 @@
+"""
+Conversation Window
+Bounded per-session history with incremental crisis pattern scoring
+"""
+
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Deque, Dict, List
+
+NEGATIVE_WORDS = ["can't", "won't", "never", "always", "nothing", "nobody"]
+
+PATTERN_WINDOW = 5      # Messages considered by the pattern score
+PATTERN_MIN_MESSAGES = 3
+MAX_HISTORY = 20        # Messages kept for response personalisation
+
+
+class ConversationWindow:
+    """
+    Ring buffer of recent messages for one chat session.
+
+    Keeps a running count of negative-word hits over the last
+    PATTERN_WINDOW messages, so the pattern score costs O(1) per message
+    instead of rescanning the window on every turn.
+    """
+
+    def __init__(self, max_history: int = MAX_HISTORY, pattern_window: int = PATTERN_WINDOW,
+                 negative_words: List[str] = NEGATIVE_WORDS):
+        self.history: Deque[Dict] = deque(maxlen=max_history)
+        self.negative_words = negative_words
+        self.message_count = 0
+        self._hits: Deque[int] = deque(maxlen=pattern_window)
+        self._hit_total = 0
+
+    def __len__(self) -> int:
+        return self.message_count
+
+    def append(self, message: str, timestamp: datetime = None) -> Dict:
+        """Add a user message and update the rolling window counts"""
+        entry = {"message": message, "timestamp": timestamp or datetime.now()}
+        self.history.append(entry)
+        self.message_count += 1
+
+        hits = count_negative_words(message, self.negative_words)
+        if len(self._hits) == self._hits.maxlen:
+            self._hit_total -= self._hits[0]
+        self._hits.append(hits)
+        self._hit_total += hits
+        return entry
+
+    def pattern_score(self) -> float:
+        """Same value CrisisDetector._analyze_conversation_pattern gives for the full history"""
+        if self.message_count < PATTERN_MIN_MESSAGES:
+            return 0.0
+        return score_for_hits(self._hit_total)
+
+
+def count_negative_words(message: str, negative_words: List[str] = NEGATIVE_WORDS) -> int:
+    """Number of negative words present in a message"""
+    text = message.lower()
+    return sum(1 for word in negative_words if word in text)
+
+
+@lru_cache(maxsize=None)
+def score_for_hits(hits: int) -> float:
+    """Pattern score for a hit count, accumulated the way the original loop adds 0.1"""
+    crisis_score = 0.0
+    for _ in range(hits):
+        crisis_score += 0.1
+    return min(crisis_score, 1.0)
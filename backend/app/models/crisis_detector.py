@@ -1,82 +1,201 @@
-import json
-import numpy as np
-from typing import Dict, List
+import os
+import re
+from typing import Dict, List, Union
+
+from .conversation_window import ConversationWindow, NEGATIVE_WORDS
+from ..utils.keyword_automaton import KeywordAutomaton
+from ..utils.fuzzy_index import ENGLISH_WORDS_PATH, SymSpellIndex, load_word_list
+from ..services.knowledge_pack import KnowledgeStore, knowledge
+
+FUZZY_MAX_EDIT_DISTANCE = int(os.getenv("CRISIS_FUZZY_MAX_EDITS", "1"))
+# Real words are never "corrected" into crisis vocabulary (dine/dive/diet stay put)
+FUZZY_DICTIONARY_PATH = os.getenv("CRISIS_FUZZY_DICTIONARY", str(ENGLISH_WORDS_PATH))
+RISK_MODEL_PATH = os.getenv("CRISIS_RISK_MODEL")
+RISK_MODEL_THRESHOLD = float(os.getenv("CRISIS_RISK_THRESHOLD", "0.8"))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
 
 class CrisisDetector:
-    def __init__(self):
-        # Load crisis keywords
-        with open('../data/crisis_keywords.json', 'r') as f:
-            self.keywords = json.load(f)
-        
+    def __init__(self, max_edit_distance: int = FUZZY_MAX_EDIT_DISTANCE,
+                 risk_model_path: str = RISK_MODEL_PATH, risk_threshold: float = RISK_MODEL_THRESHOLD,
+                 knowledge_store: KnowledgeStore = knowledge):
+        self.max_edit_distance = max_edit_distance
+        # Crisis tiers come from the knowledge pack and are rebuilt when it changes
+        self.knowledge = knowledge_store
+        self.knowledge_version = None
+        self._refresh_keywords()
+
+        # Optional statistical scorer; keyword tiers always take precedence
+        self.risk_scorer = None
+        self.risk_threshold = risk_threshold
+        if risk_model_path:
+            from .risk_scorer import RiskScorer
+            self.risk_scorer = RiskScorer.load(risk_model_path)
+
+    def _refresh_keywords(self):
+        """Recompile the keyword tiers if the knowledge pack has a new version"""
+        pack = self.knowledge.current()
+        if pack.version == self.knowledge_version:
+            return
+        keywords = pack.section('crisis_keywords')
+
         # Risk levels with scores
-        self.risk_levels = {
-            'high': {'keywords': self.keywords['high_risk_keywords'], 'score': 0.9},
-            'medium': {'keywords': self.keywords['medium_risk_keywords'], 'score': 0.5},
-            'low': {'keywords': self.keywords['low_risk_keywords'], 'score': 0.2}
+        risk_levels = {
+            'high': {'keywords': keywords['high_risk_keywords'], 'score': 0.9},
+            'medium': {'keywords': keywords['medium_risk_keywords'], 'score': 0.5},
+            'low': {'keywords': keywords['low_risk_keywords'], 'score': 0.2}
         }
 
-    def detect_crisis_level(self, user_message: str, conversation_history: List[Dict]) -> Dict:
+        # Compile high/medium tiers into one automaton (single pass per message)
+        keyword_matcher = KeywordAutomaton(word_boundary=True)
+        for level in ('high', 'medium'):
+            for keyword in risk_levels[level]['keywords']:
+                keyword_matcher.add(keyword, level)
+        keyword_matcher.build()
+
+        # Typo-tolerant index over the words used in those tiers (0 disables it)
+        fuzzy_index = None
+        if self.max_edit_distance > 0:
+            fuzzy_index = SymSpellIndex(max_edit_distance=self.max_edit_distance,
+                                        known_words=load_word_list(FUZZY_DICTIONARY_PATH))
+            for level in ('high', 'medium'):
+                for keyword in risk_levels[level]['keywords']:
+                    for token in TOKEN_PATTERN.findall(keyword.lower()):
+                        fuzzy_index.add(token)
+
+        # Swap in only once everything is built; in-flight calls finish on the old tiers
+        self.keywords, self.risk_levels = keywords, risk_levels
+        self.keyword_matcher, self.fuzzy_index = keyword_matcher, fuzzy_index
+        self.knowledge_version = pack.version
+
+    def detect_crisis_level(self, user_message: str,
+                            conversation_history: Union[ConversationWindow, List[Dict]]) -> Dict:
         """
         Detect crisis level from user message
+        conversation_history: a session's ConversationWindow (O(1) pattern score) or a plain message list
         Returns: {level: 'low'|'medium'|'high', confidence: 0-1, triggered_keywords: [...]}
         """
-        message_lower = user_message.lower()
+        self._refresh_keywords()
+        matches = self.keyword_matcher.find_keywords(user_message)
+        fuzzy_matches = {}
+        if not matches.get('high'):
+            fuzzy_matches = self._find_fuzzy_keywords(user_message, matches)
 
         # Step 1: Check for high-risk keywords (IMMEDIATE DANGER)
-        for keyword in self.risk_levels['high']['keywords']:
-            if keyword in message_lower:
-                return {
-                    'level': 'high',
-                    'confidence': 0.95,
-                    'triggered_keywords': [keyword],
-                    'action': 'IMMEDIATE_INTERVENTION',
-                    'message': 'We detect you may be in immediate danger. Please reach out to emergency services: 988 (US) or your local crisis line.'
-                }
+        if matches.get('high') or fuzzy_matches.get('high'):
+            return {
+                'level': 'high',
+                'confidence': 0.95 if matches.get('high') else 0.85,
+                'triggered_keywords': matches.get('high') or fuzzy_matches['high'],
+                'fuzzy_keywords': fuzzy_matches.get('high', []),
+                'action': 'IMMEDIATE_INTERVENTION',
+                'message': 'We detect you may be in immediate danger. Please reach out to emergency services: 988 (US) or your local crisis line.'
+            }
 
         # Step 2: Check for medium-risk keywords
-        for keyword in self.risk_levels['medium']['keywords']:
-            if keyword in message_lower:
+        if matches.get('medium') or fuzzy_matches.get('medium'):
+            return {
+                'level': 'medium',
+                'confidence': 0.7 if matches.get('medium') else 0.6,
+                'triggered_keywords': matches.get('medium') or fuzzy_matches['medium'],
+                'fuzzy_keywords': fuzzy_matches.get('medium', []),
+                'action': 'INCREASED_MONITORING',
+                'message': "I sense you're going through something difficult. Let's talk about this."
+            }
+
+        # Step 3: Statistical risk score (only when a model is configured)
+        risk_probability = None
+        if self.risk_scorer is not None:
+            risk_probability = round(self.risk_scorer.score(user_message), 3)
+            if risk_probability >= self.risk_threshold:
                 return {
                     'level': 'medium',
-                    'confidence': 0.7,
-                    'triggered_keywords': [keyword],
+                    'confidence': risk_probability,
+                    'triggered_keywords': [],
+                    'risk_probability': risk_probability,
                     'action': 'INCREASED_MONITORING',
                     'message': "I sense you're going through something difficult. Let's talk about this."
                 }
 
-        # Step 3: Analyze conversation pattern
+        # Step 4: Analyze conversation pattern
         crisis_score = self._analyze_conversation_pattern(conversation_history)
 
         if crisis_score > 0.6:
-            return {
+            result = {
                 'level': 'medium',
                 'confidence': crisis_score,
                 'triggered_keywords': [],
                 'action': 'CONTINUED_SUPPORT',
                 'message': 'I notice a pattern of difficult emotions. How can I help you right now?'
             }
+        else:
+            result = {
+                'level': 'low',
+                'confidence': 0.1,
+                'triggered_keywords': [],
+                'action': 'NORMAL_CONVERSATION',
+                'message': None
+            }
 
-        return {
-            'level': 'low',
-            'confidence': 0.1,
-            'triggered_keywords': [],
-            'action': 'NORMAL_CONVERSATION',
-            'message': None
-        }
+        if risk_probability is not None:
+            result['risk_probability'] = risk_probability
+        return result
 
-    def _analyze_conversation_pattern(self, conversation_history: List[Dict]) -> float:
+    def _find_fuzzy_keywords(self, user_message: str, exact_matches: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Re-scan the message with misspelled tokens snapped to crisis vocabulary.
+        A fuzzy hit stays high only for a multi-word phrase where a single word
+        was corrected and the rest matched exactly; anything else is capped at medium.
+        """
+        if self.fuzzy_index is None:
+            return {}
+
+        text = user_message.lower()
+        pieces = []
+        corrected_spans = []
+        length = 0
+        last_end = 0
+        for token in TOKEN_PATTERN.finditer(text):
+            match = self.fuzzy_index.lookup(token.group())
+            if match and match[1] > 0:
+                pieces.append(text[last_end:token.start()])
+                length += token.start() - last_end
+                pieces.append(match[0])
+                corrected_spans.append((length, length + len(match[0])))
+                length += len(match[0])
+                last_end = token.end()
+
+        if not corrected_spans:
+            return {}
+
+        pieces.append(text[last_end:])
+        fuzzy_matches = {}
+        for match in self.keyword_matcher.find_all(''.join(pieces)):
+            corrections = sum(1 for start, end in corrected_spans if start >= match.start and end <= match.end)
+            if not corrections:
+                continue
+            level = match.payload
+            if level == 'high' and (corrections > 1 or len(TOKEN_PATTERN.findall(match.keyword)) < 2):
+                level = 'medium'
+            found = fuzzy_matches.setdefault(level, [])
+            if match.keyword not in found and match.keyword not in exact_matches.get(level, []):
+                found.append(match.keyword)
+        return {level: keywords for level, keywords in fuzzy_matches.items() if keywords}
+
+    def _analyze_conversation_pattern(self, conversation_history: Union[ConversationWindow, List[Dict]]) -> float:
         """Analyze overall conversation for crisis indicators"""
+        if isinstance(conversation_history, ConversationWindow):
+            return conversation_history.pattern_score()
+
         if len(conversation_history) < 3:
             return 0.0
 
         crisis_score = 0.0
         recent_messages = conversation_history[-5:]  # Last 5 messages
 
-        negative_words = ["can't", "won't", "never", "always", "nothing", "nobody"]
-        
         for msg in recent_messages:
             text = msg.get('message', '').lower()
-            for word in negative_words:
+            for word in NEGATIVE_WORDS:
                 if word in text:
                     crisis_score += 0.1
 
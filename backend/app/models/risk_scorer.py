@@ -0,0 +1,164 @@
+"""
+Statistical Crisis Risk Scorer
+Hashing features + sparse linear model, loaded from a local .npz file
+
+The feature extraction mirrors sklearn's HashingVectorizer (word n-grams,
+signed murmurhash3, l2 norm) so a model trained offline with sklearn scores
+identically here, but the single-message path is plain Python over the few
+non-zero weights and stays well under a millisecond.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+from sklearn.utils import murmurhash3_32
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+
+class RiskScorer:
+    """Calibrated crisis risk probability for a message"""
+
+    def __init__(self, weights: Dict[int, float], intercept: float, n_features: int,
+                 ngram_max: int = 2, platt_a: float = 1.0, platt_b: float = 0.0):
+        self.weights = weights
+        self.intercept = intercept
+        self.n_features = n_features
+        self.ngram_max = ngram_max
+        self.platt_a = platt_a
+        self.platt_b = platt_b
+        self._dense_coef = None
+        self._vectorizer = None
+
+    @classmethod
+    def load(cls, path: str) -> "RiskScorer":
+        """Load a model written by `train_risk_model`"""
+        with np.load(path, allow_pickle=False) as model:
+            weights = dict(zip(model['indices'].tolist(), model['weights'].tolist()))
+            return cls(
+                weights=weights,
+                intercept=float(model['intercept']),
+                n_features=int(model['n_features']),
+                ngram_max=int(model['ngram_max']),
+                platt_a=float(model['platt_a']),
+                platt_b=float(model['platt_b'])
+            )
+
+    def score(self, message: str) -> float:
+        """Risk probability (0-1) for a single message"""
+        features: Dict[int, float] = {}
+        for feature in _word_ngrams(message, self.ngram_max):
+            index, sign = _hash_feature(feature, self.n_features)
+            features[index] = features.get(index, 0.0) + sign
+
+        if not features:
+            return self._calibrate(self.intercept)
+
+        norm = math.sqrt(sum(value * value for value in features.values()))
+        weights = self.weights
+        margin = sum(weights.get(index, 0.0) * value for index, value in features.items()) / norm
+        return self._calibrate(margin + self.intercept)
+
+    def score_many(self, messages: Sequence[str]) -> List[float]:
+        """Vectorized scoring for offline batches"""
+        if not messages:
+            return []
+        matrix = self._get_vectorizer().transform(messages)
+        margins = matrix @ self._get_dense_coef() + self.intercept
+        probabilities = 1.0 / (1.0 + np.exp(-(self.platt_a * margins + self.platt_b)))
+        return probabilities.tolist()
+
+    def _calibrate(self, margin: float) -> float:
+        z = self.platt_a * margin + self.platt_b
+        if z < -35:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def _get_vectorizer(self):
+        if self._vectorizer is None:
+            self._vectorizer = build_vectorizer(self.n_features, self.ngram_max)
+        return self._vectorizer
+
+    def _get_dense_coef(self) -> np.ndarray:
+        if self._dense_coef is None:
+            coef = np.zeros(self.n_features, dtype=np.float64)
+            if self.weights:
+                coef[list(self.weights.keys())] = list(self.weights.values())
+            self._dense_coef = coef
+        return self._dense_coef
+
+
+def build_vectorizer(n_features: int = DEFAULT_N_FEATURES, ngram_max: int = 2):
+    """HashingVectorizer configured exactly like RiskScorer.score"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, ngram_max),
+        alternate_sign=True,
+        norm='l2',
+        lowercase=True
+    )
+
+
+def train_risk_model(texts: Iterable[str], labels: Iterable[int], path: str,
+                     n_features: int = DEFAULT_N_FEATURES, ngram_max: int = 2,
+                     calibration_split: float = 0.2, seed: int = 0) -> RiskScorer:
+    """
+    Fit a logistic regression on hashed features, Platt-calibrate it on a
+    held-out split and save the non-zero weights to `path` (.npz)
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    texts = list(texts)
+    labels = np.asarray(list(labels), dtype=np.int64)
+    vectorizer = build_vectorizer(n_features, ngram_max)
+
+    train_texts, calib_texts, train_labels, calib_labels = train_test_split(
+        texts, labels, test_size=calibration_split, random_state=seed, stratify=labels
+    )
+
+    classifier = LogisticRegression(max_iter=1000, random_state=seed)
+    classifier.fit(vectorizer.transform(train_texts), train_labels)
+
+    # Platt scaling: sigmoid(a * margin + b) fitted on unseen data
+    calib_margins = classifier.decision_function(vectorizer.transform(calib_texts)).reshape(-1, 1)
+    platt = LogisticRegression(random_state=seed)
+    platt.fit(calib_margins, calib_labels)
+
+    coef = classifier.coef_.ravel()
+    indices = np.flatnonzero(coef).astype(np.int32)
+    np.savez(
+        path,
+        indices=indices,
+        weights=coef[indices],
+        intercept=np.float64(classifier.intercept_[0]),
+        n_features=np.int64(n_features),
+        ngram_max=np.int64(ngram_max),
+        platt_a=np.float64(platt.coef_[0][0]),
+        platt_b=np.float64(platt.intercept_[0])
+    )
+    return RiskScorer.load(path if path.endswith('.npz') else f"{path}.npz")
+
+
+def _word_ngrams(message: str, ngram_max: int) -> List[str]:
+    """Same tokens and n-grams as sklearn's 'word' analyzer"""
+    tokens = TOKEN_PATTERN.findall(message.lower())
+    ngrams = list(tokens)
+    for n in range(2, min(ngram_max, len(tokens)) + 1):
+        for start in range(len(tokens) - n + 1):
+            ngrams.append(' '.join(tokens[start:start + n]))
+    return ngrams
+
+
+def _hash_feature(feature: str, n_features: int):
+    """Signed murmurhash3 bucket, as in sklearn's FeatureHasher"""
+    h = murmurhash3_32(feature, seed=0, positive=False)
+    if h == -2147483648:
+        return (2147483647 - (n_features - 1)) % n_features, -1.0
+    return abs(h) % n_features, (1.0 if h >= 0 else -1.0)
@@ -0,0 +1,167 @@
+"""
+EmoHeal Pre-fork Server
+Loads the AI services once, then forks uvicorn workers that share them
+
+Run (from backend/):
+    python -m app.prefork --workers 4 --host 0.0.0.0 --port 8000
+
+The master process imports the app and loads CrisisDetector, NLPProcessor
+and TherapeuticResponseGenerator (spaCy model, VADER lexicon, keyword
+files, every knowledge pack section decoded) before forking, so every worker starts with those pages shared
+copy-on-write instead of loading its own copy. The cyclic GC is kept off
+while loading and everything allocated so far is moved to the permanent
+generation with gc.freeze(), so later collections in the workers don't
+touch (and therefore copy) the shared objects.
+
+Each worker runs its own event loop and Mongo client; analysis runs on
+one thread per worker that uses the shared models. The per-user data
+versions behind the dashboard ETags live in a shared mapping, so a write
+in one worker invalidates cached responses in all of them. Compare memory with
+`python -m benchmarks.bench_prefork_memory`.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+logger = logging.getLogger("emoheal.prefork")
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+MIN_WORKER_LIFETIME = 5.0   # seconds; faster deaths are restarted with a delay
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket created in the master and inherited by every worker"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, log_level: str, slot: int):
+    """Child process: re-enable GC and serve the shared app on the inherited socket"""
+    import uvicorn
+    from .database.data_versions import data_versions
+    from .main import app
+
+    gc.enable()
+    data_versions.use_column(slot)
+    # Fresh handlers: the master's signal handlers must not leak into workers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, log_level: str, slot: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, log_level, slot)
+        except Exception:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def preload_services(workers: int):
+    """Import the app and load every model in the master process"""
+    from .database.data_versions import data_versions
+    from .main import analysis_executor, services
+    from .services.knowledge_pack import knowledge
+
+    started = time.perf_counter()
+    services.load_all()
+    # The services decode only the sections they use; decode the rest here so
+    # no worker has to build its own copy from the mapped bytes
+    knowledge.current().decode_all()
+    logger.info(f"✅ Services preloaded in {time.perf_counter() - started:.1f}s: {services.readiness()}")
+
+    # Workers analyse on a single thread that uses the shared models; a
+    # per-worker model copy would defeat the point of pre-forking
+    if analysis_executor.mode != "inline":
+        analysis_executor.mode = "thread"
+        analysis_executor.workers = 1
+        analysis_executor.share_services = True
+
+    # ETag versions: one shared counter column per worker slot
+    data_versions.share(workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EmoHeal pre-fork server")
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # No cyclic GC while the models load: nothing gets moved between
+    # generations, and the frozen set below is exactly the loaded state
+    gc.disable()
+    preload_services(args.workers)
+    sock = bind_socket(args.host, args.port)
+    gc.freeze()
+
+    workers: Dict[int, int] = {}
+    started_at: Dict[int, float] = {}
+    for slot in range(args.workers):
+        pid = spawn_worker(sock, args.log_level, slot)
+        workers[pid], started_at[pid] = slot, time.monotonic()
+    logger.info(f"🚀 Master {os.getpid()} serving on {args.host}:{args.port} with workers {sorted(workers)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Supervise: replace workers that die unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        slot = workers.pop(pid, None)
+        lifetime = time.monotonic() - started_at.pop(pid, 0.0)
+        if slot is None or stopping:
+            continue
+        logger.error(f"⚠️ Worker {pid} exited with status {status}, restarting")
+        if lifetime < MIN_WORKER_LIFETIME:
+            # Crashing on startup (e.g. Mongo unreachable): don't spin
+            time.sleep(MIN_WORKER_LIFETIME)
+        pid = spawn_worker(sock, args.log_level, slot)
+        workers[pid], started_at[pid] = slot, time.monotonic()
+
+    sock.close()
+    logger.info("🔌 Master stopped")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
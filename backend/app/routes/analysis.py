@@ -0,0 +1,86 @@
+"""
+Analysis API Routes
+Bulk crisis + NLP scoring for integration partners and triage tools
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, List
+import json
+import logging
+import os
+
+from ..schemas.analysis import BatchAnalysisRequest
+from ..services.analysis_executor import analysis_executor
+from ..services.registry import services
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["analysis"])
+
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "64"))
+
+NDJSON = "application/x-ndjson"
+
+# ============================================
+# BATCH ANALYSIS ENDPOINT
+# ============================================
+
+@router.post("/analyze/batch")
+async def analyze_batch(
+    payload: BatchAnalysisRequest,
+    request: Request,
+    stream: bool = Query(False, description="Stream one JSON object per line (NDJSON)")
+):
+    """Run crisis detection and NLP analysis over many messages, results in input order"""
+    messages = payload.messages
+    if not (services.crisis_ready and services.nlp_ready):
+        raise HTTPException(status_code=503, detail="Analysis services are still loading")
+
+    if stream or NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_results(messages, payload.include_entities),
+            media_type=NDJSON
+        )
+
+    results = []
+    for start in range(0, len(messages), BATCH_CHUNK_SIZE):
+        results.extend(await _analyze_chunk(messages[start:start + BATCH_CHUNK_SIZE], start, payload.include_entities))
+
+    logger.info(f"Batch analysis: {len(results)} messages")
+    return {
+        "success": True,
+        "count": len(results),
+        "results": results
+    }
+
+
+async def _stream_results(messages: List[str], include_entities):
+    for start in range(0, len(messages), BATCH_CHUNK_SIZE):
+        chunk = await _analyze_chunk(messages[start:start + BATCH_CHUNK_SIZE], start, include_entities)
+        yield "".join(json.dumps(result) + "\n" for result in chunk)
+    logger.info(f"Batch analysis (streamed): {len(messages)} messages")
+
+
+async def _analyze_chunk(messages: List[str], offset: int, include_entities) -> List[Dict]:
+    """Crisis tiers + nlp.pipe/VADER for one chunk, off the event loop"""
+    crisis_results = await analysis_executor.detect_crisis_batch(messages)
+    nlp_results = await analysis_executor.process_batch(messages, include_entities=include_entities)
+
+    results = []
+    for index, (message, crisis, nlp) in enumerate(zip(messages, crisis_results, nlp_results)):
+        results.append({
+            "index": offset + index,
+            "message": message,
+            "crisis": {
+                "level": crisis["level"],
+                "confidence": crisis["confidence"],
+                "triggered_keywords": crisis.get("triggered_keywords", []),
+                "action": crisis["action"]
+            },
+            "sentiment": nlp["sentiment"],
+            "emotions": nlp["emotions"],
+            "topics": nlp["topics"],
+            "entities": nlp["entities"]
+        })
+    return results
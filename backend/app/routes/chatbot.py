@@ -3,99 +3,263 @@ Chat Bot API Routes
 Endpoints for chat history, mood tracking, crisis alerts
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import base64
+import json
 import logging
+import os
 from ..database.db import get_database
+from ..database.rollups import MOOD_DAILY, day_key, rollups_complete
+from ..database.user_stats import USER_STATS, empty_stats
+from ..services.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["chatbot"])
 
+# rollup: read the mood_daily counters | raw: aggregate chatbot_history
+# auto: rollup once `python -m app.database.rollups rebuild` has run, raw before that
+MOOD_SUMMARY_SOURCE = os.getenv("MOOD_SUMMARY_SOURCE", "auto")
+
+# Fields a chat-history client may select; timestamp and _id always come back (cursor keys).
+# Without a selection the full documents are returned
+CHAT_HISTORY_FIELDS = (
+    "sessionId", "userMessage", "botResponse", "sentiment", "emotionDetected",
+    "crisisLevel", "crisisConfidence", "lexiconVersion"
+)
+CHAT_HISTORY_SORT = [("timestamp", -1), ("_id", -1)]
+
+# Set once a full mood_daily rebuild has been seen (MOOD_SUMMARY_SOURCE=auto)
+_rollups_complete = False
+
 # ============================================
 # CHAT HISTORY ENDPOINTS
 # ============================================
 
+def encode_cursor(message: Dict) -> str:
+    """Opaque position after `message` (newest-first order on timestamp, _id)"""
+    payload = json.dumps({"t": message["timestamp"].isoformat(), "i": str(message["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["i"])
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def history_projection(fields: Optional[str]) -> Optional[Dict]:
+    """find() projection for a comma-separated field list (None: full documents)"""
+    selected = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    unknown = sorted(set(selected) - set(CHAT_HISTORY_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+    if not selected:
+        return None
+    # _id is converted by the server, so documents go out as they come back
+    projection = {"_id": {"$toString": "$_id"}, "timestamp": 1}
+    for name in selected:
+        projection[name] = 1
+    return projection
+
+
+def history_page_filter(user_id: str, position: Optional[Tuple[datetime, ObjectId]]) -> Dict:
+    """Messages strictly after `position` in (timestamp desc, _id desc) order"""
+    if position is None:
+        return {"userId": user_id}
+    timestamp, last_id = position
+    return {
+        "userId": user_id,
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": last_id}}
+        ]
+    }
+
+
+async def history_total(db, user_id: str, exact: bool) -> int:
+    """The user's message counter from user_stats; an exact count when asked for"""
+    if exact:
+        return await db.chatbot_history.count_documents({"userId": user_id})
+    stats = await db[USER_STATS].find_one({"userId": user_id}, {"_id": 0, "messages": 1})
+    return (stats or empty_stats(user_id))["messages"]
+
+
 @router.get("/chat-history/{user_id}")
 async def get_chat_history(
+    request: Request,
     user_id: str,
     limit: int = Query(50, ge=1, le=500),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return"),
+    include_total: bool = Query(False, description="count every message of the user")
 ):
-    """Get user's chat conversation history"""
+    """
+    Get user's chat conversation history, newest first.
+    Page with `cursor` (the previous page's next_cursor): every page costs
+    the same however deep it is. `skip` still works for old clients but
+    scans every skipped message. `total` is the user's message counter
+    (user_stats); include_total=true counts the messages instead.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    projection = history_projection(fields)
+    return await response_cache.respond(
+        request, "chat-history", user_id, (limit, skip, cursor, fields, include_total),
+        lambda: chat_history_page(user_id, limit, skip, position, projection, include_total)
+    )
+
+
+async def chat_history_page(user_id: str, limit: int, skip: int, position: Optional[Tuple[datetime, ObjectId]],
+                            projection: Optional[Dict], include_total: bool) -> Dict:
     try:
         db = await get_database()
-        
-        total = await db.chatbot_history.count_documents({"userId": user_id})
-        history = await db.chatbot_history.find(
-            {"userId": user_id}
-        ).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
-        
-        for msg in history:
-            msg["_id"] = str(msg["_id"])
-        
+
+        query = db.chatbot_history.find(
+            history_page_filter(user_id, position), projection
+        ).sort(CHAT_HISTORY_SORT)
+        if position is None and skip:
+            query = query.skip(skip)
+        # One extra document tells whether another page exists
+        history = await query.limit(limit + 1).to_list(limit + 1)
+        has_more = len(history) > limit
+        history = history[:limit]
+        for message in history:
+            message["_id"] = str(message["_id"])
+        next_cursor = encode_cursor(history[-1]) if has_more else None
+
+        total = await history_total(db, user_id, include_total)
+
         logger.info(f"Retrieved {len(history)} messages for user {user_id}")
-        
+
         return {
             "success": True,
             "user_id": user_id,
             "history": history,
             "count": len(history),
             "total": total,
-            "skip": skip,
-            "limit": limit
+            "skip": skip if position is None else 0,
+            "limit": limit,
+            "next_cursor": next_cursor
         }
-        
+
     except Exception as e:
         logger.error(f"Error retrieving chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def mood_summary_pipeline(user_id: str, start_date: datetime) -> List[Dict]:
+    """
+    Per-day sentiment and emotion counts for one user, computed in Mongo.
+    Only timestamp, sentiment.compound and emotionDetected leave the index
+    scan; every message in the window is counted.
+    """
+    return [
+        {"$match": {"userId": user_id, "timestamp": {"$gte": start_date}}},
+        {"$project": {
+            "_id": 0,
+            "timestamp": 1,
+            "emotionDetected": 1,
+            "compound": {"$ifNull": ["$sentiment.compound", 0]}
+        }},
+        {"$facet": {
+            "daily": [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "sum": {"$sum": "$compound"},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ],
+            "emotions": [
+                {"$unwind": "$emotionDetected"},
+                {"$group": {"_id": "$emotionDetected", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ]
+        }}
+    ]
+
+
+def rollup_facets(rollups: List[Dict]) -> Dict:
+    """mood_daily documents in the shape of the pipeline's $facet output"""
+    emotion_counts: Dict[str, int] = {}
+    for rollup in rollups:
+        for emotion, count in (rollup.get("emotions") or {}).items():
+            if count:
+                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + count
+    return {
+        "daily": [
+            {"_id": rollup["day"], "sum": rollup.get("sentimentSum", 0), "count": rollup["count"]}
+            for rollup in rollups if rollup.get("count")
+        ],
+        "emotions": [
+            {"_id": emotion, "count": count}
+            for emotion, count in sorted(emotion_counts.items(), key=lambda item: (-item[1], item[0]))
+        ]
+    }
+
+
+def summarize_mood(facets: Dict) -> Dict:
+    """Shape the aggregation output like the original mood-summary response"""
+    daily, emotions = facets["daily"], facets["emotions"]
+    total_messages = sum(day["count"] for day in daily)
+    total_sentiment = sum(day["sum"] for day in daily)
+
+    emotion_counts = {entry["_id"]: entry["count"] for entry in emotions}
+    return {
+        "total_messages": total_messages,
+        "emotion_distribution": emotion_counts,
+        "top_emotions": [{"emotion": entry["_id"], "count": entry["count"]} for entry in emotions[:5]],
+        "average_sentiment": round(total_sentiment / total_messages, 3) if total_messages else 0,
+        "sentiment_trend": {
+            day["_id"]: {"average": day["sum"] / day["count"], "count": day["count"]}
+            for day in daily
+        }
+    }
+
+
 @router.get("/mood-summary/{user_id}")
 async def get_mood_summary(
+    request: Request,
     user_id: str,
     days: int = Query(7, ge=1, le=90)
 ):
     """Get user's mood patterns and emotion distribution"""
+    return await response_cache.respond(request, "mood-summary", user_id, days, lambda: mood_summary(user_id, days))
+
+
+async def use_rollups(db) -> bool:
+    """Read mood_daily? In auto mode only after a full rebuild (remembered once seen)"""
+    global _rollups_complete
+    if MOOD_SUMMARY_SOURCE != "auto":
+        return MOOD_SUMMARY_SOURCE == "rollup"
+    if not _rollups_complete:
+        _rollups_complete = await rollups_complete(db)
+    return _rollups_complete
+
+
+async def mood_summary(user_id: str, days: int) -> Dict:
     try:
         db = await get_database()
         
         start_date = datetime.now() - timedelta(days=days)
-        messages = await db.chatbot_history.find({
-            "userId": user_id,
-            "timestamp": {"$gte": start_date}
-        }).to_list(500)
-        
-        emotion_counts = {}
-        sentiment_scores = []
-        daily_sentiment = {}
-        
-        for msg in messages:
-            emotions = msg.get('emotionDetected', [])
-            for emotion in emotions:
-                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-            
-            sentiment = msg.get('sentiment', {})
-            compound = sentiment.get('compound', 0)
-            sentiment_scores.append(compound)
-            
-            date_key = msg['timestamp'].strftime("%Y-%m-%d")
-            if date_key not in daily_sentiment:
-                daily_sentiment[date_key] = {"scores": [], "count": 0}
-            daily_sentiment[date_key]["scores"].append(compound)
-            daily_sentiment[date_key]["count"] += 1
-        
-        avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-        top_emotions = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        
-        sentiment_trend = {
-            date: {
-                "average": sum(data["scores"]) / len(data["scores"]),
-                "count": data["count"]
-            }
-            for date, data in sorted(daily_sentiment.items())
-        }
+        if await use_rollups(db):
+            # At most one small document per day (whole days, from start_date's day on)
+            rollups = await db[MOOD_DAILY].find(
+                {"userId": user_id, "day": {"$gte": day_key(start_date)}},
+                {"_id": 0, "day": 1, "count": 1, "sentimentSum": 1, "emotions": 1}
+            ).sort("day", 1).to_list(days + 1)
+            facets = rollup_facets(rollups)
+        else:
+            results = await db.chatbot_history.aggregate(mood_summary_pipeline(user_id, start_date)).to_list(1)
+            facets = results[0] if results else {"daily": [], "emotions": []}
+        summary = summarize_mood(facets)
         
         logger.info(f"Generated mood summary for {user_id} ({days} days)")
         
@@ -103,11 +267,7 @@ async def get_mood_summary(
             "success": True,
             "userId": user_id,
             "period_days": days,
-            "total_messages": len(messages),
-            "emotion_distribution": emotion_counts,
-            "top_emotions": [{"emotion": e, "count": c} for e, c in top_emotions],
-            "average_sentiment": round(avg_sentiment, 3),
-            "sentiment_trend": sentiment_trend,
+            **summary,
             "analysis_date": datetime.now().isoformat()
         }
         
@@ -118,10 +278,17 @@ async def get_mood_summary(
 
 @router.get("/crisis-alerts/{user_id}")
 async def get_crisis_alerts(
+    request: Request,
     user_id: str,
     resolved: bool = Query(None)
 ):
     """Get user's crisis alerts"""
+    return await response_cache.respond(
+        request, "crisis-alerts", user_id, resolved, lambda: crisis_alerts(user_id, resolved)
+    )
+
+
+async def crisis_alerts(user_id: str, resolved: Optional[bool]) -> Dict:
     try:
         db = await get_database()
         
@@ -155,29 +322,25 @@ async def get_crisis_alerts(
 
 
 @router.get("/user-stats/{user_id}")
-async def get_user_statistics(user_id: str):
-    """Get comprehensive user statistics"""
+async def get_user_statistics(request: Request, user_id: str):
+    """Get comprehensive user statistics (one read of the user_stats counters)"""
+    return await response_cache.respond(request, "user-stats", user_id, None, lambda: user_statistics(user_id))
+
+
+async def user_statistics(user_id: str) -> Dict:
     try:
         db = await get_database()
         
-        total_messages = await db.chatbot_history.count_documents({"userId": user_id})
-        total_sessions = await db.sessions.count_documents({"userId": user_id})
-        crisis_count = await db.crisis_alerts.count_documents({
-            "userId": user_id,
-            "alert_level": "high"
-        })
-        latest = await db.chatbot_history.find_one(
-            {"userId": user_id},
-            sort=[("timestamp", -1)]
-        )
+        stats = await db[USER_STATS].find_one({"userId": user_id}, {"_id": 0}) or empty_stats(user_id)
+        last_message = stats.get("lastMessageAt")
         
         return {
             "success": True,
             "userId": user_id,
-            "total_messages": total_messages,
-            "total_sessions": total_sessions,
-            "crisis_alerts": crisis_count,
-            "last_message_time": latest["timestamp"].isoformat() if latest else None
+            "total_messages": stats.get("messages", 0),
+            "total_sessions": stats.get("sessions", 0),
+            "crisis_alerts": stats.get("highAlerts", 0),
+            "last_message_time": last_message.isoformat() if last_message else None
         }
         
     except Exception as e:
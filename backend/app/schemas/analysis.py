@@ -0,0 +1,22 @@
+"""
+Analysis Schemas
+Request bodies for the bulk analysis API
+"""
+
+import os
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Enforced while the body is validated, before any analysis work is queued
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "1000"))
+BATCH_MAX_MESSAGE_CHARS = int(os.getenv("BATCH_MAX_MESSAGE_CHARS", "5000"))
+
+BatchMessage = Annotated[str, Field(max_length=BATCH_MAX_MESSAGE_CHARS)]
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Messages to score, analysed independently (no session state)"""
+    messages: List[BatchMessage] = Field(..., min_length=1, max_length=BATCH_MAX_MESSAGES,
+                                         description="Messages to analyse, results keep this order")
+    include_entities: Optional[bool] = Field(None, description="Run NER (defaults to the NLP profile)")
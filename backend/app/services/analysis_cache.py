@@ -0,0 +1,131 @@
+"""
+Analysis Cache
+Bounded LRU + TTL memoization of NLP analysis keyed by normalized text
+"""
+
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+NLP_CACHE_MAX_ENTRIES = int(os.getenv("NLP_CACHE_MAX_ENTRIES", "5000"))
+NLP_CACHE_TTL_SECONDS = float(os.getenv("NLP_CACHE_TTL_SECONDS", "3600"))
+NLP_CACHE_MAX_BYTES = int(os.getenv("NLP_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """
+    Cache key for a message: NFC, trimmed, whitespace collapsed.
+    Case is kept because VADER scores capitalisation ("I'M FINE" != "i'm fine").
+    """
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFC", message)).strip()
+
+
+class AnalysisCache:
+    """
+    Memoizes NLPProcessor.process_message results for repeated short phrases.
+
+    Entries expire after `ttl_seconds`, the least recently used entry is
+    evicted when `max_entries` or the approximate `max_bytes` budget is
+    exceeded. Cached analyses are shared: callers must treat them as
+    read-only. Only NLP output goes here; crisis detection is never cached.
+    """
+
+    def __init__(self, max_entries: int = NLP_CACHE_MAX_ENTRIES, ttl_seconds: float = NLP_CACHE_TTL_SECONDS,
+                 max_bytes: int = NLP_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, analysis)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self.bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, message: str) -> Optional[Dict]:
+        """Cached analysis for a message, re-labelled with the caller's exact text"""
+        if not self.enabled:
+            return None
+
+        key = normalize_message(message)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, size, analysis = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return {**analysis, 'text': message}
+
+    def put(self, message: str, analysis: Dict):
+        """Store an analysis, evicting LRU entries to respect the limits"""
+        if not self.enabled:
+            return
+
+        key = normalize_message(message)
+        size = _approximate_size(key) + _approximate_size(analysis)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, analysis)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+
+def _approximate_size(value) -> int:
+    """Rough deep size in bytes of the JSON-like analysis structures"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approximate_size(k) + _approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approximate_size(item) for item in value)
+    return size
@@ -0,0 +1,263 @@
+"""
+Analysis Executor
+Runs crisis detection and NLP analysis off the asyncio event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .analysis_cache import AnalysisCache
+from .knowledge_pack import knowledge
+from .nlp_batcher import NLPBatcher, NLP_BATCH_MAX_SIZE, NLP_BATCH_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "thread")   # inline | thread | process
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Services owned by the current pool worker (one set per thread / process)
+_worker_state = threading.local()
+
+
+WORKER_SERVICES = ("crisis_detector", "nlp_processor")
+
+
+def _load_service(name: str):
+    if name == "crisis_detector":
+        from ..models.crisis_detector import CrisisDetector
+        return CrisisDetector()
+    from .nlp_processor import NLPProcessor
+    return NLPProcessor()
+
+
+def _init_worker():
+    """Pool initializer: load the models once per worker, each on its own"""
+    # A service that fails to load is left out; the executor runs only that one inline
+    for name in WORKER_SERVICES:
+        try:
+            instance = _load_service(name)
+        except Exception as e:
+            logger.error(f"⚠️ Analysis worker could not load {name}: {e}")
+            instance = None
+        setattr(_worker_state, name, instance)
+
+
+def _init_shared_worker(crisis_detector, nlp_processor):
+    """Pool initializer: reuse already-loaded models (thread pools only)"""
+    _worker_state.crisis_detector = crisis_detector
+    _worker_state.nlp_processor = nlp_processor
+
+
+def _worker_ready() -> tuple:
+    """Warm-up job; forces the worker to exist and reports the services it loaded"""
+    return tuple(name for name in WORKER_SERVICES if getattr(_worker_state, name, None) is not None)
+
+
+def _worker_service(name: str):
+    instance = getattr(_worker_state, name, None)
+    if instance is None:
+        raise RuntimeError(f"{name} is not loaded in this analysis worker")
+    return instance
+
+
+def _worker_detect_crisis(message: str, conversation) -> Dict:
+    return _worker_service("crisis_detector").detect_crisis_level(message, conversation)
+
+
+def _worker_process_message(message: str) -> Dict:
+    return _worker_service("nlp_processor").process_message(message)
+
+
+def _worker_process_batch(messages: List[str], include_entities: Optional[bool] = None) -> List[Dict]:
+    return _worker_service("nlp_processor").process_batch(messages, include_entities=include_entities)
+
+
+def _worker_detect_crisis_batch(messages: List[str]) -> List[Dict]:
+    detector = _worker_service("crisis_detector")
+    return [detector.detect_crisis_level(message, []) for message in messages]
+
+
+class AnalysisExecutor:
+    """
+    Async facade over CrisisDetector and NLPProcessor.
+
+    - inline:  call the given service instances on the event loop (old behaviour)
+    - thread:  thread pool, each thread loads its own models
+    - process: process pool, each process loads its own models (true parallelism)
+
+    Each worker loads the services separately; one that fails to load there
+    runs inline on the event loop while the other stays in the pool.
+
+    With share_services=True a thread pool uses the given instances instead of
+    loading copies (pre-fork workers, where the models live in shared pages).
+
+    With batch_max_size > 1, process_message calls from all sessions are
+    micro-batched through NLPBatcher and parsed with nlp.pipe. Repeated
+    messages are answered from an AnalysisCache in front of the NLP stage
+    (emptied when the knowledge pack changes); crisis detection always runs.
+    """
+
+    def __init__(self, crisis_detector=None, nlp_processor=None,
+                 mode: str = ANALYSIS_EXECUTOR, workers: int = ANALYSIS_WORKERS,
+                 batch_max_size: int = NLP_BATCH_MAX_SIZE, batch_max_wait_ms: float = NLP_BATCH_MAX_WAIT_MS,
+                 cache: Optional[AnalysisCache] = None, share_services: bool = False):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown analysis executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+
+        self.crisis_detector = crisis_detector
+        self.nlp_processor = nlp_processor
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.share_services = share_services
+        self._pool: Optional[Executor] = None
+        # Services every pool worker has loaded; the rest run inline
+        self._offloaded: frozenset = frozenset()
+        # Why analysis runs on the event loop although a pool was configured (None: it doesn't)
+        self.degraded: Optional[str] = None
+        self.cache = cache if cache is not None else AnalysisCache()
+        self._cache_version = None
+
+        self.batcher: Optional[NLPBatcher] = None
+        if batch_max_size > 1:
+            self.batcher = NLPBatcher(
+                self.process_batch,
+                max_batch_size=batch_max_size,
+                max_wait_ms=batch_max_wait_ms,
+                max_concurrent_batches=1 if mode == "inline" else self.workers
+            )
+
+    def attach(self, name: str, instance):
+        """ServiceRegistry listener: use each service as soon as it has loaded"""
+        if name in ("crisis_detector", "nlp_processor"):
+            setattr(self, name, instance)
+
+    async def start(self):
+        """Create the pool and wait until every worker has loaded its models"""
+        if self.batcher is not None:
+            self.batcher.start()
+
+        if self.mode == "inline":
+            return
+
+        if self.mode == "thread" and self.share_services:
+            pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="analysis",
+                initializer=_init_shared_worker,
+                initargs=(self.crisis_detector, self.nlp_processor)
+            )
+        elif self.mode == "thread":
+            pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="analysis",
+                initializer=_init_worker
+            )
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+
+        loop = asyncio.get_running_loop()
+        try:
+            loaded = await asyncio.gather(*[
+                loop.run_in_executor(pool, _worker_ready) for _ in range(self.workers)
+            ])
+        except Exception as e:
+            logger.error(f"⚠️ Analysis workers failed to start, running inline: {e}")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.mode = "inline"
+            self.degraded = f"workers failed to start, running inline: {e}"
+            return
+
+        offloaded = frozenset.intersection(*[frozenset(services) for services in loaded])
+        if not offloaded:
+            logger.error("⚠️ Analysis workers loaded no services, running inline")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.mode = "inline"
+            self.degraded = "workers loaded no services, running inline"
+            return
+
+        # Calls keep running inline until every worker has its models
+        self._offloaded = offloaded
+        self._pool = pool
+        inline = [name for name in WORKER_SERVICES if name not in offloaded]
+        if inline:
+            self.degraded = f"{', '.join(inline)} failed to load in the workers, running inline"
+            logger.warning(f"⚠️ Analysis executor ready ({self.mode}, {self.workers} workers), {self.degraded}")
+        else:
+            logger.info(f"✅ Analysis executor ready ({self.mode}, {self.workers} workers)")
+
+    def _pool_for(self, name: str) -> Optional[Executor]:
+        """The pool if the workers run this service, None to call it inline"""
+        if self._pool is not None and name in self._offloaded:
+            return self._pool
+        return None
+
+    async def shutdown(self):
+        """Drain pending batches and stop the worker pool"""
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._offloaded = frozenset()
+
+    async def detect_crisis_level(self, message: str, conversation) -> Dict:
+        """CrisisDetector.detect_crisis_level without blocking the loop"""
+        pool = self._pool_for("crisis_detector")
+        if pool is None:
+            return self.crisis_detector.detect_crisis_level(message, conversation)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, _worker_detect_crisis, message, conversation)
+
+    async def process_message(self, message: str) -> Dict:
+        """NLPProcessor.process_message without blocking the loop (cached)"""
+        # Cached analyses belong to one knowledge pack version
+        version = knowledge.current().version
+        if version != self._cache_version:
+            self.cache.clear()
+            self._cache_version = version
+
+        analysis = self.cache.get(message)
+        if analysis is not None:
+            return analysis
+
+        if self.batcher is not None:
+            analysis = await self.batcher.submit(message)
+        elif self._pool_for("nlp_processor") is None:
+            analysis = self.nlp_processor.process_message(message)
+        else:
+            loop = asyncio.get_running_loop()
+            analysis = await loop.run_in_executor(self._pool, _worker_process_message, message)
+
+        self.cache.put(message, analysis)
+        return analysis
+
+    async def process_batch(self, messages: List[str], include_entities: Optional[bool] = None) -> List[Dict]:
+        """NLPProcessor.process_batch (nlp.pipe) without blocking the loop"""
+        pool = self._pool_for("nlp_processor")
+        if pool is None:
+            return self.nlp_processor.process_batch(messages, include_entities=include_entities)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, _worker_process_batch, messages, include_entities)
+
+    async def detect_crisis_batch(self, messages: List[str]) -> List[Dict]:
+        """Stateless crisis detection (no conversation history) for many messages"""
+        pool = self._pool_for("crisis_detector")
+        if pool is None:
+            return [self.crisis_detector.detect_crisis_level(message, []) for message in messages]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, _worker_detect_crisis_batch, messages)
+
+
+# Application-wide executor; services are attached as the registry loads them (see attach)
+analysis_executor = AnalysisExecutor()
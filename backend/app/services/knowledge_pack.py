@@ -0,0 +1,282 @@
+"""
+Knowledge Pack
+Versioned single-file bundle of every lexical resource, memory-mapped and hot-reloaded
+
+Layout (little endian):
+    8 bytes   magic  b"EHKPACK1"
+    4 bytes   header length N
+    N bytes   header JSON {"format", "version", "built_at", "sections": {name: [offset, length]}}
+    ...       section payloads (compact JSON, key order kept: lexicon order is
+              significant), offsets relative to the end of the header
+
+Build it with `python -m app.jobs.build_knowledge_pack`. Each process maps
+the pack read-only and decodes sections on first use. Only the raw JSON
+bytes sit in shared page-cache pages; the decoded dicts/lists live on the
+heap of the process that decoded them. The pre-fork master (app.prefork)
+therefore decodes every section before gc.freeze() and forking, so its
+workers inherit the decoded objects copy-on-write instead of decoding their
+own. Independent processes (separate uvicorn workers, process-mode analysis
+pools) still decode their own copy, as does every process after a reload.
+The pack is replaced atomically (os.replace), and services pick up a new
+version on their next call.
+
+Without a pack file the JSON source files are read directly and hot-reloaded
+the same way, when their modification times change.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .lexicon_index import INTENSIFIERS, MENTAL_HEALTH_TERMS, THERAPY_TOPICS
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"
+
+KNOWLEDGE_PACK_PATH = os.getenv("KNOWLEDGE_PACK", str(DATA_DIR / "knowledge.pack"))
+# Seconds between checks of the pack file for a new version (0 disables hot reload)
+KNOWLEDGE_PACK_CHECK_SECONDS = float(os.getenv("KNOWLEDGE_PACK_CHECK_SECONDS", "5"))
+
+CRISIS_KEYWORDS_PATH = DATA_DIR / "crisis_keywords.json"
+RESPONSES_PATH = DATA_DIR / "therapeutic_responses.json"
+
+MAGIC = b"EHKPACK1"
+PACK_FORMAT = 1
+PREAMBLE = struct.Struct("<8sI")
+
+SECTIONS = ("crisis_keywords", "mental_health_terms", "therapy_topics", "intensifiers", "responses")
+
+DEFAULT_RESPONSES = {"general": {"default": "I'm here to listen. Tell me more."}}
+
+
+class KnowledgePackError(Exception):
+    """The pack file is missing sections or is not a knowledge pack"""
+
+
+def load_sources(crisis_keywords_path=CRISIS_KEYWORDS_PATH, responses_path=RESPONSES_PATH,
+                 lexicon_path: Optional[str] = None, strict: bool = True) -> Dict:
+    """
+    Collect the pack sections from the source files.
+    The emotion/topic lexicon defaults to lexicon_index; a JSON file with
+    any of mental_health_terms / therapy_topics / intensifiers overrides it.
+    With strict=False a missing crisis keywords file leaves that section out.
+    """
+    try:
+        with open(crisis_keywords_path, 'r') as f:
+            crisis_keywords = json.load(f)
+    except FileNotFoundError:
+        if strict:
+            raise
+        crisis_keywords = None
+    try:
+        with open(responses_path, 'r') as f:
+            responses = json.load(f)
+    except FileNotFoundError:
+        responses = DEFAULT_RESPONSES
+
+    sections = {
+        "mental_health_terms": MENTAL_HEALTH_TERMS,
+        "therapy_topics": THERAPY_TOPICS,
+        "intensifiers": INTENSIFIERS,
+        "responses": responses,
+    }
+    if crisis_keywords is not None:
+        sections["crisis_keywords"] = crisis_keywords
+    if lexicon_path:
+        with open(lexicon_path, 'r') as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - {"mental_health_terms", "therapy_topics", "intensifiers"}
+        if unknown:
+            raise KnowledgePackError(f"Unknown lexicon sections: {sorted(unknown)}")
+        sections.update(overrides)
+    return sections
+
+
+def _encode_sections(sections: Dict, required=SECTIONS) -> Tuple[Dict[str, list], bytes, str]:
+    """Section table, concatenated payload and content version"""
+    missing = [name for name in required if name not in sections]
+    if missing:
+        raise KnowledgePackError(f"Missing sections: {missing}")
+
+    table, chunks, offset = {}, [], 0
+    digest = hashlib.sha256()
+    for name in (name for name in SECTIONS if name in sections):
+        payload = json.dumps(sections[name], separators=(',', ':')).encode()
+        table[name] = [offset, len(payload)]
+        chunks.append(payload)
+        digest.update(name.encode() + b"\0" + payload)
+        offset += len(payload)
+    return table, b"".join(chunks), digest.hexdigest()[:16]
+
+
+def build_pack(sections: Dict, output_path: str = KNOWLEDGE_PACK_PATH) -> str:
+    """Write a pack atomically and return its version"""
+    table, payload, version = _encode_sections(sections)
+    header = json.dumps({
+        "format": PACK_FORMAT,
+        "version": version,
+        "built_at": datetime.now().isoformat(),
+        "sections": table
+    }).encode()
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers that still map the old file keep it; new opens see the new one
+    os.replace(tmp_path, output_path)
+    return version
+
+
+class KnowledgePack:
+    """One immutable version of the lexical resources"""
+
+    def __init__(self, version: str, sections: Optional[Dict] = None, buffer=None,
+                 table: Optional[Dict[str, list]] = None, data_offset: int = 0, path: Optional[str] = None):
+        self.version = version
+        self.path = path
+        self._buffer = buffer
+        self._table = table or {}
+        self._data_offset = data_offset
+        self._decoded: Dict[str, object] = dict(sections or {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "KnowledgePack":
+        """Memory-map a built pack"""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, header_length = PREAMBLE.unpack_from(buffer, 0)
+            if magic != MAGIC:
+                raise KnowledgePackError(f"{path} is not a knowledge pack")
+            header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length])
+            if header.get("format") != PACK_FORMAT:
+                raise KnowledgePackError(f"Unsupported knowledge pack format {header.get('format')}")
+            missing = [name for name in SECTIONS if name not in header["sections"]]
+            if missing:
+                raise KnowledgePackError(f"Missing sections: {missing}")
+        except Exception:
+            buffer.close()
+            raise
+        return cls(header["version"], buffer=buffer, table=header["sections"],
+                   data_offset=PREAMBLE.size + header_length, path=path)
+
+    @classmethod
+    def from_sources(cls, **source_paths) -> "KnowledgePack":
+        """Unpacked fallback built straight from the JSON source files"""
+        sections = load_sources(strict=False, **source_paths)
+        _, _, version = _encode_sections(sections, required=())
+        return cls(version, sections=sections)
+
+    def decode_all(self) -> "KnowledgePack":
+        """Decode every section now (pre-fork: before the workers are forked)"""
+        for name in SECTIONS:
+            if name in self._decoded or name in self._table:
+                self.section(name)
+        return self
+
+    def section(self, name: str):
+        """Decoded section (decoded once, then shared; treat as read-only)"""
+        value = self._decoded.get(name)
+        if value is None:
+            with self._lock:
+                value = self._decoded.get(name)
+                if value is None:
+                    if name not in self._table:
+                        raise KnowledgePackError(f"Section '{name}' is not available")
+                    offset, length = self._table[name]
+                    start = self._data_offset + offset
+                    value = json.loads(self._buffer[start:start + length])
+                    self._decoded[name] = value
+        return value
+
+
+class KnowledgeStore:
+    """
+    The current KnowledgePack of this process. `current()` re-checks the
+    file at most every `check_interval` seconds and swaps in a new version
+    when the file was replaced; a pack that fails to load is logged and the
+    previous one is kept. Without a pack file the JSON sources are used,
+    and reloaded when one of them changes.
+    """
+
+    def __init__(self, path: str = KNOWLEDGE_PACK_PATH, check_interval: float = KNOWLEDGE_PACK_CHECK_SECONDS,
+                 crisis_keywords_path=CRISIS_KEYWORDS_PATH, responses_path=RESPONSES_PATH):
+        self.path = path
+        self.source_paths = {"crisis_keywords_path": crisis_keywords_path, "responses_path": responses_path}
+        self.check_interval = check_interval
+        self._pack: Optional[KnowledgePack] = None
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def current(self) -> KnowledgePack:
+        pack = self._pack
+        if pack is not None and (self.check_interval <= 0 or time.monotonic() < self._next_check):
+            return pack
+        with self._lock:
+            if self._pack is None or time.monotonic() >= self._next_check:
+                self._check()
+            return self._pack
+
+    def _check(self):
+        self._next_check = time.monotonic() + self.check_interval
+        pack_signature = _file_signature(self.path)
+        if pack_signature is not None:
+            signature = ("pack", pack_signature)
+        else:
+            signature = ("sources", tuple(_file_signature(path) for path in self.source_paths.values()))
+
+        if self._pack is not None and signature == self._signature:
+            return
+        try:
+            if pack_signature is not None:
+                pack = KnowledgePack.open(self.path)
+            else:
+                pack = KnowledgePack.from_sources(**self.source_paths)
+        except Exception as e:
+            if self._pack is None:
+                raise
+            logger.error(f"⚠️ Knowledge pack reload failed, keeping {self._pack.version}: {e}")
+            # Don't retry this file; the next replacement changes the signature
+            self._signature = signature
+            return
+
+        if self._pack is not None and pack.version != self._pack.version:
+            self.reloads += 1
+            logger.info(f"🔄 Knowledge pack {self._pack.version} → {pack.version}")
+        self._pack, self._signature = pack, signature
+
+    def stats(self) -> Dict:
+        pack = self._pack
+        return {
+            "version": pack.version if pack else None,
+            "source": (pack.path or "json") if pack else None,
+            "reloads": self.reloads
+        }
+
+
+def _file_signature(path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+# Process-wide store shared by CrisisDetector, NLPProcessor and TherapeuticResponseGenerator
+knowledge = KnowledgeStore()
@@ -0,0 +1,114 @@
+"""
+Lexicon Index
+Compiled emotion / topic / intensifier lookup for NLPProcessor
+"""
+
+from typing import Dict, List, Tuple
+
+from ..utils.keyword_automaton import SubstringScanner
+
+# Mental health lexicon
+MENTAL_HEALTH_TERMS = {
+    'depression': ['sad', 'empty', 'hopeless', 'worthless', 'depressed', 'down', 'blue'],
+    'anxiety': ['worried', 'anxious', 'nervous', 'scared', 'panic', 'fear', 'afraid'],
+    'stress': ['stressed', 'overwhelmed', 'pressure', 'tense', 'burden', 'exhausted'],
+    'anger': ['angry', 'furious', 'irritated', 'mad', 'frustrated', 'rage'],
+    'loneliness': ['alone', 'lonely', 'isolated', 'abandoned', 'left out', 'no one cares']
+}
+
+# Therapy topics
+THERAPY_TOPICS = {
+    'relationships': ['friend', 'family', 'partner', 'love', 'break up', 'relationship'],
+    'work': ['job', 'work', 'career', 'boss', 'colleague', 'office'],
+    'health': ['health', 'sick', 'pain', 'doctor', 'hospital', 'ill'],
+    'sleep': ['sleep', 'insomnia', 'tired', 'rest', 'wake up'],
+    'school': ['school', 'exam', 'test', 'grade', 'study', 'homework']
+}
+
+INTENSIFIERS = ['very', 'so', 'extremely', 'really', 'incredibly', 'absolutely']
+
+BASE_INTENSITY = 0.5
+INTENSIFIED_INTENSITY = 0.9
+MAX_EMOTIONS = 2
+
+
+class LexiconIndex:
+    """
+    Every emotion term, topic keyword and "<intensifier> <term>[s]" phrase is
+    compiled into one scanner at load time. A message is lowercased once
+    and scanned once; the emotion / topic / intensity rules are then resolved
+    from the set of hits. Matching is plain substring matching, exactly like
+    the `term in text_lower` checks it replaces.
+    """
+
+    def __init__(self, mental_health_terms: Dict[str, List[str]] = MENTAL_HEALTH_TERMS,
+                 therapy_topics: Dict[str, List[str]] = THERAPY_TOPICS,
+                 intensifiers: List[str] = INTENSIFIERS):
+        self.mental_health_terms = mental_health_terms
+        self.therapy_topics = therapy_topics
+        self.intensifiers = intensifiers
+
+        self._scanner = SubstringScanner()
+        self._categories = list(mental_health_terms)
+        self._topics = list(therapy_topics)
+        # hit id -> (category index, term rank) for plain emotion terms
+        self._emotion_hits: Dict[int, Tuple[int, int]] = {}
+        # (category index, term rank) -> hit id of its "<intensifier> <term>[s]" phrases
+        self._intense_ids: Dict[Tuple[int, int], int] = {}
+        # hit id -> topic index
+        self._topic_hits: Dict[int, int] = {}
+
+        next_id = 0
+        for category_index, terms in enumerate(mental_health_terms.values()):
+            for rank, term in enumerate(terms):
+                hit_id, intense_id = next_id, next_id + 1
+                next_id += 2
+                self._emotion_hits[hit_id] = (category_index, rank)
+                self._intense_ids[(category_index, rank)] = intense_id
+                self._scanner.add(term, hit_id)
+                for intensifier in intensifiers:
+                    self._scanner.add(f"{intensifier} {term}", intense_id)
+                    self._scanner.add(f"{intensifier} {term}s", intense_id)
+
+        for topic_index, keywords in enumerate(therapy_topics.values()):
+            self._topic_hits[next_id] = topic_index
+            for keyword in keywords:
+                self._scanner.add(keyword, next_id)
+            next_id += 1
+
+        self._scanner.build()
+
+    def analyze(self, text: str) -> Tuple[List[Dict], List[str]]:
+        """
+        Single pass over the message
+        Returns: (emotions, topics) in the same shape NLPProcessor has always produced
+        """
+        hits = self._scanner.find_payloads(text.lower())
+        return self._resolve_emotions(hits), self._resolve_topics(hits)
+
+    def _resolve_emotions(self, hits) -> List[Dict]:
+        # Earliest matching term per category (lexicon order)
+        best_rank: Dict[int, int] = {}
+        for hit_id in hits:
+            position = self._emotion_hits.get(hit_id)
+            if position is None:
+                continue
+            category_index, rank = position
+            if rank < best_rank.get(category_index, rank + 1):
+                best_rank[category_index] = rank
+
+        emotions_found = []
+        for category_index in sorted(best_rank)[:MAX_EMOTIONS]:
+            rank = best_rank[category_index]
+            category = self._categories[category_index]
+            intense = self._intense_ids[(category_index, rank)] in hits
+            emotions_found.append({
+                'emotion': category,
+                'term': self.mental_health_terms[category][rank],
+                'intensity': round(INTENSIFIED_INTENSITY if intense else BASE_INTENSITY, 2)
+            })
+        return emotions_found
+
+    def _resolve_topics(self, hits) -> List[str]:
+        topic_indexes = sorted(self._topic_hits[hit_id] for hit_id in hits if hit_id in self._topic_hits)
+        return [self._topics[index] for index in topic_indexes]
@@ -0,0 +1,272 @@
+"""
+Metrics
+In-process counters, gauges and latency histograms, rendered as Prometheus text
+
+Served at /metrics (text format 0.0.4). Counters are always counted;
+histogram observations for chat turns and Mongo commands are sampled with
+METRICS_SAMPLE_RATE (a sampled turn records all of its stages). Recording
+is a lock, a bisect and two additions, cheap enough to leave on.
+
+Under app.prefork every worker keeps its own series, so one scrape of the
+shared port sees one worker's numbers.
+"""
+
+import bisect
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+
+# Seconds; chat stages run from microseconds (cached NLP) to seconds (cold models, slow Mongo)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CHAT_STAGES = ("receive", "crisis", "nlp", "response", "db_insert", "send")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.function is not None:
+            lines.append(f"{self.name} {_format_value(self.function())}")
+            return lines
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, _format_labels(self.labelnames, key)))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        base = labels[1:-1]
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """Named metrics of this process, rendered in registration order"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                function: Optional[Callable[[], float]] = None) -> Counter:
+        return self._register(Counter(name, help_text, labelnames, function))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, function))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def sampled(rate: float = METRICS_SAMPLE_RATE) -> bool:
+    return METRICS_ENABLED and (rate >= 1.0 or random.random() < rate)
+
+
+class StageTimer:
+    """
+    Splits one chat turn into consecutive stages: `mark(stage)` records the
+    time since the previous mark under that stage, so the stages of a turn
+    add up to the whole turn. Does nothing for turns that aren't sampled.
+    """
+
+    __slots__ = ("sampled", "started", "_last")
+
+    def __init__(self, sample: Optional[bool] = None):
+        self.sampled = sampled() if sample is None else sample
+        self.started = self._last = time.perf_counter() if self.sampled else 0.0
+
+    def mark(self, stage: str):
+        if self.sampled:
+            now = time.perf_counter()
+            CHAT_STAGE_SECONDS.labels(stage).observe(now - self._last)
+            self._last = now
+
+    def finish(self, protocol: str):
+        if self.sampled:
+            CHAT_TURN_SECONDS.labels(protocol).observe(time.perf_counter() - self.started)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """pymongo command monitoring: latency per command name, failures"""
+
+    def __init__(self, sample_rate: float = METRICS_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if sampled(self.sample_rate):
+            MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+        if sampled(self.sample_rate):
+            MONGO_COMMAND_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+
+# Process-wide registry and the chat pipeline's metrics
+metrics = MetricsRegistry()
+
+CHAT_STAGE_SECONDS = metrics.histogram(
+    "emoheal_chat_stage_seconds", "Time spent in each stage of a WebSocket chat turn", ["stage"])
+CHAT_TURN_SECONDS = metrics.histogram(
+    "emoheal_chat_turn_seconds", "Whole WebSocket chat turn, message received to last write", ["protocol"])
+CHAT_MESSAGES = metrics.counter(
+    "emoheal_chat_messages_total", "Chat messages processed", ["protocol"])
+CRISIS_LEVELS = metrics.counter(
+    "emoheal_crisis_level_total", "Crisis levels detected on chat messages", ["level"])
+ACTIVE_SESSIONS = metrics.gauge(
+    "emoheal_active_sessions", "Open WebSocket chat sessions")
+CHAT_ERRORS = metrics.counter(
+    "emoheal_chat_errors_total", "Chat sessions ended by an error", ["kind"])
+MONGO_COMMAND_SECONDS = metrics.histogram(
+    "emoheal_mongo_command_seconds", "MongoDB command latency (driver command monitoring)", ["command"])
+MONGO_COMMAND_FAILURES = metrics.counter(
+    "emoheal_mongo_command_failures_total", "MongoDB commands that failed", ["command"])
@@ -0,0 +1,132 @@
+"""
+NLP Batcher
+Collects messages from concurrent chat sessions into nlp.pipe batches
+"""
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A batch is dispatched when it reaches NLP_BATCH_MAX_SIZE messages or its
+# oldest message has waited NLP_BATCH_MAX_WAIT_MS. Size 1 disables batching.
+NLP_BATCH_MAX_SIZE = int(os.getenv("NLP_BATCH_MAX_SIZE", "1"))
+NLP_BATCH_MAX_WAIT_MS = float(os.getenv("NLP_BATCH_MAX_WAIT_MS", "5"))
+
+
+class NLPBatcher:
+    """
+    Micro-batching scheduler in front of NLPProcessor.
+
+    Sessions `await submit(message)`; a background task groups pending
+    messages and hands them to `run_batch` (e.g. AnalysisExecutor.process_batch),
+    then resolves each session's future with its own result.
+    """
+
+    def __init__(self, run_batch: Callable[[List[str]], Awaitable[List[Dict]]],
+                 max_batch_size: int = NLP_BATCH_MAX_SIZE, max_wait_ms: float = NLP_BATCH_MAX_WAIT_MS,
+                 max_concurrent_batches: int = 1):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(max(1, max_concurrent_batches))
+        self._inflight = set()
+        # Messages taken off the queue by the collector but not yet dispatched
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+
+        # Counters
+        self.batches = 0
+        self.messages = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.messages / self.batches if self.batches else 0.0
+
+    def start(self):
+        """Start the collector task on the running loop"""
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Stop collecting, flush what is still queued and wait for in-flight batches"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+
+            # Nobody may be left waiting on a future that will never resolve
+            remaining, self._pending = self._pending, []
+            while not self._queue.empty():
+                remaining.append(self._queue.get_nowait())
+            remaining = [item for item in remaining if not item[1].done()]
+            for offset in range(0, len(remaining), self.max_batch_size):
+                await self._slots.acquire()
+                self._start_dispatch(remaining[offset:offset + self.max_batch_size])
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, message: str) -> Dict:
+        """Queue one message and wait for its analysis"""
+        if self._collector is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((message, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            self._pending = batch
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    # Take whatever is already queued, but don't wait any longer
+                    if self._queue.empty():
+                        break
+                    batch.append(self._queue.get_nowait())
+                    continue
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            self._pending = []
+            self._start_dispatch(batch)
+
+    def _start_dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run one batch in its own task (the caller holds a slot)"""
+        task = asyncio.create_task(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            messages = [message for message, _ in batch]
+            try:
+                results = await self.run_batch(messages)
+            except Exception as e:
+                logger.error(f"NLP batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.messages += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
@@ -1,52 +1,100 @@
 import spacy
-from textblob import TextBlob
 from nltk.sentiment import SentimentIntensityAnalyzer
-import nltk
-from typing import Dict, List
-import re
+import os
+from typing import Dict, List, Optional
+
+from .knowledge_pack import KnowledgeStore, knowledge
+from .lexicon_index import LexiconIndex
+
+SPACY_MODEL = 'en_core_web_sm'
+SPACY_COMPONENTS = ['tok2vec', 'tagger', 'parser', 'senter', 'attribute_ruler', 'lemmatizer', 'ner']
+
+# Analysis profiles: which spaCy components get loaded, and whether
+# entities are computed when the caller doesn't say
+ANALYSIS_PROFILES = {
+    'tokens-only': {'components': [], 'entities': False},
+    'with-entities': {'components': ['ner'], 'entities': True},
+    'full': {'components': SPACY_COMPONENTS, 'entities': True},
+}
+NLP_PROFILE = os.getenv("NLP_PROFILE", "with-entities")
 
 class NLPProcessor:
-    def __init__(self):
-        # Load spaCy model
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, profile: str = NLP_PROFILE, knowledge_store: KnowledgeStore = knowledge):
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown NLP profile '{profile}', expected one of {list(ANALYSIS_PROFILES)}")
+        self.profile = profile
+        self.entities_by_default = ANALYSIS_PROFILES[profile]['entities']
+
+        # Load spaCy model with only the components this profile needs
+        self.nlp = _load_pipeline(ANALYSIS_PROFILES[profile]['components'])
+        self._entity_nlp = self.nlp if self.nlp.has_pipe('ner') else None
         
         # Initialize sentiment analyzer (VADER)
         self.sia = SentimentIntensityAnalyzer()
         
-        # Mental health lexicon
-        self.mental_health_terms = {
-            'depression': ['sad', 'empty', 'hopeless', 'worthless', 'depressed', 'down', 'blue'],
-            'anxiety': ['worried', 'anxious', 'nervous', 'scared', 'panic', 'fear', 'afraid'],
-            'stress': ['stressed', 'overwhelmed', 'pressure', 'tense', 'burden', 'exhausted'],
-            'anger': ['angry', 'furious', 'irritated', 'mad', 'frustrated', 'rage'],
-            'loneliness': ['alone', 'lonely', 'isolated', 'abandoned', 'left out', 'no one cares']
-        }
-        
-        # Therapy topics
-        self.therapy_topics = {
-            'relationships': ['friend', 'family', 'partner', 'love', 'break up', 'relationship'],
-            'work': ['job', 'work', 'career', 'boss', 'colleague', 'office'],
-            'health': ['health', 'sick', 'pain', 'doctor', 'hospital', 'ill'],
-            'sleep': ['sleep', 'insomnia', 'tired', 'rest', 'wake up'],
-            'school': ['school', 'exam', 'test', 'grade', 'study', 'homework']
-        }
+        # Lexicons from the knowledge pack, compiled into a single-pass index
+        # (recompiled when a new pack version is published)
+        self.knowledge = knowledge_store
+        self.knowledge_version = None
+        self._refresh_lexicon()
 
-    def process_message(self, user_message: str) -> Dict:
+    def _refresh_lexicon(self):
+        pack = self.knowledge.current()
+        if pack.version == self.knowledge_version:
+            return
+        lexicon = LexiconIndex(
+            pack.section('mental_health_terms'), pack.section('therapy_topics'), pack.section('intensifiers')
+        )
+        self.mental_health_terms = lexicon.mental_health_terms
+        self.therapy_topics = lexicon.therapy_topics
+        self.intensifiers = lexicon.intensifiers
+        self.lexicon = lexicon
+        self.knowledge_version = pack.version
+
+    def process_message(self, user_message: str, include_entities: Optional[bool] = None) -> Dict:
         """
         Comprehensive NLP analysis of user message
         Returns: sentiment, emotions, topics, entities
+        include_entities: run NER (defaults to the profile's setting); tokenizer only otherwise
         """
+        self._refresh_lexicon()
+
         # Basic processing
-        doc = self.nlp(user_message)
-        
+        if self._wants_entities(include_entities):
+            doc = self._get_entity_nlp()(user_message)
+        else:
+            doc = self.nlp.make_doc(user_message)
+        return self._analyze_doc(user_message, doc)
+
+    def process_batch(self, user_messages: List[str], batch_size: int = 64,
+                      include_entities: Optional[bool] = None) -> List[Dict]:
+        """
+        Same analysis as process_message for many messages at once
+        spaCy parses the whole batch through nlp.pipe
+        """
+        self._refresh_lexicon()
+        if self._wants_entities(include_entities):
+            docs = self._get_entity_nlp().pipe(user_messages, batch_size=batch_size)
+        else:
+            docs = self.nlp.tokenizer.pipe(user_messages, batch_size=batch_size)
+        return [self._analyze_doc(message, doc) for message, doc in zip(user_messages, docs)]
+
+    def _wants_entities(self, include_entities: Optional[bool]) -> bool:
+        return self.entities_by_default if include_entities is None else include_entities
+
+    def _get_entity_nlp(self):
+        """NER pipeline, loaded on first use when the profile left it out"""
+        if self._entity_nlp is None:
+            self._entity_nlp = _load_pipeline(['ner'])
+        return self._entity_nlp
+
+    def _analyze_doc(self, user_message: str, doc) -> Dict:
+        """Sentiment, lexicon and entity analysis for a parsed message"""
         # Sentiment analysis (VADER)
         sentiment = self.sia.polarity_scores(user_message)
         
-        # Extract emotions
-        emotions = self._extract_emotions(user_message)
-        
-        # Extract topics
-        topics = self._extract_topics(doc)
+        # Extract emotions and topics (one scan of the text)
+        emotions, topics = self.lexicon.analyze(user_message)
         
         return {
             'text': user_message,
@@ -62,43 +110,7 @@ class NLPProcessor:
             'tokens': [token.text for token in doc]
         }
 
-    def _extract_emotions(self, text: str) -> List[Dict]:
-        """Extract emotion keywords from text"""
-        emotions_found = []
-        text_lower = text.lower()
-        
-        for emotion_category, terms in self.mental_health_terms.items():
-            for term in terms:
-                if term in text_lower:
-                    intensity = self._calculate_intensity(term, text_lower)
-                    emotions_found.append({
-                        'emotion': emotion_category,
-                        'term': term,
-                        'intensity': round(intensity, 2)
-                    })
-                    break  # First match per category
-        
-        return emotions_found[:2]  # Top 2 emotions
-
-    def _extract_topics(self, doc) -> List[str]:
-        """Extract therapy topics from message"""
-        topics = []
-        text_lower = doc.text.lower()
-        
-        for topic, keywords in self.therapy_topics.items():
-            if any(kw in text_lower for kw in keywords):
-                topics.append(topic)
-        
-        return topics
-
-    def _calculate_intensity(self, term: str, text: str) -> float:
-        """Calculate emotional intensity (0-1)"""
-        intensifiers = ['very', 'so', 'extremely', 'really', 'incredibly', 'absolutely']
-        intensity = 0.5  # Base
-        
-        for intensifier in intensifiers:
-            if f"{intensifier} {term}" in text or f"{intensifier} {term}s" in text:
-                return 0.9
-        
-        return intensity
 
+def _load_pipeline(components: List[str]):
+    """Load the spaCy model, excluding every component not listed"""
+    return spacy.load(SPACY_MODEL, exclude=[name for name in SPACY_COMPONENTS if name not in components])
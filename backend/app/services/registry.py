@@ -0,0 +1,128 @@
+"""
+Service Registry
+Lazy, background loading of the AI services with per-service readiness
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _load_crisis_detector():
+    from ..models.crisis_detector import CrisisDetector
+    return CrisisDetector()
+
+
+def _load_nlp_processor():
+    from .nlp_processor import NLPProcessor
+    return NLPProcessor()
+
+
+def _load_response_generator():
+    from .response_generator import TherapeuticResponseGenerator
+    return TherapeuticResponseGenerator()
+
+
+# Load order matters: crisis detection is the safety path, so it comes first
+SERVICE_LOADERS: Dict[str, Callable] = {
+    "crisis_detector": _load_crisis_detector,
+    "nlp_processor": _load_nlp_processor,
+    "response_generator": _load_response_generator,
+}
+
+
+class ServiceRegistry:
+    """
+    Holds the CrisisDetector / NLPProcessor / TherapeuticResponseGenerator
+    instances. Nothing heavy is imported until `load()` runs, so importing
+    the app stays cheap; each service reports its own state and load time.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable] = SERVICE_LOADERS):
+        self.loaders = loaders
+        self.instances: Dict[str, object] = {}
+        self.status: Dict[str, Dict] = {
+            name: {"state": "pending", "load_seconds": None, "error": None} for name in loaders
+        }
+        self._listeners: List[Callable[[str, object], None]] = []
+
+    def add_listener(self, callback: Callable[[str, object], None]):
+        """Call `callback(name, instance)` for each service as it loads, before it is reported ready"""
+        self._listeners.append(callback)
+
+    @property
+    def crisis_detector(self):
+        return self.instances.get("crisis_detector")
+
+    @property
+    def nlp_processor(self):
+        return self.instances.get("nlp_processor")
+
+    @property
+    def response_generator(self):
+        return self.instances.get("response_generator")
+
+    @property
+    def crisis_ready(self) -> bool:
+        return self.is_ready("crisis_detector")
+
+    @property
+    def nlp_ready(self) -> bool:
+        return self.is_ready("nlp_processor") and self.is_ready("response_generator")
+
+    def is_ready(self, name: str) -> bool:
+        return self.status.get(name, {}).get("state") == "ready"
+
+    @property
+    def all_ready(self) -> bool:
+        return all(entry["state"] == "ready" for entry in self.status.values())
+
+    def load_service(self, name: str) -> Optional[object]:
+        """Load one service synchronously (no-op if it is already loaded)"""
+        if name in self.instances:
+            return self.instances[name]
+
+        entry = self.status[name]
+        entry["state"] = "loading"
+        started = time.perf_counter()
+        try:
+            instance = self.loaders[name]()
+            # Consumers get the instance first, so "ready" always means usable
+            for callback in self._listeners:
+                callback(name, instance)
+        except Exception as e:
+            entry.update(state="failed", error=str(e), load_seconds=round(time.perf_counter() - started, 3))
+            logger.error(f"⚠️ {name} failed to load: {e}")
+            return None
+
+        self.instances[name] = instance
+        entry.update(state="ready", error=None, load_seconds=round(time.perf_counter() - started, 3))
+        logger.info(f"✅ {name} loaded in {entry['load_seconds']}s")
+        return instance
+
+    def load_all(self):
+        """Load every service in the calling thread"""
+        for name in self.loaders:
+            self.load_service(name)
+
+    async def load(self):
+        """Load every service in a worker thread, keeping the event loop free"""
+        for name in self.loaders:
+            await asyncio.to_thread(self.load_service, name)
+
+    def mark(self, name: str, state: str, load_seconds: float = None, error: str = None):
+        """Record the state of something loaded outside the registry (e.g. worker pools)"""
+        self.status[name] = {"state": state, "load_seconds": load_seconds, "error": error}
+
+    def readiness(self) -> Dict:
+        return {
+            "ready": self.all_ready,
+            "services": {name: dict(entry) for name, entry in self.status.items()}
+        }
+
+
+# Application-wide registry (models load in the background once the app starts; see /ready)
+services = ServiceRegistry()
@@ -0,0 +1,110 @@
+"""
+Response Cache
+Conditional GET and serialized-response memoization for the dashboard endpoints
+"""
+
+import json
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from ..database.data_versions import DataVersions, data_versions
+
+CONDITIONAL_GET = os.getenv("CONDITIONAL_GET", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+CacheKey = Tuple[str, str, Hashable, str]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+class ResponseCache:
+    """
+    Serialized JSON bodies keyed by (route, user, params, ETag). The ETag
+    carries the user's data version, so a write makes the old entries
+    unreachable and they age out of the LRU; nothing is invalidated
+    explicitly.
+    """
+
+    def __init__(self, versions: DataVersions = data_versions, enabled: bool = CONDITIONAL_GET,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.versions = versions
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self.bytes = 0
+
+        # Counters
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def respond(self, request: Request, route: str, user_id: str, params: Hashable,
+                      build: Callable[[], Awaitable[Dict]]):
+        """
+        304 if the client's ETag is current, else the cached or freshly
+        built body. The ETag is taken before `build` runs, so a write that
+        lands meanwhile makes the next request rebuild rather than be missed.
+        """
+        if not self.enabled:
+            return await build()
+
+        etag = self.versions.etag(user_id)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        key = (route, user_id, params, etag)
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            body = json.dumps(jsonable_encoder(await build()), separators=(',', ':')).encode()
+            self._put(key, body)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def _put(self, key: CacheKey, body: bytes):
+        if len(body) > self.max_bytes or self.max_entries <= 0:
+            return
+        self._entries[key] = body
+        self.bytes += len(body)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.bytes -= len(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "not_modified": self.not_modified,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+# Shared by the routes in routes/chatbot.py
+response_cache = ResponseCache()
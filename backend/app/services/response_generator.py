@@ -1,92 +1,180 @@
-import json
+import logging
+import os
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .knowledge_pack import KnowledgeStore, knowledge
+from .lexicon_index import MENTAL_HEALTH_TERMS, THERAPY_TOPICS
+
+logger = logging.getLogger(__name__)
+
+# Fixed seed makes response selection reproducible (tests, benchmarks); unset = random
+RESPONSE_SEED = os.getenv("RESPONSE_SEED")
+
+THERAPY_TYPES = ('cognitive_behavioral_therapy', 'dialectical_behavior_therapy', 'empathetic_reflection')
+DEFAULT_THERAPY_TYPE = 'empathetic_reflection'
+DEFAULT_TEMPLATE = 'Tell me more about how you\'re feeling.'
+CRISIS_FALLBACKS = {
+    'high': ('immediate_support', 'Please reach out for help immediately.'),
+    'medium': ('high_risk_keywords', "I want to help you through this difficult time."),
+}
+
+# "" means no reflection; kept as a choice so it stays as likely as before
+HISTORY_REFLECTIONS = (
+    "Building on what you said about '{}'",
+    "Regarding your earlier mention of {}",
+    "",
+)
+
+TableKey = Tuple[str, Optional[str], Optional[str]]
+
 
 class TherapeuticResponseGenerator:
-    def __init__(self):
-        # Load therapeutic response templates
-        try:
-            with open('../data/therapeutic_responses.json', 'r') as f:
-                self.responses = json.load(f)
-        except FileNotFoundError:
-            self.responses = {"general": {"default": "I'm here to listen. Tell me more."}}
-
-    def generate_response(self, nlp_analysis: Dict, crisis_level: str, conversation_history: List[Dict]) -> str:
+    """
+    The response templates (therapeutic_responses.json, served from the
+    knowledge pack) are compiled at load time into a flat table keyed by
+    (therapy type, primary emotion, topic) whose values are the finished
+    response text, emotion reflection included. A turn is one dict lookup
+    plus the optional history reflection.
+    """
+
+    def __init__(self, responses: Optional[Dict] = None, seed: Optional[int] = None,
+                 knowledge_store: KnowledgeStore = knowledge):
+        # Templates come from the knowledge pack (and follow its reloads) unless given
+        self.knowledge = None if responses is not None else knowledge_store
+        self.knowledge_version = None
+
+        if seed is None and RESPONSE_SEED is not None:
+            seed = int(RESPONSE_SEED)
+        self.rng = random.Random(seed)
+
+        if self.knowledge is None:
+            self.responses = responses
+            self._compile(MENTAL_HEALTH_TERMS, THERAPY_TOPICS)
+        else:
+            self._refresh_templates()
+
+    def _refresh_templates(self):
+        pack = self.knowledge.current()
+        if pack.version == self.knowledge_version:
+            return
+        self.responses = pack.section('responses')
+        self._compile(pack.section('mental_health_terms'), pack.section('therapy_topics'))
+        self.knowledge_version = pack.version
+
+    def _compile(self, mental_health_terms: Dict, therapy_topics: Dict):
+        """Validate every section once and precompute all known response keys"""
+        crisis_responses = {}
+        crisis_section = self._section('crisis_intervention')
+        for level, (key, fallback) in CRISIS_FALLBACKS.items():
+            crisis_responses[level] = crisis_section.get(key, fallback)
+
+        fallback_section = self._section(DEFAULT_THERAPY_TYPE)
+        sections: Dict[str, Dict[str, str]] = {}
+        for therapy_type in set(THERAPY_TYPES) | set(self.responses):
+            if therapy_type == 'crisis_intervention':
+                continue
+            sections[therapy_type] = (
+                self._section(therapy_type) if therapy_type in self.responses else fallback_section
+            )
+
+        table: Dict[TableKey, str] = {}
+        for therapy_type in THERAPY_TYPES:
+            for emotion in (None, *mental_health_terms):
+                for topic in (None, *therapy_topics):
+                    table[(therapy_type, emotion, topic)] = _resolve_template(sections, (therapy_type, emotion, topic))
+
+        # Emotion / topic keys each section has a response for
+        section_keys = {therapy_type: frozenset(section) for therapy_type, section in sections.items()}
+
+        self.crisis_responses, self.sections, self.section_keys, self.table = (
+            crisis_responses, sections, section_keys, table
+        )
+
+    def _section(self, name: str) -> Dict[str, str]:
+        """A response section with non-text entries dropped (they could never be sent)"""
+        section = self.responses.get(name, {})
+        if not isinstance(section, dict):
+            logger.warning(f"⚠️ Ignoring response section '{name}': expected an object")
+            return {}
+        valid = {key: value for key, value in section.items() if isinstance(value, str)}
+        if len(valid) != len(section):
+            logger.warning(f"⚠️ Ignoring non-text responses in '{name}': {sorted(set(section) - set(valid))}")
+        return valid
+
+    def generate_response(self, nlp_analysis: Dict, crisis_level: str, conversation_history: Sequence[Dict]) -> str:
         """
         Generate empathetic therapeutic response
         """
+        if self.knowledge is not None:
+            self._refresh_templates()
+
         # Step 1: Handle crisis first
-        if crisis_level == 'high':
-            return self.responses['crisis_intervention'].get('immediate_support', 'Please reach out for help immediately.')
-        
-        if crisis_level == 'medium':
-            return self.responses['crisis_intervention'].get('high_risk_keywords', "I want to help you through this difficult time.")
-        
+        if crisis_level in self.crisis_responses:
+            return self.crisis_responses[crisis_level]
+
         # Step 2: Determine therapy type
-        therapy_type = self._select_therapy_type(nlp_analysis)
-        
-        # Step 3: Get response template
-        response_template = self._get_response_template(therapy_type, nlp_analysis)
-        
-        # Step 4: Personalize
-        final_response = self._personalize_response(response_template, nlp_analysis, conversation_history)
-        
-        return final_response
-
-    def _select_therapy_type(self, nlp_analysis: Dict) -> str:
-        """Select therapy approach based on analysis"""
-        sentiment = nlp_analysis.get('sentiment', {})
         emotions = nlp_analysis.get('emotions', [])
-        
+        therapy_type = self._select_therapy_type(nlp_analysis.get('sentiment', {}), emotions)
+
+        # Step 3: Look up the compiled response
+        emotion = emotions[0]['emotion'] if emotions else None
+        topic = None
+        answered = self.section_keys.get(therapy_type, self.section_keys[DEFAULT_THERAPY_TYPE])
+        if emotion not in answered:
+            for candidate in nlp_analysis.get('topics', []):
+                if candidate in answered:
+                    topic = candidate
+                    break
+
+        key = (therapy_type, emotion, topic)
+        response = self.table.get(key)
+        if response is None:
+            response = self.table[key] = _resolve_template(self.sections, key)
+
+        # Step 4: Reference recent conversation
+        return self._reflect_history(response, conversation_history)
+
+    @staticmethod
+    def _select_therapy_type(sentiment: Dict, emotions: List[Dict]) -> str:
+        """Select therapy approach based on analysis"""
         # Severe negative sentiment → CBT
         if sentiment.get('negative', 0) > 0.5 and sentiment.get('compound', 0) < -0.3:
             return 'cognitive_behavioral_therapy'
-        
+
         # Anxiety detected → DBT
-        if any(e['emotion'] == 'anxiety' for e in emotions):
-            return 'dialectical_behavior_therapy'
-        
+        for emotion in emotions:
+            if emotion['emotion'] == 'anxiety':
+                return 'dialectical_behavior_therapy'
+
         # Default empathetic listening
-        return 'empathetic_reflection'
+        return DEFAULT_THERAPY_TYPE
 
-    def _get_response_template(self, therapy_type: str, nlp_analysis: Dict) -> str:
-        """Select specific response template"""
-        responses = self.responses.get(therapy_type, self.responses.get('empathetic_reflection', {}))
-        
-        # Match to primary emotion
-        emotions = nlp_analysis.get('emotions', [])
-        if emotions:
-            primary_emotion = emotions[0]['emotion']
-            if primary_emotion in responses:
-                return responses[primary_emotion]
-        
-        # Match to topics
-        topics = nlp_analysis.get('topics', [])
-        for topic in topics:
-            if topic in responses:
-                return responses[topic]
-        
-        return responses.get('general', 'Tell me more about how you\'re feeling.')
-
-    def _personalize_response(self, template: str, nlp_analysis: Dict, history: List[Dict]) -> str:
-        """Personalize with user context"""
-        response = template
-        
-        # Add emotion reflection
-        emotions = nlp_analysis.get('emotions', [])
-        if emotions:
-            emotion_reflection = f"I hear you're feeling {emotions[0]['emotion']} right now. "
-            response = emotion_reflection + response
-        
-        # Reference recent conversation
-        if history and len(history) > 1:
-            last_user_msg = history[-2].get('message', '')[:50] + "..."
-            reflection = random.choice([
-                f"Building on what you said about '{last_user_msg}'",
-                f"Regarding your earlier mention of {last_user_msg}",
-                ""
-            ])
-            if reflection:
-                response = reflection + " " + response
-        
-        return response
+    def _reflect_history(self, response: str, history: Sequence[Dict]) -> str:
+        if len(history) < 2:
+            return response
+
+        reflection = self.rng.choice(HISTORY_REFLECTIONS)
+        if not reflection:
+            return response
+        last_user_msg = history[-2].get('message', '')[:50] + "..."
+        return reflection.format(last_user_msg) + " " + response
+
+
+def _resolve_template(sections: Dict[str, Dict[str, str]], key: TableKey) -> str:
+    """Finished response for one table key"""
+    therapy_type, emotion, topic = key
+    section = sections.get(therapy_type, sections[DEFAULT_THERAPY_TYPE])
+
+    # Match to primary emotion, then topic, then the section's general response
+    if emotion is not None and emotion in section:
+        template = section[emotion]
+    elif topic is not None and topic in section:
+        template = section[topic]
+    else:
+        template = section.get('general', DEFAULT_TEMPLATE)
+
+    # Add emotion reflection
+    if emotion is not None:
+        template = f"I hear you're feeling {emotion} right now. " + template
+    return template
@@ -0,0 +1,140 @@
+"""
+Fuzzy Index
+SymSpell-style deletion dictionary for typo-tolerant term lookup
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+ENGLISH_WORDS_PATH = Path(__file__).resolve().parent / "english_words.txt"
+
+
+class SymSpellIndex:
+    """
+    Precomputed deletion dictionary over a fixed vocabulary.
+
+    Every vocabulary term is stored under all strings obtained by deleting
+    up to `max_edit_distance` characters. A lookup generates the same
+    deletes for the query and verifies the few candidates it hits, so the
+    cost depends on the query length, not on the vocabulary size.
+
+    Tokens in `known_words` (a general dictionary) are taken as spelled
+    on purpose and never corrected, so "diet" stays "diet" even though it
+    is one edit away from "die".
+    """
+
+    def __init__(self, terms: Iterable[str] = (), max_edit_distance: int = 1, min_term_length: int = 3,
+                 known_words: FrozenSet[str] = frozenset()):
+        self.max_edit_distance = max_edit_distance
+        self.min_term_length = min_term_length
+        self.known_words = known_words
+        self.terms: Set[str] = set()
+        self._deletes: Dict[str, Set[str]] = {}
+
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.terms
+
+    def add(self, term: str) -> None:
+        """Add a term and all its deletes to the index"""
+        term = term.lower().strip()
+        if not term or term in self.terms:
+            return
+        self.terms.add(term)
+        for variant in _deletes(term, self.max_edit_distance):
+            self._deletes.setdefault(variant, set()).add(term)
+
+    def lookup(self, token: str, max_edit_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Find the closest vocabulary term for a token
+        Returns: (term, distance) or None when nothing is within range
+        """
+        token = token.lower()
+        if token in self.terms:
+            return token, 0
+        if len(token) < self.min_term_length or token in self.known_words:
+            return None
+
+        limit = self.max_edit_distance if max_edit_distance is None else min(max_edit_distance, self.max_edit_distance)
+        # Short tokens get at most one edit, otherwise nearly anything matches
+        if len(token) < 6:
+            limit = min(limit, 1)
+        if limit <= 0:
+            return None
+
+        best: Optional[Tuple[str, int]] = None
+        for variant in _deletes(token, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if abs(len(candidate) - len(token)) > limit:
+                    continue
+                distance = edit_distance(token, candidate, limit)
+                if distance > limit:
+                    continue
+                if best is None or (distance, candidate) < (best[1], best[0]):
+                    best = (candidate, distance)
+        return best
+
+    def correct_tokens(self, tokens: List[str]) -> List[Tuple[str, int]]:
+        """Map each token to its closest term (or itself) with the edit distance used"""
+        corrected = []
+        for token in tokens:
+            match = self.lookup(token)
+            corrected.append(match if match else (token, 0))
+        return corrected
+
+
+@lru_cache(maxsize=4)
+def load_word_list(path: str = str(ENGLISH_WORDS_PATH)) -> FrozenSet[str]:
+    """Lowercased words of a one-word-per-line list ('#' lines are comments)"""
+    with open(path, 'r') as f:
+        return frozenset(
+            word for word in (line.strip().lower() for line in f)
+            if word and not word.startswith('#')
+        )
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """All strings reachable from `term` by deleting up to `max_distance` characters"""
+    results = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            for index in range(len(word)):
+                variant = word[:index] + word[index + 1:]
+                if variant not in results:
+                    next_frontier.add(variant)
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(source: str, target: str, limit: int) -> int:
+    """Optimal string alignment distance (Damerau-Levenshtein with adjacent swaps), capped at limit + 1"""
+    if source == target:
+        return 0
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = current[0]
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
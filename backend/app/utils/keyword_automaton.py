@@ -0,0 +1,224 @@
+"""
+Keyword Automaton
+Aho-Corasick multi-pattern matcher used for lexicon scanning
+"""
+
+import re
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Set
+
+
+class KeywordMatch(NamedTuple):
+    """A single keyword occurrence in the scanned text"""
+    start: int
+    end: int
+    keyword: str
+    payload: Any
+
+
+class KeywordAutomaton:
+    """
+    Finds every occurrence of a set of keywords in one pass over the text.
+
+    Keywords are added with an arbitrary payload (e.g. a risk tier), then
+    `build()` compiles goto/fail/output tables. Scanning cost is linear in
+    the text length plus the number of matches, independent of how many
+    keywords are loaded.
+
+    With `word_boundary=True` a match only counts when it is not glued to
+    other word characters, so "die" does not fire inside "diet".
+    """
+
+    def __init__(self, word_boundary: bool = True, lowercase: bool = True):
+        self.word_boundary = word_boundary
+        self.lowercase = lowercase
+
+        # State 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._dict_link: List[int] = [-1]
+
+        self._keywords: List[str] = []
+        self._payloads: List[Any] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def add(self, keyword: str, payload: Any = None) -> None:
+        """Register a keyword with its payload"""
+        if self.lowercase:
+            keyword = keyword.lower()
+        keyword = keyword.strip()
+        if not keyword:
+            return
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._dict_link.append(-1)
+                self._goto[state][char] = next_state
+            state = next_state
+
+        self._outputs[state].append(len(self._keywords))
+        self._keywords.append(keyword)
+        self._payloads.append(payload)
+        self._built = False
+
+    def build(self) -> "KeywordAutomaton":
+        """Compute failure and dictionary-suffix links (BFS over the trie)"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+                # Nearest proper suffix state that ends a keyword
+                suffix = self._fail[child]
+                self._dict_link[child] = suffix if self._outputs[suffix] else self._dict_link[suffix]
+
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Return every keyword occurrence, ordered by end position"""
+        if not self._built:
+            self.build()
+        if self.lowercase:
+            text = text.lower()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        dict_link = self._dict_link
+        keywords = self._keywords
+        payloads = self._payloads
+        text_length = len(text)
+
+        matches: List[KeywordMatch] = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not state:
+                continue
+
+            end = index + 1
+            emit = state if outputs[state] else dict_link[state]
+            while emit > 0:
+                for keyword_id in outputs[emit]:
+                    start = end - len(keywords[keyword_id])
+                    if self.word_boundary and (
+                        _is_word_char(text, start - 1, text_length) or _is_word_char(text, end, text_length)
+                    ):
+                        continue
+                    matches.append(KeywordMatch(start, end, keywords[keyword_id], payloads[keyword_id]))
+                emit = dict_link[emit]
+
+        return matches
+
+    def find_keywords(self, text: str) -> Dict[Any, List[str]]:
+        """Group matched keywords by payload, first occurrence order, no duplicates"""
+        grouped: Dict[Any, List[str]] = {}
+        for match in self.find_all(text):
+            found = grouped.setdefault(match.payload, [])
+            if match.keyword not in found:
+                found.append(match.keyword)
+        return grouped
+
+
+def _is_word_char(text: str, index: int, text_length: int) -> bool:
+    """True if position `index` is inside the text and holds a word character"""
+    if index < 0 or index >= text_length:
+        return False
+    char = text[index]
+    return char.isalnum() or char == '_'
+
+
+class SubstringScanner:
+    """
+    Plain substring counterpart of KeywordAutomaton for payload lookups.
+
+    Keywords are compiled into one trie-shaped regex run as a lookahead at
+    every position, so the scan happens inside the regex engine. The regex
+    reports the longest keyword starting at each position; every shorter
+    keyword starting there is a prefix of it, so its payloads are
+    precomputed per keyword.
+    """
+
+    def __init__(self):
+        self._payloads: Dict[str, List[Any]] = {}
+        self._pattern = None
+        self._closure: Dict[str, frozenset] = {}
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(self, keyword: str, payload: Any = None) -> None:
+        """Register a keyword with its payload (matched case-sensitively)"""
+        if not keyword:
+            return
+        self._payloads.setdefault(keyword, []).append(payload)
+        self._pattern = None
+
+    def build(self) -> "SubstringScanner":
+        """Compile the trie regex and per-keyword prefix payload sets"""
+        keywords = list(self._payloads)
+        self._pattern = re.compile('(?=(' + _trie_regex(keywords) + '))') if keywords else None
+        self._closure = {}
+        for keyword in keywords:
+            payloads = set()
+            for end in range(1, len(keyword) + 1):
+                payloads.update(self._payloads.get(keyword[:end], ()))
+            self._closure[keyword] = frozenset(payloads)
+        return self
+
+    def find_payloads(self, text: str) -> Set[Any]:
+        """Payloads of every keyword occurring anywhere in the text"""
+        if self._pattern is None:
+            if not self._payloads:
+                return set()
+            self.build()
+
+        closure = self._closure
+        found: Set[Any] = set()
+        for longest in set(self._pattern.findall(text)):
+            found |= closure[longest]
+        return found
+
+
+def _trie_regex(keywords: List[str]) -> str:
+    """Regex equivalent to the keyword alternation, trying longer keywords first"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here: the continuation is optional (greedy, so longest first)
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
@@ -0,0 +1,142 @@
+"""
+Chat History Pagination Benchmark
+Run: python -m benchmarks.bench_chat_history [--size 100000] [--depths 0 1000 10000 50000 90000]
+     [--mongo-url mongodb://localhost:27017]    (from backend/)
+
+Seeds a scratch database with N chat messages for one user (many sharing a
+timestamp, so the _id tie-break matters) and times fetching one page at
+increasing depths: the original skip/limit + count_documents query against
+the keyset (cursor) query used by /api/chat-history, with and without a
+field projection. Also walks every page by cursor and checks it returns
+each message exactly once, in the skip/limit order. Needs a running
+MongoDB; the scratch database is dropped afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.database.indexes import INDEXES, apply_indexes
+from app.routes.chatbot import (
+    CHAT_HISTORY_SORT, encode_cursor, decode_cursor, history_page_filter, history_projection
+)
+
+USER_ID = "bench_user"
+PAGE = 50
+
+
+# Original get_chat_history body, kept here as the baseline
+async def legacy_page(collection, user_id, skip, limit):
+    total = await collection.count_documents({"userId": user_id})
+    history = await collection.find(
+        {"userId": user_id}
+    ).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
+    for msg in history:
+        msg["_id"] = str(msg["_id"])
+    return history, total
+
+
+async def keyset_page(collection, user_id, cursor, limit, fields=None):
+    position = decode_cursor(cursor) if cursor else None
+    history = await collection.find(
+        history_page_filter(user_id, position), history_projection(fields)
+    ).sort(CHAT_HISTORY_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(history[limit - 1]) if len(history) > limit else None
+    return history[:limit], next_cursor
+
+
+async def seed(collection, size: int, rng: random.Random):
+    await collection.delete_many({})
+    now = datetime.now().replace(microsecond=0)
+    batch = []
+    for i in range(size):
+        batch.append({
+            "userId": USER_ID,
+            "sessionId": f"{USER_ID}_{i // 20}",
+            "userMessage": "I have been feeling a lot of things lately " * rng.randint(1, 8),
+            "botResponse": "I hear you're feeling that right now. Tell me more about it. " * rng.randint(2, 6),
+            "sentiment": {"compound": round(rng.uniform(-1, 1), 3), "positive": 0.1, "negative": 0.2, "neutral": 0.7},
+            "emotionDetected": [],
+            "crisisLevel": "low",
+            "crisisConfidence": 0.1,
+            # ~4 messages per second: plenty of equal timestamps
+            "timestamp": now - timedelta(seconds=i // 4)
+        })
+        if len(batch) == 5000:
+            await collection.insert_many(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch)
+
+
+async def timed(coroutine_factory, repeats: int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = await coroutine_factory()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+async def cursor_at(collection, depth: int):
+    """Cursor a client would hold after paging down to `depth` messages"""
+    if depth == 0:
+        return None
+    previous = await collection.find({"userId": USER_ID}).sort(CHAT_HISTORY_SORT).skip(depth - 1).limit(1).to_list(1)
+    return encode_cursor(previous[0])
+
+
+async def walk_all(collection) -> list:
+    ids, cursor = [], None
+    while True:
+        page, cursor = await keyset_page(collection, USER_ID, cursor, 500, fields="sessionId")
+        ids.extend(message["_id"] for message in page)
+        if cursor is None:
+            return ids
+
+
+async def run_benchmark(mongo_url: str, size: int, depths, repeats: int):
+    print(f"📊 Benchmarking /api/chat-history pages ({size} messages, {PAGE} per page)...\n")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client["emoheal_bench_chat_history"]
+    collection = db.chatbot_history
+    failures = 0
+    try:
+        await apply_indexes(db, [spec for spec in INDEXES if spec.collection == "chatbot_history"])
+        await seed(collection, size, random.Random(7))
+
+        print(f"{'depth':>7} | {'skip/limit+count (ms)':>21} | {'keyset (ms)':>11} | {'keyset+fields (ms)':>18} | same page")
+        print("-" * 84)
+        for depth in (d for d in depths if d < size):
+            cursor = await cursor_at(collection, depth)
+            legacy_ms, (legacy, _) = await timed(lambda: legacy_page(collection, USER_ID, depth, PAGE), repeats)
+            keyset_ms, (page, _) = await timed(lambda: keyset_page(collection, USER_ID, cursor, PAGE), repeats)
+            fields_ms, _ = await timed(
+                lambda: keyset_page(collection, USER_ID, cursor, PAGE, fields="userMessage,sentiment"), repeats)
+            # Legacy sorts on timestamp only, so tied messages may swap across the page edge
+            same = [m["timestamp"] for m in legacy] == [m["timestamp"] for m in page]
+            failures += not same
+            print(f"{depth:>7} | {legacy_ms:>21.1f} | {keyset_ms:>11.1f} | {fields_ms:>18.1f} | {'yes' if same else 'NO'}")
+
+        walk_ms, ids = await timed(lambda: walk_all(collection), 1)
+        complete = len(ids) == size and len(set(ids)) == size
+        failures += not complete
+        print(f"\nFull cursor walk: {len(ids)} messages, {len(set(ids))} unique in {walk_ms:.0f} ms")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+    print("\n🎉 Benchmark completed!" if not failures else "\n❌ Keyset pages differ from skip/limit")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1_000, 10_000, 50_000, 90_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.mongo_url, args.size, args.depths, args.repeats))
@@ -0,0 +1,104 @@
+"""
+Event Loop Latency Benchmark
+Run: python -m benchmarks.bench_event_loop [--sessions 50] [--turns 20]
+                                           [--batch-size 16 --batch-wait-ms 5]   (from backend/)
+
+Simulates concurrent chat sessions going through AnalysisExecutor in each
+mode and reports per-turn latency plus event-loop lag (how late a 1 ms
+heartbeat wakes up, i.e. how long other sessions would be stalled).
+Needs spaCy's en_core_web_sm and the NLTK VADER lexicon.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.models.conversation_window import ConversationWindow
+from app.models.crisis_detector import CrisisDetector
+from app.services.analysis_executor import AnalysisExecutor, EXECUTOR_MODES
+from app.services.nlp_processor import NLPProcessor
+
+MESSAGES = [
+    "I'm feeling very anxious about my exams",
+    "I feel so depressed and worthless",
+    "Work is overwhelming me completely and my boss keeps adding pressure",
+    "I'm lonely and nobody cares about me, I can't remember the last time I talked to a friend",
+    "Had a decent day today, went for a walk in the park with my family",
+    "I can't sleep, I keep waking up at 3am thinking about everything that went wrong this week",
+]
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def heartbeat(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - started - 0.001) * 1000)
+
+
+async def session(executor: AnalysisExecutor, turns: int, latencies, rng: random.Random):
+    conversation = ConversationWindow()
+    for _ in range(turns):
+        message = rng.choice(MESSAGES)
+        started = time.perf_counter()
+        conversation.append(message)
+        crisis = await executor.detect_crisis_level(message, conversation)
+        if crisis['level'] != 'high':
+            await executor.process_message(message)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(rng.uniform(0, 0.01))
+
+
+async def run_mode(mode: str, args, crisis_detector, nlp_processor):
+    executor = AnalysisExecutor(
+        crisis_detector, nlp_processor, mode=mode, workers=args.workers,
+        batch_max_size=args.batch_size, batch_max_wait_ms=args.batch_wait_ms
+    )
+    await executor.start()
+
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+    rng = random.Random(3)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[session(executor, args.turns, latencies, rng) for _ in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await monitor
+    await executor.shutdown()
+
+    print(f"{mode:>8} | {len(latencies) / elapsed:>9.1f} | {statistics.median(latencies):>8.1f} | "
+          f"{percentile(latencies, 99):>8.1f} | {percentile(lags, 99):>13.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1, help="NLP micro-batch size (1 = no batching)")
+    parser.add_argument("--batch-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking analysis under concurrency...\n")
+    crisis_detector = CrisisDetector()
+    nlp_processor = NLPProcessor()
+
+    print(f"{'mode':>8} | {'turns/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | {'loop lag p99':>13}")
+    print("-" * 60)
+    for mode in EXECUTOR_MODES:
+        await run_mode(mode, args, crisis_detector, nlp_processor)
+
+    print("\n🎉 Benchmark completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Fuzzy Keyword Index Benchmark
+Run: python -m benchmarks.bench_fuzzy_index   (from backend/)
+
+Measures per-token lookup cost of the SymSpell index against a brute-force
+edit-distance scan, for growing lexicon sizes.
+"""
+
+import random
+import string
+import time
+
+from app.utils.fuzzy_index import SymSpellIndex, edit_distance
+
+LEXICON_SIZES = [100, 1_000, 10_000, 50_000]
+QUERIES = 2_000
+MAX_EDIT_DISTANCE = 1
+
+
+def random_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    index = rng.randrange(len(word))
+    edit = rng.choice(['delete', 'insert', 'replace'])
+    if edit == 'delete':
+        return word[:index] + word[index + 1:]
+    if edit == 'insert':
+        return word[:index] + rng.choice(string.ascii_lowercase) + word[index:]
+    return word[:index] + rng.choice(string.ascii_lowercase) + word[index + 1:]
+
+
+def brute_force(token: str, lexicon):
+    best = None
+    for term in lexicon:
+        distance = edit_distance(token, term, MAX_EDIT_DISTANCE)
+        if distance <= MAX_EDIT_DISTANCE and (best is None or distance < best[1]):
+            best = (term, distance)
+    return best
+
+
+def run_benchmark():
+    print("🔎 Benchmarking fuzzy crisis keyword lookup...\n")
+    print(f"{'lexicon':>8} | {'build (ms)':>10} | {'symspell (µs/token)':>20} | {'brute force (µs/token)':>23}")
+    print("-" * 72)
+
+    rng = random.Random(42)
+    for size in LEXICON_SIZES:
+        lexicon = list({random_word(rng) for _ in range(size)})
+        queries = [misspell(rng.choice(lexicon), rng) for _ in range(QUERIES)]
+
+        started = time.perf_counter()
+        index = SymSpellIndex(lexicon, max_edit_distance=MAX_EDIT_DISTANCE)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for token in queries:
+            index.lookup(token)
+        symspell_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        # Brute force is O(lexicon) per token, so sample fewer queries
+        sample = queries[:max(20, QUERIES * 100 // size)]
+        started = time.perf_counter()
+        for token in sample:
+            brute_force(token, lexicon)
+        brute_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        print(f"{size:>8} | {build_ms:>10.1f} | {symspell_us:>20.2f} | {brute_us:>23.2f}")
+
+    print("\n🎉 Benchmark completed!")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,118 @@
+"""
+Lexicon Index Benchmark
+Run: python -m benchmarks.bench_lexicon_index   (from backend/)
+
+Compares the compiled LexiconIndex with the original per-term substring
+loops of NLPProcessor, and checks both give identical output.
+"""
+
+import random
+import string
+import time
+
+from app.services.lexicon_index import LexiconIndex, MENTAL_HEALTH_TERMS, THERAPY_TOPICS, INTENSIFIERS
+
+MESSAGES = [
+    "I'm feeling very anxious about my exams",
+    "I feel so depressed and worthless",
+    "Work is overwhelming me completely",
+    "I'm lonely and nobody cares",
+    "My boss keeps putting pressure on me and I can't sleep",
+    "I had a really sad day, my partner and I had a break up",
+    "Everything is fine, just a bit tired after the gym",
+    "I am extremely stressed and absolutely exhausted from school homework",
+    "I feel left out by my family and friends",
+    "ok",
+]
+
+
+# Original NLPProcessor implementation, kept here as the baseline
+def legacy_extract_emotions(text, mental_health_terms=MENTAL_HEALTH_TERMS):
+    emotions_found = []
+    text_lower = text.lower()
+    for emotion_category, terms in mental_health_terms.items():
+        for term in terms:
+            if term in text_lower:
+                intensity = legacy_calculate_intensity(term, text_lower)
+                emotions_found.append({
+                    'emotion': emotion_category,
+                    'term': term,
+                    'intensity': round(intensity, 2)
+                })
+                break
+    return emotions_found[:2]
+
+
+def legacy_extract_topics(text, therapy_topics=THERAPY_TOPICS):
+    topics = []
+    text_lower = text.lower()
+    for topic, keywords in therapy_topics.items():
+        if any(kw in text_lower for kw in keywords):
+            topics.append(topic)
+    return topics
+
+
+def legacy_calculate_intensity(term, text):
+    for intensifier in INTENSIFIERS:
+        if f"{intensifier} {term}" in text or f"{intensifier} {term}s" in text:
+            return 0.9
+    return 0.5
+
+
+def build_corpus(size: int, rng: random.Random):
+    vocabulary = [word for message in MESSAGES for word in message.split()]
+    corpus = list(MESSAGES)
+    while len(corpus) < size:
+        corpus.append(' '.join(rng.choice(vocabulary) for _ in range(rng.randint(3, 30))))
+    return corpus
+
+
+def grow_lexicon(lexicon, factor: int, rng: random.Random):
+    """Pad every category with synthetic terms (placed after the real ones)"""
+    grown = {}
+    for name, terms in lexicon.items():
+        extra = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+                 for _ in range(len(terms) * (factor - 1))]
+        grown[name] = terms + extra
+    return grown
+
+
+def time_per_message(function, corpus) -> float:
+    started = time.perf_counter()
+    for message in corpus:
+        function(message)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def run_benchmark():
+    print("📚 Benchmarking lexicon extraction...\n")
+    corpus = build_corpus(5_000, random.Random(7))
+    index = LexiconIndex()
+
+    mismatches = 0
+    for message in corpus:
+        expected = (legacy_extract_emotions(message), legacy_extract_topics(message))
+        if index.analyze(message) != expected:
+            mismatches += 1
+    print(f"Output check: {len(corpus) - mismatches}/{len(corpus)} identical")
+
+    print(f"\n{'lexicon terms':>13} | {'legacy (µs/msg)':>15} | {'index (µs/msg)':>14}")
+    print("-" * 50)
+    rng = random.Random(11)
+    for factor in (1, 10, 50):
+        terms = grow_lexicon(MENTAL_HEALTH_TERMS, factor, rng)
+        topics = grow_lexicon(THERAPY_TOPICS, factor, rng)
+        grown_index = LexiconIndex(terms, topics, INTENSIFIERS)
+        size = sum(map(len, terms.values())) + sum(map(len, topics.values()))
+
+        legacy_us = time_per_message(
+            lambda message: (legacy_extract_emotions(message, terms), legacy_extract_topics(message, topics)),
+            corpus
+        )
+        index_us = time_per_message(grown_index.analyze, corpus)
+        print(f"{size:>13} | {legacy_us:>15.2f} | {index_us:>14.2f}")
+    print("\n🎉 Benchmark completed!" if not mismatches else "\n❌ Output differs from legacy implementation")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,155 @@
+"""
+Mood Summary Benchmark
+Run: python -m benchmarks.bench_mood_summary [--sizes 10000 100000] [--mongo-url mongodb://localhost:27017]
+     (from backend/)
+
+Seeds a scratch database with N chat messages for one user (realistic
+message/response payloads, spread over the summary window), then times the
+original find() + Python tally (with its 500-document cap, and uncapped for
+reference) against the aggregation pipeline used by /api/mood-summary, and
+checks the pipeline matches the uncapped tally. Needs a running MongoDB; the
+scratch database is dropped afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.database.indexes import INDEXES, apply_indexes
+from app.routes.chatbot import mood_summary_pipeline, summarize_mood
+
+USER_ID = "bench_user"
+DAYS = 90
+EMOTIONS = ["depression", "anxiety", "stress", "anger", "loneliness"]
+
+
+# Original get_mood_summary body, kept here as the baseline
+async def legacy_mood_summary(collection, user_id, start_date, cap):
+    messages = await collection.find({
+        "userId": user_id,
+        "timestamp": {"$gte": start_date}
+    }).to_list(cap)
+
+    emotion_counts = {}
+    sentiment_scores = []
+    daily_sentiment = {}
+    for msg in messages:
+        for emotion in msg.get('emotionDetected', []):
+            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        compound = msg.get('sentiment', {}).get('compound', 0)
+        sentiment_scores.append(compound)
+        date_key = msg['timestamp'].strftime("%Y-%m-%d")
+        if date_key not in daily_sentiment:
+            daily_sentiment[date_key] = {"scores": [], "count": 0}
+        daily_sentiment[date_key]["scores"].append(compound)
+        daily_sentiment[date_key]["count"] += 1
+
+    avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+    top_emotions = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+    return {
+        "total_messages": len(messages),
+        "emotion_distribution": emotion_counts,
+        "top_emotions": [{"emotion": e, "count": c} for e, c in top_emotions],
+        "average_sentiment": round(avg_sentiment, 3),
+        "sentiment_trend": {
+            date: {"average": sum(data["scores"]) / len(data["scores"]), "count": data["count"]}
+            for date, data in sorted(daily_sentiment.items())
+        }
+    }
+
+
+async def aggregated_mood_summary(collection, user_id, start_date):
+    results = await collection.aggregate(mood_summary_pipeline(user_id, start_date)).to_list(1)
+    return summarize_mood(results[0] if results else {"daily": [], "emotions": []})
+
+
+def same_summary(expected, actual) -> bool:
+    """Equal counts; sentiment equal up to float summation order"""
+    if (expected["total_messages"], expected["emotion_distribution"]) != \
+            (actual["total_messages"], actual["emotion_distribution"]):
+        return False
+    if {e["count"] for e in expected["top_emotions"]} != {e["count"] for e in actual["top_emotions"]}:
+        return False
+    if abs(expected["average_sentiment"] - actual["average_sentiment"]) > 0.001:
+        return False
+    if expected["sentiment_trend"].keys() != actual["sentiment_trend"].keys():
+        return False
+    return all(
+        expected["sentiment_trend"][day]["count"] == actual["sentiment_trend"][day]["count"]
+        and abs(expected["sentiment_trend"][day]["average"] - actual["sentiment_trend"][day]["average"]) < 1e-9
+        for day in expected["sentiment_trend"]
+    )
+
+
+async def seed(collection, size: int, rng: random.Random):
+    await collection.delete_many({})
+    now = datetime.now()
+    batch = []
+    for i in range(size):
+        batch.append({
+            "userId": USER_ID,
+            "sessionId": f"{USER_ID}_{i // 20}",
+            "userMessage": "I have been feeling a lot of things lately " * rng.randint(1, 8),
+            "botResponse": "I hear you're feeling that right now. Tell me more about it. " * rng.randint(2, 6),
+            "sentiment": {"compound": round(rng.uniform(-1, 1), 3), "positive": 0.1, "negative": 0.2, "neutral": 0.7},
+            "emotionDetected": rng.sample(EMOTIONS, rng.randint(0, 2)),
+            "crisisLevel": "low",
+            "crisisConfidence": 0.1,
+            "timestamp": now - timedelta(seconds=rng.uniform(0, DAYS * 86400))
+        })
+        if len(batch) == 5000:
+            await collection.insert_many(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch)
+
+
+async def timed(coroutine_factory, repeats: int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = await coroutine_factory()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+async def run_benchmark(mongo_url: str, sizes, repeats: int):
+    print("📊 Benchmarking /api/mood-summary...\n")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client["emoheal_bench_mood_summary"]
+    collection = db.chatbot_history
+    rng = random.Random(7)
+    failures = 0
+    try:
+        await apply_indexes(db, [spec for spec in INDEXES if spec.collection == "chatbot_history"])
+        print(f"{'messages':>9} | {'legacy cap 500 (ms)':>19} | {'legacy full (ms)':>16} | {'aggregation (ms)':>16} | exact")
+        print("-" * 80)
+        for size in sizes:
+            await seed(collection, size, rng)
+            start_date = datetime.now() - timedelta(days=DAYS)
+
+            capped_ms, capped = await timed(lambda: legacy_mood_summary(collection, USER_ID, start_date, 500), repeats)
+            full_ms, full = await timed(lambda: legacy_mood_summary(collection, USER_ID, start_date, None), repeats)
+            agg_ms, aggregated = await timed(lambda: aggregated_mood_summary(collection, USER_ID, start_date), repeats)
+
+            exact = same_summary(full, aggregated)
+            failures += not exact
+            print(f"{size:>9} | {capped_ms:>19.1f} | {full_ms:>16.1f} | {agg_ms:>16.1f} | "
+                  f"{'yes' if exact else 'NO'} (capped saw {capped['total_messages']})")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+    print("\n🎉 Benchmark completed!" if not failures else "\n❌ Aggregation differs from the full tally")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.mongo_url, args.sizes, args.repeats))
@@ -0,0 +1,113 @@
+"""
+NLP Profile Benchmark
+Run: python -m benchmarks.bench_nlp_profiles [--messages 2000]   (from backend/)
+
+Loads NLPProcessor once per analysis profile, each in a fresh subprocess so
+memory numbers don't bleed into each other, and reports load time,
+throughput (single + batched) and resident memory.
+Needs spaCy's en_core_web_sm and the NLTK VADER lexicon.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+MESSAGES = [
+    "I'm feeling very anxious about my exams next week at Stanford",
+    "I feel so depressed and worthless since I moved to London",
+    "Work is overwhelming me completely, my boss John keeps adding pressure",
+    "I'm lonely and nobody cares",
+    "Had a good talk with my sister on Sunday",
+]
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def missing_nlp_prerequisites() -> list:
+    """What NLPProcessor needs but this environment lacks (checked before any run)"""
+    import nltk
+    import spacy
+    from app.services.nlp_processor import SPACY_MODEL
+
+    missing = []
+    if not spacy.util.is_package(SPACY_MODEL):
+        missing.append(f"spaCy model {SPACY_MODEL} (python -m spacy download {SPACY_MODEL})")
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+    except LookupError:
+        missing.append("NLTK VADER lexicon (python -m nltk.downloader vader_lexicon)")
+    return missing
+
+
+def measure(profile: str, messages: int) -> dict:
+    """Runs inside the child process"""
+    started = time.perf_counter()
+    from app.services.nlp_processor import NLPProcessor
+    processor = NLPProcessor(profile=profile)
+    load_seconds = time.perf_counter() - started
+
+    corpus = [MESSAGES[i % len(MESSAGES)] for i in range(messages)]
+
+    started = time.perf_counter()
+    for message in corpus:
+        processor.process_message(message)
+    single_rate = messages / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    processor.process_batch(corpus)
+    batch_rate = messages / (time.perf_counter() - started)
+
+    return {
+        "profile": profile,
+        "pipeline": processor.nlp.pipe_names,
+        "load_s": load_seconds,
+        "single_per_s": single_rate,
+        "batch_per_s": batch_rate,
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_benchmark(messages: int):
+    from app.services.nlp_processor import ANALYSIS_PROFILES
+
+    missing = missing_nlp_prerequisites()
+    if missing:
+        for item in missing:
+            print(f"❌ Missing {item}")
+        return 1
+
+    print("🧪 Benchmarking NLP analysis profiles...\n")
+    print(f"{'profile':>14} | {'load s':>6} | {'msg/s':>8} | {'pipe msg/s':>10} | {'RSS MB':>7} | {'peak MB':>7} | pipeline")
+    print("-" * 90)
+    for profile in ANALYSIS_PROFILES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_nlp_profiles", "--child", profile, "--messages", str(messages)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['profile']:>14} | {result['load_s']:>6.2f} | {result['single_per_s']:>8.0f} | "
+              f"{result['batch_per_s']:>10.0f} | {result['rss_mb']:>7.1f} | {result['peak_rss_mb']:>7.1f} | "
+              f"{','.join(result['pipeline']) or '(tokenizer)'}")
+
+    print("\n🎉 Benchmark completed!")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.messages)))
+    else:
+        sys.exit(run_benchmark(args.messages))
@@ -0,0 +1,144 @@
+"""
+Pre-fork Memory Benchmark
+Run: python -m benchmarks.bench_prefork_memory [--workers 4]   (from backend/)
+
+Starts the backend twice and reports memory per worker once /ready is 200:
+  naive    N independent uvicorn processes, each loading its own models
+  prefork  python -m app.prefork --workers N (models loaded once, shared COW)
+
+RSS counts shared pages in every process, so the numbers that matter are
+PSS (proportional share) and USS (private pages), read from
+/proc/<pid>/smaps_rollup. Needs MongoDB (MONGODB_URI), en_core_web_sm and
+the NLTK VADER lexicon, same as the server itself.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .bench_nlp_profiles import missing_nlp_prerequisites
+
+BASE_PORT = 8600
+
+
+def mongo_reachable() -> bool:
+    from pymongo import MongoClient
+    from app.database.db import MONGO_URL
+
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0].rstrip(":")] = int(parts[1])
+    values["Uss"] = values.pop("Private_Clean", 0) + values.pop("Private_Dirty", 0)
+    return values
+
+
+def children(pid: int):
+    with open(f"/proc/{pid}/task/{pid}/children") as listing:
+        return [int(child) for child in listing.read().split()]
+
+
+def wait_ready(port: int, timeout: float = 180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"backend on port {port} never became ready")
+
+
+def report(label: str, pids):
+    rows = [memory_kb(pid) for pid in pids]
+    print(f"{label:>8} | {len(rows):>7} | "
+          f"{sum(r['Rss'] for r in rows) / len(rows) / 1024:>12.1f} | "
+          f"{sum(r['Pss'] for r in rows) / len(rows) / 1024:>12.1f} | "
+          f"{sum(r['Uss'] for r in rows) / len(rows) / 1024:>12.1f} | "
+          f"{sum(r['Pss'] for r in rows) / 1024:>10.1f}")
+
+
+def stop(processes):
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+    for process in processes:
+        process.wait(timeout=30)
+
+
+def run_naive(workers: int):
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(BASE_PORT + i)],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for i in range(workers)
+    ]
+    try:
+        for i in range(workers):
+            wait_ready(BASE_PORT + i)
+        report("naive", [process.pid for process in processes])
+    finally:
+        stop(processes)
+
+
+def run_prefork(workers: int):
+    master = subprocess.Popen([sys.executable, "-m", "app.prefork", "--workers", str(workers),
+                               "--port", str(BASE_PORT)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(BASE_PORT)
+        time.sleep(2)   # let every worker finish its lifespan startup
+        report("prefork", children(master.pid))
+        master_kb = memory_kb(master.pid)
+        print(f"{'(master)':>8} | {1:>7} | {master_kb['Rss'] / 1024:>12.1f} | "
+              f"{master_kb['Pss'] / 1024:>12.1f} | {master_kb['Uss'] / 1024:>12.1f} |")
+    finally:
+        stop([master])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("❌ /proc/<pid>/smaps_rollup is required (Linux 4.14+)")
+        return 1
+
+    # Without these the servers never report ready and every run ends in a timeout
+    missing = missing_nlp_prerequisites()
+    if not mongo_reachable():
+        missing.append("MongoDB (set MONGODB_URI)")
+    if missing:
+        for item in missing:
+            print(f"❌ Missing {item}")
+        return 1
+
+    print(f"🧠 Memory per worker with {args.workers} workers...\n")
+    print(f"{'mode':>8} | {'workers':>7} | {'RSS MB/wkr':>12} | {'PSS MB/wkr':>12} | {'USS MB/wkr':>12} | {'PSS total':>10}")
+    print("-" * 78)
+    run_naive(args.workers)
+    run_prefork(args.workers)
+    print("\n🎉 Benchmark completed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Response Generator Benchmark
+Run: python -m benchmarks.bench_response_generator   (from backend/)
+
+Compares the compiled response table with the original nested-dict walk
+of TherapeuticResponseGenerator. Both use the same seeded RNG, so their
+output is checked for equality turn by turn.
+"""
+
+import random
+import time
+
+from app.services.lexicon_index import MENTAL_HEALTH_TERMS, THERAPY_TOPICS
+from app.services.response_generator import TherapeuticResponseGenerator
+
+SEED = 42
+
+# Shape of data/therapeutic_responses.json
+RESPONSES = {
+    "crisis_intervention": {
+        "immediate_support": "Your safety matters most. Please call 988 right now.",
+        "high_risk_keywords": "It sounds really hard. I'm here with you."
+    },
+    "cognitive_behavioral_therapy": {
+        "depression": "Let's look at the thoughts behind that feeling.",
+        "stress": "What is one small step that would ease the pressure?",
+        "work": "Which part of work weighs on you the most?",
+        "general": "Can we examine that thought together?"
+    },
+    "dialectical_behavior_therapy": {
+        "anxiety": "Let's try a grounding exercise: name five things you can see.",
+        "sleep": "Racing thoughts at night are exhausting. What helps you settle?",
+        "general": "Both things can be true at once."
+    },
+    "empathetic_reflection": {
+        "loneliness": "Feeling alone is painful. I'm glad you reached out.",
+        "anger": "That sounds really frustrating.",
+        "relationships": "Relationships can be complicated. What happened?",
+        "school": "School pressure can pile up quickly.",
+        "general": "Tell me more about how you're feeling."
+    }
+}
+
+
+# Original TherapeuticResponseGenerator implementation, kept here as the baseline
+class LegacyResponseGenerator:
+    def __init__(self, responses, rng):
+        self.responses = responses
+        self.rng = rng
+
+    def generate_response(self, nlp_analysis, crisis_level, conversation_history):
+        if crisis_level == 'high':
+            return self.responses['crisis_intervention'].get('immediate_support', 'Please reach out for help immediately.')
+        if crisis_level == 'medium':
+            return self.responses['crisis_intervention'].get('high_risk_keywords', "I want to help you through this difficult time.")
+        therapy_type = self._select_therapy_type(nlp_analysis)
+        response_template = self._get_response_template(therapy_type, nlp_analysis)
+        return self._personalize_response(response_template, nlp_analysis, conversation_history)
+
+    def _select_therapy_type(self, nlp_analysis):
+        sentiment = nlp_analysis.get('sentiment', {})
+        emotions = nlp_analysis.get('emotions', [])
+        if sentiment.get('negative', 0) > 0.5 and sentiment.get('compound', 0) < -0.3:
+            return 'cognitive_behavioral_therapy'
+        if any(e['emotion'] == 'anxiety' for e in emotions):
+            return 'dialectical_behavior_therapy'
+        return 'empathetic_reflection'
+
+    def _get_response_template(self, therapy_type, nlp_analysis):
+        responses = self.responses.get(therapy_type, self.responses.get('empathetic_reflection', {}))
+        emotions = nlp_analysis.get('emotions', [])
+        if emotions:
+            primary_emotion = emotions[0]['emotion']
+            if primary_emotion in responses:
+                return responses[primary_emotion]
+        for topic in nlp_analysis.get('topics', []):
+            if topic in responses:
+                return responses[topic]
+        return responses.get('general', 'Tell me more about how you\'re feeling.')
+
+    def _personalize_response(self, template, nlp_analysis, history):
+        response = template
+        emotions = nlp_analysis.get('emotions', [])
+        if emotions:
+            response = f"I hear you're feeling {emotions[0]['emotion']} right now. " + response
+        if history and len(history) > 1:
+            last_user_msg = history[-2].get('message', '')[:50] + "..."
+            reflection = self.rng.choice([
+                f"Building on what you said about '{last_user_msg}'",
+                f"Regarding your earlier mention of {last_user_msg}",
+                ""
+            ])
+            if reflection:
+                response = reflection + " " + response
+        return response
+
+
+def build_turns(size: int, rng: random.Random):
+    """Synthetic (analysis, crisis level, history) turns covering every branch"""
+    emotions, topics = list(MENTAL_HEALTH_TERMS), list(THERAPY_TOPICS)
+    turns = []
+    for i in range(size):
+        analysis = {
+            'sentiment': {'negative': rng.random(), 'compound': rng.uniform(-1, 1)},
+            'emotions': [{'emotion': e} for e in rng.sample(emotions, rng.randint(0, 2))],
+            'topics': sorted(rng.sample(topics, rng.randint(0, 3)), key=topics.index)
+        }
+        level = rng.choices(['low', 'medium', 'high'], [0.9, 0.07, 0.03])[0]
+        history = [{'message': f"message {j} " * rng.randint(1, 10)} for j in range(rng.randint(0, 20))]
+        turns.append((analysis, level, history))
+    return turns
+
+
+def time_per_turn(generator, turns) -> float:
+    started = time.perf_counter()
+    for analysis, level, history in turns:
+        generator.generate_response(analysis, level, history)
+    return (time.perf_counter() - started) / len(turns) * 1e6
+
+
+def run_benchmark():
+    print("💬 Benchmarking response generation...\n")
+    turns = build_turns(20_000, random.Random(7))
+
+    legacy = LegacyResponseGenerator(RESPONSES, random.Random(SEED))
+    compiled = TherapeuticResponseGenerator(RESPONSES, seed=SEED)
+    mismatches = sum(
+        legacy.generate_response(*turn) != compiled.generate_response(*turn) for turn in turns
+    )
+    print(f"Output check: {len(turns) - mismatches}/{len(turns)} identical (seed {SEED})")
+
+    legacy_us = time_per_turn(LegacyResponseGenerator(RESPONSES, random.Random(SEED)), turns)
+    compiled_us = time_per_turn(TherapeuticResponseGenerator(RESPONSES, seed=SEED), turns)
+    print(f"legacy:   {legacy_us:.2f} µs/turn")
+    print(f"compiled: {compiled_us:.2f} µs/turn ({legacy_us / compiled_us:.1f}x)")
+    print("\n🎉 Benchmark completed!" if not mismatches else "\n❌ Output differs from legacy implementation")
+
+
+if __name__ == "__main__":
+    run_benchmark()
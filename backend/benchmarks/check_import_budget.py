@@ -0,0 +1,83 @@
+"""
+Import-Time Budget Check
+Run: python -m benchmarks.check_import_budget [--budget-ms 1500] [--runs 5]   (from backend/)
+
+Imports `app.main` in fresh interpreters and fails (exit code 1) when the
+median cold import exceeds the budget, or when a model library that the
+service registry is supposed to load lazily gets imported eagerly.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+MODULE = "app.main"
+
+# Must not be pulled in by `import app.main`
+LAZY_MODULES = ["spacy", "nltk", "sklearn", "numpy", "torch", "transformers", "textblob"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def cold_import(module: str):
+    """Wall time (ms) and -X importtime records of one fresh import"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(cumulative_us), len(indent)))
+    return elapsed_ms, records
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"⏱️  Checking cold import of {MODULE} (budget {args.budget_ms:.0f} ms)...\n")
+    timings = []
+    records = []
+    for _ in range(args.runs):
+        elapsed_ms, records = cold_import(MODULE)
+        timings.append(elapsed_ms)
+
+    median_ms = statistics.median(timings)
+    top_level = sorted((r for r in records if r[2] <= 3), key=lambda r: r[1], reverse=True)[:10]
+    print("Slowest top-level imports (cumulative):")
+    for name, cumulative_us, _ in top_level:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    imported = {name.split(".")[0] for name, _, _ in records}
+    eager = [name for name in LAZY_MODULES if name in imported]
+
+    print(f"\nMedian cold import: {median_ms:.0f} ms over {args.runs} runs")
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"❌ Over budget by {median_ms - args.budget_ms:.0f} ms")
+        failed = True
+    if eager:
+        print(f"❌ Model libraries imported eagerly: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""
+WebSocket Chat Load Test
+Run: python -m benchmarks.load_ws_chat [--clients 50] [--rate 0.5] [--duration 30]
+                                       [--protocol legacy|staged] [--corpus FILE]
+                                       [--json results.json] [--baseline baseline.json]
+                                       [--max-p95-ms 250] [--min-throughput 20]   (from backend/)
+
+Starts the app in a child process (uvicorn on a free local port) backed by
+an in-memory Mongo stand-in (benchmarks.memory_mongo), or a real MongoDB
+with --mongo-url (scratch database, dropped afterwards), or targets an
+already running server with --url. Then opens --clients concurrent
+WebSocket sessions on /ws/chat/{user_id}; each replays the corpus from a
+random line.
+
+- --rate R: each client sends Poisson arrivals at R messages/s (open loop,
+  so latency includes queueing when the server falls behind)
+- --rate 0: each client sends its next message as soon as the previous
+  answer arrives (closed loop, measures capacity)
+
+Turn latency is send -> final frame (bot_response / crisis_alert, or the
+frame with "final" on the staged protocol, which also reports the first
+frame). Reports throughput, p50/p95/p99/max and server-side write errors.
+
+Release gate: --max-p95-ms / --max-p99-ms / --min-throughput /
+--max-error-rate, and --baseline (a --json file from an earlier run) with
+--tolerance. Exit status 1 when any check fails. A server whose crisis
+detector never loaded always fails the gate, --allow-degraded or not: its
+turns skip the safety path, so their latency says nothing about a release.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CORPUS_PATH = Path(__file__).resolve().parent / "chat_corpus.txt"
+SCRATCH_DB = "emoheal_load_test"
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def load_corpus(path) -> List[str]:
+    with open(path, 'r') as f:
+        messages = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not messages:
+        raise SystemExit(f"❌ No messages in {path}")
+    return messages
+
+
+# ============================================
+# SERVER UNDER TEST
+# ============================================
+
+def serve(port: int, mongo_url: Optional[str], mongo_latency_ms: float):
+    """Child process: the app on 127.0.0.1:port, Mongo replaced by the stand-in unless mongo_url"""
+    os.environ.setdefault("INDEX_PLAN_CHECK", "off" if mongo_url is None else "warn")
+    os.environ["DB_NAME"] = SCRATCH_DB
+    if mongo_url is not None:
+        os.environ["MONGODB_URI"] = mongo_url
+
+    import uvicorn
+    from app.database import db
+
+    if mongo_url is None:
+        from benchmarks.memory_mongo import MemoryClient
+        MemoryClient.latency = mongo_latency_ms / 1000
+        db.AsyncIOMotorClient = MemoryClient
+
+    from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url: str, timeout: float = 5.0):
+    """(status, body) of a GET; (None, None) while nothing listens"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, None
+
+
+def wait_ready(base_url: str, server: Optional[subprocess.Popen], timeout: float) -> Dict:
+    """Poll /ready until every service is loaded (or the timeout); returns the last readiness"""
+    deadline = time.monotonic() + timeout
+    readiness = {"ready": False}
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"❌ Server exited during startup (status {server.returncode})")
+        status, body = get_json(f"{base_url}/ready")
+        if status is not None:
+            readiness = body
+            if status == 200:
+                break
+        time.sleep(0.5)
+    return readiness
+
+
+# ============================================
+# CLIENTS
+# ============================================
+
+class Results:
+    def __init__(self, window_start: float, window_end: float):
+        # Throughput counts turns answered inside [window_start, window_end] (after ramp-up)
+        self.window_start = window_start
+        self.window_end = window_end
+        self.window_completed = 0
+        self.latencies: List[float] = []
+        self.first_frame: List[float] = []
+        self.connect_ms: List[float] = []
+        self.sent = 0
+        self.completed = 0
+        self.crisis_turns = 0
+        self.timed_out = 0
+        self.connect_errors = 0
+        self.session_errors = 0
+
+
+async def client(index: int, args, corpus: List[str], ws_url: str, started: float, results: Results):
+    import websockets
+
+    rng = random.Random(args.seed + index)
+    await asyncio.sleep(args.ramp * index / max(1, args.clients))
+    deadline = started + args.ramp + args.duration
+    user_id = f"load_{args.seed}_{index}"
+    query = "?protocol=staged" if args.protocol == "staged" else ""
+
+    connect_started = time.perf_counter()
+    try:
+        websocket = await websockets.connect(f"{ws_url}/ws/chat/{user_id}{query}", max_size=None, open_timeout=30)
+        await websocket.recv()   # welcome message
+    except Exception as e:
+        results.connect_errors += 1
+        print(f"⚠️ Client {index} could not connect: {e}")
+        return
+    results.connect_ms.append((time.perf_counter() - connect_started) * 1000)
+
+    # Send times of unanswered turns: FIFO on the legacy protocol, by id on staged
+    pending: "deque[float]" = deque()
+    staged: Dict[int, List[float]] = {}
+    answered = asyncio.Event()
+
+    async def receive():
+        async for raw in websocket:
+            frame = json.loads(raw)
+            now = time.perf_counter()
+            if args.protocol == "staged":
+                turn = staged.get(frame.get("message_id"))
+                if turn is None:
+                    continue
+                if len(turn) == 1:
+                    results.first_frame.append((now - turn[0]) * 1000)
+                    turn.append(now)
+                if not frame.get("final"):
+                    continue
+                del staged[frame["message_id"]]
+                sent_at = turn[0]
+                crisis = frame.get("type") == "crisis"
+            else:
+                if frame.get("type") not in ("bot_response", "crisis_alert") or not pending:
+                    continue
+                sent_at = pending.popleft()
+                crisis = frame["type"] == "crisis_alert"
+            results.latencies.append((now - sent_at) * 1000)
+            results.completed += 1
+            results.window_completed += results.window_start <= now <= results.window_end
+            results.crisis_turns += crisis
+            answered.set()
+
+    receiver = asyncio.create_task(receive())
+    position = rng.randrange(len(corpus))
+    turn_id = 0
+    try:
+        while time.perf_counter() < deadline and not receiver.done():
+            turn_id += 1
+            message = corpus[position % len(corpus)]
+            position += 1
+            answered.clear()
+            if args.protocol == "staged":
+                staged[turn_id] = [time.perf_counter()]
+            else:
+                pending.append(time.perf_counter())
+            await websocket.send(json.dumps({"message": message, "id": turn_id}))
+            results.sent += 1
+
+            if args.rate > 0:
+                await asyncio.sleep(rng.expovariate(args.rate))
+                # Don't let a stalled server pile up an unbounded backlog
+                while len(pending) + len(staged) >= args.max_inflight and not receiver.done():
+                    answered.clear()
+                    await asyncio.wait([receiver, asyncio.ensure_future(answered.wait())],
+                                       timeout=1, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                waiter = asyncio.ensure_future(answered.wait())
+                done, _ = await asyncio.wait([receiver, waiter], timeout=args.turn_timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if not done:
+                    break
+
+        # Give outstanding turns a chance to finish
+        drain_deadline = time.perf_counter() + args.turn_timeout
+        while (pending or staged) and time.perf_counter() < drain_deadline and not receiver.done():
+            await asyncio.sleep(0.05)
+    except Exception as e:
+        results.session_errors += 1
+        print(f"⚠️ Client {index} failed: {e}")
+    finally:
+        results.timed_out += len(pending) + len(staged)
+        if receiver.done() and receiver.exception() is not None:
+            results.session_errors += 1
+            print(f"⚠️ Client {index} connection failed: {receiver.exception()}")
+        receiver.cancel()
+        await websocket.close()
+
+
+# ============================================
+# REPORT & GATE
+# ============================================
+
+def summarize(results: Results, args, server_health: Optional[Dict]) -> Dict:
+    latencies = results.latencies or [0.0]
+    write_buffer = (server_health or {}).get("write_buffer", {})
+    errors = results.timed_out + results.session_errors + results.connect_errors
+    return {
+        "config": {
+            "clients": args.clients, "rate": args.rate, "duration": args.duration,
+            "protocol": args.protocol, "corpus": str(args.corpus),
+            "mongo": args.mongo_url or ("external" if args.url else f"memory ({args.mongo_latency_ms} ms)")
+        },
+        "connected": len(results.connect_ms),
+        "sent": results.sent,
+        "completed": results.completed,
+        "crisis_turns": results.crisis_turns,
+        "errors": errors,
+        "error_rate": round(errors / max(1, results.sent + results.connect_errors), 4),
+        "throughput": round(results.window_completed / args.duration, 2) if args.duration > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2)
+        },
+        "first_frame_ms": {
+            "p50": round(percentile(results.first_frame, 50), 2),
+            "p95": round(percentile(results.first_frame, 95), 2),
+            "p99": round(percentile(results.first_frame, 99), 2)
+        } if results.first_frame else None,
+        "connect_ms_p50": round(percentile(results.connect_ms, 50), 2) if results.connect_ms else None,
+        "server_write_errors": write_buffer.get("write_errors", 0) + write_buffer.get("dropped", 0),
+        "server_documents_written": write_buffer.get("documents_written")
+    }
+
+
+def degraded_services(readiness: Dict) -> List[str]:
+    """Services /ready did not report as loaded"""
+    return sorted(name for name, entry in readiness.get("services", {}).items() if entry.get("state") != "ready")
+
+
+def gate(summary: Dict, args) -> List[str]:
+    """Every failed release check, as text"""
+    failures = []
+    latency = summary["latency_ms"]
+    if "crisis_detector" in degraded_services(summary.get("readiness", {})):
+        failures.append("crisis detector not ready (turns skipped crisis detection)")
+    if summary["completed"] == 0:
+        failures.append("no turns completed")
+    if args.max_p95_ms is not None and latency["p95"] > args.max_p95_ms:
+        failures.append(f"p95 {latency['p95']} ms > {args.max_p95_ms} ms")
+    if args.max_p99_ms is not None and latency["p99"] > args.max_p99_ms:
+        failures.append(f"p99 {latency['p99']} ms > {args.max_p99_ms} ms")
+    if args.min_throughput is not None and summary["throughput"] < args.min_throughput:
+        failures.append(f"throughput {summary['throughput']}/s < {args.min_throughput}/s")
+    if summary["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {summary['error_rate']} > {args.max_error_rate}")
+    if summary["server_write_errors"]:
+        failures.append(f"server failed to store {summary['server_write_errors']} documents")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        slower = 1 + args.tolerance
+        for name in ("p95", "p99"):
+            limit = baseline["latency_ms"][name] * slower
+            if latency[name] > limit:
+                failures.append(f"{name} {latency[name]} ms regressed past baseline {baseline['latency_ms'][name]} ms "
+                                f"(+{args.tolerance:.0%})")
+        if summary["throughput"] < baseline["throughput"] * (1 - args.tolerance):
+            failures.append(f"throughput {summary['throughput']}/s regressed past baseline "
+                            f"{baseline['throughput']}/s (-{args.tolerance:.0%})")
+    return failures
+
+
+def print_report(summary: Dict, readiness: Dict):
+    config, latency = summary["config"], summary["latency_ms"]
+    load = f"{config['rate']} msg/s each (open loop)" if config["rate"] > 0 else "closed loop"
+    print(f"📊 /ws/chat load test: {config['clients']} clients, {load}, {config['protocol']} protocol, "
+          f"{config['duration']}s, mongo: {config['mongo']}\n")
+    if not readiness.get("ready"):
+        print(f"⚠️ Server not fully ready, results cover the degraded path: {readiness}\n")
+    print(f"clients connected : {summary['connected']}/{config['clients']} (connect p50 {summary['connect_ms_p50']} ms)")
+    print(f"turns             : sent {summary['sent']}, completed {summary['completed']} "
+          f"({summary['crisis_turns']} crisis), errors/timeouts {summary['errors']}")
+    print(f"throughput        : {summary['throughput']} turns/s")
+    print(f"turn latency (ms) : p50 {latency['p50']} | p95 {latency['p95']} | p99 {latency['p99']} | max {latency['max']}")
+    if summary["first_frame_ms"]:
+        first = summary["first_frame_ms"]
+        print(f"first frame (ms)  : p50 {first['p50']} | p95 {first['p95']} | p99 {first['p99']}")
+    print(f"server writes     : {summary['server_documents_written']} stored, "
+          f"{summary['server_write_errors']} failed")
+
+
+# ============================================
+# MAIN
+# ============================================
+
+async def run_clients(args, corpus: List[str], ws_url: str) -> Results:
+    started = time.perf_counter()
+    results = Results(started + args.ramp, started + args.ramp + args.duration)
+    await asyncio.gather(*[client(i, args, corpus, ws_url, started, results) for i in range(args.clients)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0.5, help="messages/s per client (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after ramp-up")
+    parser.add_argument("--ramp", type=float, default=2, help="seconds over which clients connect")
+    parser.add_argument("--protocol", choices=["legacy", "staged"], default="legacy")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH), help="one message per line")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-inflight", type=int, default=32, help="unanswered turns per client (open loop)")
+    parser.add_argument("--turn-timeout", type=float, default=30)
+    parser.add_argument("--url", default=None, help="test a running server (http://host:port) instead")
+    parser.add_argument("--mongo-url", default=None, help="real MongoDB for the spawned server (default: in-memory)")
+    parser.add_argument("--mongo-latency-ms", type=float, default=1.0, help="per command, in-memory stand-in")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--allow-degraded", action="store_true",
+                        help="run even if /ready never reports every service loaded")
+    parser.add_argument("--json", default=None, help="write the results here (usable as --baseline)")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression vs --baseline")
+    parser.add_argument("--max-p95-ms", type=float, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--min-throughput", type=float, default=None)
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--serve-port", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_port is not None:
+        serve(args.serve_port, args.mongo_url, args.mongo_latency_ms)
+        return 0
+
+    corpus = load_corpus(args.corpus)
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        command = [sys.executable, "-m", "benchmarks.load_ws_chat", "--serve-port", str(port),
+                   "--mongo-latency-ms", str(args.mongo_latency_ms)]
+        if args.mongo_url:
+            command += ["--mongo-url", args.mongo_url]
+        server = subprocess.Popen(command, cwd=Path(__file__).resolve().parents[1])
+
+    try:
+        print(f"⏳ Waiting for {base_url}/ready...")
+        readiness = wait_ready(base_url, server, args.startup_timeout)
+        if not readiness.get("ready") and not args.allow_degraded:
+            print(f"❌ Server not ready after {args.startup_timeout}s (use --allow-degraded to test anyway): {readiness}")
+            return 1
+
+        ws_url = "ws" + base_url[len("http"):]
+        results = asyncio.run(run_clients(args, corpus, ws_url))
+        _, health = get_json(f"{base_url}/health")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if args.mongo_url and not args.url:
+            from pymongo import MongoClient
+            with MongoClient(args.mongo_url) as mongo:
+                mongo.drop_database(SCRATCH_DB)
+
+    summary = summarize(results, args, health)
+    summary["readiness"] = readiness
+    print()
+    print_report(summary, readiness)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    failures = gate(summary, args)
+    if failures:
+        print("\n❌ Load test failed: " + "; ".join(failures))
+        return 1
+    degraded = degraded_services(readiness)
+    if degraded:
+        print(f"\n⚠️ Load test passed on the degraded path only ({', '.join(degraded)} not loaded)")
+        return 0
+    print("\n🎉 Load test passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
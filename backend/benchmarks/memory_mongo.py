@@ -0,0 +1,188 @@
+"""
+In-memory Mongo Stand-in
+Just enough of Motor's API for the chat write path, for offline load tests
+
+Covers what a WebSocket turn touches: ping, index management, insert_many
+(from the write-behind buffer) and bulk_write of UpdateOne / ReplaceOne /
+InsertOne with equality filters and $set / $inc / $max (the rollup and
+user_stats listeners), plus equality find_one / count_documents. Every
+command can wait a fixed latency to stand in for the network round trip.
+It does not plan queries; run the app with INDEX_PLAN_CHECK=off.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+DUPLICATE_KEY = 11000
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+
+def _matches(document: Dict, query: Dict) -> bool:
+    return all(_get(document, field) == value for field, value in query.items())
+
+
+def _get(document: Dict, path: str):
+    for part in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(part)
+    return document
+
+
+def _set(document: Dict, path: str, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[last] = value
+
+
+def _apply_update(document: Dict, update: Dict):
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            current = _get(document, path)
+            if operator == "$set":
+                _set(document, path, value)
+            elif operator == "$inc":
+                _set(document, path, (current or 0) + value)
+            elif operator == "$max":
+                if current is None or value > current:
+                    _set(document, path, value)
+            else:
+                raise NotImplementedError(f"Update operator {operator} is not supported by the stand-in")
+
+
+class MemoryCollection:
+    def __init__(self, name: str, client: "MemoryClient"):
+        self.name = name
+        self.client = client
+        self.documents: Dict[object, Dict] = {}
+        self.indexes: Dict[str, Dict] = {"_id_": {"key": [("_id", 1)]}}
+
+    async def _command(self, name: str):
+        self.client.commands[name] += 1
+        if self.client.latency > 0:
+            await asyncio.sleep(self.client.latency)
+
+    def _insert(self, document: Dict):
+        document.setdefault("_id", ObjectId())
+        if document["_id"] in self.documents:
+            return {"code": DUPLICATE_KEY, "errmsg": f"E11000 duplicate key in {self.name}"}
+        self.documents[document["_id"]] = dict(document)
+        return None
+
+    def _find(self, query: Dict) -> Optional[Dict]:
+        return next((document for document in self.documents.values() if _matches(document, query)), None)
+
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        await self._command("insert")
+        errors = []
+        for index, document in enumerate(documents):
+            error = self._insert(document)
+            if error:
+                errors.append({**error, "index": index})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+
+    async def bulk_write(self, requests: List, ordered: bool = True):
+        await self._command("bulkWrite")
+        for request in requests:
+            if isinstance(request, InsertOne):
+                self._insert(dict(request._doc))
+                continue
+            if not isinstance(request, (UpdateOne, ReplaceOne)):
+                raise NotImplementedError(f"{type(request).__name__} is not supported by the stand-in")
+            document = self._find(request._filter)
+            if document is None:
+                if not request._upsert:
+                    continue
+                document = {key: value for key, value in request._filter.items() if "." not in key}
+                document["_id"] = ObjectId()
+                self.documents[document["_id"]] = document
+            if isinstance(request, ReplaceOne):
+                replacement = dict(request._doc)
+                replacement["_id"] = document["_id"]
+                self.documents[document["_id"]] = replacement
+            else:
+                _apply_update(document, request._doc)
+
+    async def find_one(self, query: Optional[Dict] = None, *args, **kwargs) -> Optional[Dict]:
+        await self._command("find")
+        document = self._find(query or {})
+        return dict(document) if document is not None else None
+
+    async def count_documents(self, query: Dict) -> int:
+        await self._command("count")
+        return sum(1 for document in self.documents.values() if _matches(document, query))
+
+    async def index_information(self) -> Dict:
+        await self._command("listIndexes")
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    async def create_indexes(self, models: List):
+        await self._command("createIndexes")
+        for model in models:
+            spec = model.document
+            key = list(spec["key"].items())
+            # Same rules as the server: one index per key pattern, one key pattern per name
+            for name, info in self.indexes.items():
+                if info["key"] == key and name != spec["name"]:
+                    raise OperationFailure(f"Index already exists with a different name: {name}",
+                                           code=INDEX_OPTIONS_CONFLICT)
+                if name == spec["name"] and info["key"] != key:
+                    raise OperationFailure(f"An existing index has the same name as the requested index: {name}",
+                                           code=INDEX_KEY_SPECS_CONFLICT)
+            self.indexes[spec["name"]] = {"key": key, "unique": spec.get("unique", False)}
+
+    async def drop_index(self, name: str):
+        await self._command("dropIndexes")
+        self.indexes.pop(name, None)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str, client: "MemoryClient"):
+        self.name = name
+        self.client = client
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name, self.client)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, name: str, *args, **kwargs) -> Dict:
+        self.client.commands[name] += 1
+        return {"ok": 1.0}
+
+    def stats(self) -> Dict[str, int]:
+        return {name: len(collection.documents) for name, collection in self._collections.items()}
+
+
+class MemoryClient:
+    """Drop-in for AsyncIOMotorClient (URL and driver options are ignored)"""
+
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.commands: Counter = Counter()
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name, self)
+        return self._databases[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,31 @@
+import pytest
+
+from benchmarks.memory_mongo import MemoryClient
+from app.services.knowledge_pack import DEFAULT_RESPONSES, KnowledgeStore, build_pack
+from app.services.lexicon_index import INTENSIFIERS, MENTAL_HEALTH_TERMS, THERAPY_TOPICS
+
+CRISIS_KEYWORDS = {
+    "high_risk_keywords": ["want to die", "kill myself", "suicide", "end my life"],
+    "medium_risk_keywords": ["hopeless", "worthless", "self harm"],
+    "low_risk_keywords": ["sad", "stressed"]
+}
+
+
+@pytest.fixture
+def knowledge_store(tmp_path):
+    """A KnowledgeStore over a small pack built from fixed crisis keywords"""
+    path = str(tmp_path / "knowledge.pack")
+    build_pack({
+        "crisis_keywords": CRISIS_KEYWORDS,
+        "mental_health_terms": MENTAL_HEALTH_TERMS,
+        "therapy_topics": THERAPY_TOPICS,
+        "intensifiers": INTENSIFIERS,
+        "responses": DEFAULT_RESPONSES
+    }, path)
+    return KnowledgeStore(path, check_interval=0)
+
+
+@pytest.fixture
+def memory_db():
+    """Motor-style database backed by the in-memory stand-in (no latency)"""
+    return MemoryClient()["emoheal_test"]
@@ -0,0 +1,44 @@
+from app.services import analysis_cache
+from app.services.analysis_cache import AnalysisCache, normalize_message
+
+ANALYSIS = {"text": "I feel anxious", "sentiment": {"compound": -0.4}, "emotions": [{"emotion": "anxiety"}]}
+
+
+def test_normalization_keeps_case():
+    assert normalize_message("  I feel\n\tanxious ") == "I feel anxious"
+    assert normalize_message("I'M FINE") != normalize_message("i'm fine")
+
+
+def test_hit_is_relabelled_with_the_callers_text():
+    cache = AnalysisCache(max_entries=10)
+    cache.put("I feel anxious", ANALYSIS)
+    hit = cache.get("I  feel anxious ")
+    assert hit["text"] == "I  feel anxious " and hit["sentiment"] == ANALYSIS["sentiment"]
+    assert cache.get("something else") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = AnalysisCache(max_entries=2)
+    cache.put("a", ANALYSIS)
+    cache.put("b", ANALYSIS)
+    cache.get("a")
+    cache.put("c", ANALYSIS)
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.evictions == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "monotonic", lambda: now[0])
+    cache = AnalysisCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", ANALYSIS)
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.expirations == 1 and len(cache) == 0 and cache.bytes == 0
+
+
+def test_disabled_by_zero_limits():
+    cache = AnalysisCache(max_entries=0)
+    cache.put("a", ANALYSIS)
+    assert not cache.enabled and cache.get("a") is None
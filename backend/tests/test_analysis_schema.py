@@ -0,0 +1,19 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.analysis import BATCH_MAX_MESSAGE_CHARS, BATCH_MAX_MESSAGES, BatchAnalysisRequest
+
+
+def test_accepts_a_batch_within_limits():
+    request = BatchAnalysisRequest(messages=["hello", "x" * BATCH_MAX_MESSAGE_CHARS])
+    assert len(request.messages) == 2 and request.include_entities is None
+
+
+@pytest.mark.parametrize("messages", [
+    [],
+    ["hi"] * (BATCH_MAX_MESSAGES + 1),
+    ["ok", "x" * (BATCH_MAX_MESSAGE_CHARS + 1)],
+])
+def test_rejects_batches_outside_limits(messages):
+    with pytest.raises(ValidationError):
+        BatchAnalysisRequest(messages=messages)
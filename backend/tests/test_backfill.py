@@ -0,0 +1,44 @@
+import mongomock
+
+from app.jobs.backfill import crisis_fields, run_backfill
+from app.models.crisis_detector import CrisisDetector
+
+
+class StubNLP:
+    def process_batch(self, messages, include_entities=None):
+        return [{"sentiment": {"compound": -0.5}, "emotions": [{"emotion": "sadness"}]} for _ in messages]
+
+
+def test_crisis_fields_only_raise_the_level():
+    result = {"sentiment": {}, "emotionDetected": [], "crisisLevel": "low", "crisisConfidence": 0.1}
+    assert "crisisLevel" not in crisis_fields(result, "high")
+    assert crisis_fields(result, "low")["crisisLevel"] == "low"
+    assert crisis_fields(result, None)["crisisLevel"] == "low"
+    assert crisis_fields({**result, "crisisLevel": "high"}, "medium")["crisisLevel"] == "high"
+
+
+def test_backfill_reanalyses_without_downgrading(knowledge_store, tmp_path):
+    collection = mongomock.MongoClient().db.chatbot_history
+    collection.insert_many([
+        # Escalated by the live conversation pattern; keywords alone say low
+        {"_id": 1, "userMessage": "I feel tired", "crisisLevel": "medium", "crisisConfidence": 0.7},
+        # The new lexicon knows this one is high
+        {"_id": 2, "userMessage": "I want to kill myself", "crisisLevel": "low", "crisisConfidence": 0.1},
+        {"_id": 3, "userMessage": "nice weather", "crisisLevel": "low", "crisisConfidence": 0.1},
+        {"_id": 4, "userMessage": "already done", "crisisLevel": "low", "lexiconVersion": "v2"},
+    ])
+
+    stats = run_backfill(
+        collection, version="v2", workers=0, chunk_size=2, checkpoint_path=str(tmp_path / "checkpoint.json"),
+        crisis_detector=CrisisDetector(risk_model_path=None, knowledge_store=knowledge_store),
+        nlp_processor=StubNLP()
+    )
+
+    assert stats["processed"] == 3 and stats["updated"] == 3
+    docs = {doc["_id"]: doc for doc in collection.find()}
+    assert (docs[1]["crisisLevel"], docs[1]["crisisConfidence"]) == ("medium", 0.7)
+    assert (docs[2]["crisisLevel"], docs[2]["crisisConfidence"]) == ("high", 0.95)
+    assert docs[3]["crisisLevel"] == "low"
+    assert all(docs[i]["lexiconVersion"] == "v2" and docs[i]["emotionDetected"] == ["sadness"] for i in (1, 2, 3))
+    assert "reanalyzedAt" not in docs[4]
+    assert not (tmp_path / "checkpoint.json").exists()
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.routes.chatbot import (
+    decode_cursor, encode_cursor, history_page_filter, history_projection, history_total
+)
+
+
+def test_cursor_round_trip_is_url_safe():
+    message = {"_id": ObjectId(), "timestamp": datetime(2024, 5, 1, 12, 30, 15, 123000)}
+    cursor = encode_cursor(message)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == (message["timestamp"], message["_id"])
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "eyJ0IjogMX0", encode_cursor(
+    {"_id": "not-an-object-id", "timestamp": datetime(2024, 1, 1)})])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_first_page_filter():
+    assert history_page_filter("u1", None) == {"userId": "u1"}
+
+
+def test_page_filter_breaks_timestamp_ties_on_id():
+    timestamp, last_id = datetime(2024, 5, 1), ObjectId()
+    assert history_page_filter("u1", (timestamp, last_id)) == {
+        "userId": "u1",
+        "$or": [{"timestamp": {"$lt": timestamp}}, {"timestamp": timestamp, "_id": {"$lt": last_id}}]
+    }
+
+
+def test_projection_selects_known_fields():
+    assert history_projection("userMessage, crisisLevel") == {
+        "_id": {"$toString": "$_id"}, "timestamp": 1, "userMessage": 1, "crisisLevel": 1
+    }
+    assert history_projection(None) is None
+    assert history_projection(" , ") is None
+    with pytest.raises(HTTPException) as error:
+        history_projection("userMessage,password")
+    assert error.value.status_code == 400
+
+
+def test_total_reads_the_user_stats_counter(memory_db):
+    async def scenario():
+        await memory_db.chatbot_history.insert_many([{"userId": "u1"}, {"userId": "u1"}])
+        await memory_db.user_stats.insert_many([{"userId": "u1", "messages": 7}])
+        return (
+            await history_total(memory_db, "u1", exact=False),
+            await history_total(memory_db, "u1", exact=True),
+            await history_total(memory_db, "u2", exact=False)
+        )
+
+    # The counter answers the first request; include_total still counts
+    assert asyncio.run(scenario()) == (7, 2, 0)
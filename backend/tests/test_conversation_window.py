@@ -0,0 +1,32 @@
+from app.models.conversation_window import ConversationWindow, score_for_hits
+from app.models.crisis_detector import CrisisDetector
+
+
+def test_rolling_score_matches_a_full_rescan(knowledge_store):
+    detector = CrisisDetector(risk_model_path=None, knowledge_store=knowledge_store)
+    messages = ["I can't sleep", "nothing helps", "fine", "nobody listens, I never win",
+                "always the same", "ok", "I won't", "can't stop, never, nothing, nobody"]
+    window = ConversationWindow()
+    seen = []
+    for message in messages:
+        window.append(message)
+        seen.append({"message": message})
+        assert window.pattern_score() == detector._analyze_conversation_pattern(seen)
+
+
+def test_needs_three_messages_and_caps_at_one():
+    window = ConversationWindow()
+    window.append("can't won't never always nothing nobody")
+    window.append("can't won't never always nothing nobody")
+    assert window.pattern_score() == 0.0
+    window.append("can't")
+    assert window.pattern_score() == 1.0
+    assert score_for_hits(30) == 1.0
+
+
+def test_history_is_bounded():
+    window = ConversationWindow(max_history=3)
+    for index in range(5):
+        window.append(f"message {index}")
+    assert len(window) == 5
+    assert [entry["message"] for entry in window.history] == ["message 2", "message 3", "message 4"]
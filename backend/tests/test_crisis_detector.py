@@ -0,0 +1,49 @@
+import pytest
+
+from app.models.crisis_detector import CrisisDetector
+
+
+@pytest.fixture
+def detector(knowledge_store):
+    return CrisisDetector(risk_model_path=None, knowledge_store=knowledge_store)
+
+
+@pytest.mark.parametrize("message", [
+    "I want to dine out tonight",
+    "I want to dive in the lake",
+    "I want to diet",
+])
+def test_real_words_are_not_corrected_into_crisis_terms(detector, message):
+    result = detector.detect_crisis_level(message, [])
+    assert result['level'] == 'low'
+    assert result['triggered_keywords'] == []
+
+
+def test_exact_high_keyword(detector):
+    result = detector.detect_crisis_level("I want to kill myself", [])
+    assert result['level'] == 'high'
+    assert result['confidence'] == 0.95
+    assert result['triggered_keywords'] == ['kill myself']
+
+
+def test_misspelled_phrase_stays_high(detector):
+    result = detector.detect_crisis_level("i want to kil myself", [])
+    assert result['level'] == 'high'
+    assert result['fuzzy_keywords'] == ['kill myself']
+
+
+def test_misspelled_single_word_is_capped_at_medium(detector):
+    result = detector.detect_crisis_level("thinking about suicde", [])
+    assert result['level'] == 'medium'
+    assert result['fuzzy_keywords'] == ['suicide']
+
+
+def test_phrase_with_two_corrections_is_capped_at_medium(detector):
+    result = detector.detect_crisis_level("i will kil mysef", [])
+    assert result['level'] == 'medium'
+    assert result['fuzzy_keywords'] == ['kill myself']
+
+
+def test_fuzzy_matching_can_be_disabled(knowledge_store):
+    detector = CrisisDetector(max_edit_distance=0, risk_model_path=None, knowledge_store=knowledge_store)
+    assert detector.detect_crisis_level("i want to kil myself", [])['level'] == 'low'
@@ -0,0 +1,40 @@
+from app.utils.fuzzy_index import SymSpellIndex, edit_distance, load_word_list
+
+
+def test_lookup_corrects_single_edit():
+    index = SymSpellIndex(["kill", "suicide", "myself"])
+    assert index.lookup("kil") == ("kill", 1)
+    assert index.lookup("suicde") == ("suicide", 1)
+    assert index.lookup("myslef") == ("myself", 1)
+
+
+def test_lookup_exact_term_and_misses():
+    index = SymSpellIndex(["kill"])
+    assert index.lookup("KILL") == ("kill", 0)
+    assert index.lookup("bill") == ("kill", 1)
+    assert index.lookup("ki") is None
+    assert index.lookup("table") is None
+
+
+def test_known_words_are_never_corrected():
+    index = SymSpellIndex(["die"], known_words=frozenset({"diet", "dine", "dive"}))
+    for word in ("diet", "dine", "dive"):
+        assert index.lookup(word) is None
+    assert index.lookup("dei") == ("die", 1)
+
+
+def test_short_tokens_get_one_edit():
+    index = SymSpellIndex(["hurt"], max_edit_distance=2)
+    assert index.lookup("hrt") == ("hurt", 1)
+    assert index.lookup("ht") is None
+
+
+def test_edit_distance_counts_adjacent_swap_once():
+    assert edit_distance("suicide", "suicdie", 2) == 1
+    assert edit_distance("abc", "xyz", 1) == 2
+
+
+def test_english_word_list():
+    words = load_word_list()
+    assert {"dine", "dive", "diet", "want", "myself"} <= words
+    assert "kil" not in words and "suicde" not in words
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.database.indexes import INDEXES, IndexSpec, QueryShape, apply_indexes, plan_stages, verify_query_plans
+
+HISTORY_KEYS = [("userId", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+
+def history_specs():
+    return [spec for spec in INDEXES if spec.collection == "chatbot_history"]
+
+
+def test_creates_missing_indexes_then_is_idempotent(memory_db):
+    first = asyncio.run(apply_indexes(memory_db, history_specs()))
+    second = asyncio.run(apply_indexes(memory_db, history_specs()))
+
+    assert first["created"] == ["chatbot_history.userId_timestamp_id"]
+    assert second["created"] == [] and second["existing"] == ["chatbot_history.userId_timestamp_id"]
+
+
+def test_same_keys_under_another_name_count_as_existing(memory_db):
+    collection = memory_db.chatbot_history
+    asyncio.run(collection.create_indexes([IndexModel(HISTORY_KEYS, name="userId_1_timestamp_-1__id_-1")]))
+
+    report = asyncio.run(apply_indexes(memory_db, history_specs()))
+
+    assert report["created"] == [] and report["dropped"] == [] and report["obsolete"] == []
+    assert report["existing"] == ["chatbot_history.userId_1_timestamp_-1__id_-1 (declared as userId_timestamp_id)"]
+    assert set(collection.indexes) == {"_id_", "userId_1_timestamp_-1__id_-1"}
+
+
+def test_changed_declaration_replaces_index(memory_db):
+    collection = memory_db.mood_daily
+    asyncio.run(collection.create_indexes([IndexModel([("userId", ASCENDING)], name="userId_day")]))
+    specs = [IndexSpec("mood_daily", [("userId", ASCENDING), ("day", ASCENDING)], "userId_day", unique=True)]
+
+    report = asyncio.run(apply_indexes(memory_db, specs))
+
+    assert report["dropped"] == ["mood_daily.userId_day"]
+    assert report["created"] == ["mood_daily.userId_day"]
+    assert collection.indexes["userId_day"] == {"key": [("userId", 1), ("day", 1)], "unique": True}
+
+
+def test_undeclared_indexes_are_reported_or_dropped(memory_db):
+    collection = memory_db.sessions
+    asyncio.run(collection.create_indexes([IndexModel([("startedAt", ASCENDING)], name="startedAt")]))
+    specs = [IndexSpec("sessions", [("userId", ASCENDING)], "userId")]
+
+    assert asyncio.run(apply_indexes(memory_db, specs))["obsolete"] == ["sessions.startedAt"]
+    assert "sessions.startedAt" in asyncio.run(apply_indexes(memory_db, specs, drop_obsolete=True))["dropped"]
+    assert "startedAt" not in collection.indexes
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "SORT_MERGE", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}
+    assert plan_stages(plan) == ["FETCH", "SORT_MERGE", "IXSCAN", "COLLSCAN"]
+
+
+class ExplainCursor:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def sort(self, sort):
+        return self
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": {"stage": self.stage}}}
+
+
+class ExplainCollection:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def find(self, query):
+        return ExplainCursor(self.stage)
+
+
+def test_collscan_fails_by_default_and_only_warns_when_asked():
+    db = {"sessions": ExplainCollection("COLLSCAN")}
+    shapes = [QueryShape("session_count", "sessions", {"userId": "u"})]
+
+    with pytest.raises(Exception, match="COLLSCAN"):
+        asyncio.run(verify_query_plans(db, shapes))
+    assert asyncio.run(verify_query_plans(db, shapes, mode="warn")) == {"session_count": ["COLLSCAN"]}
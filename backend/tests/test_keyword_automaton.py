@@ -0,0 +1,48 @@
+import re
+
+from app.utils.keyword_automaton import KeywordAutomaton, SubstringScanner
+
+
+def automaton(keywords, **options):
+    matcher = KeywordAutomaton(**options)
+    for keyword, payload in keywords.items():
+        matcher.add(keyword, payload)
+    return matcher.build()
+
+
+def test_finds_overlapping_keywords_in_one_pass():
+    matcher = automaton({"he": 1, "she": 2, "hers": 3, "his": 4}, word_boundary=False)
+    found = [(match.start, match.end, match.keyword) for match in matcher.find_all("ushers")]
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_word_boundary_skips_matches_inside_words():
+    matcher = automaton({"die": "high", "kill myself": "high", "hopeless": "medium"})
+    assert matcher.find_keywords("I'm on a diet") == {}
+    assert matcher.find_keywords("I could DIE, I feel hopeless.") == {"high": ["die"], "medium": ["hopeless"]}
+    assert matcher.find_keywords("want to kill myself_") == {}
+
+
+def test_find_keywords_dedupes_in_first_occurrence_order():
+    matcher = automaton({"sad": "low", "alone": "low"})
+    assert matcher.find_keywords("alone, sad, alone") == {"low": ["alone", "sad"]}
+
+
+def test_matches_the_regex_reference():
+    keywords = ["end it", "end my life", "hurt", "hurt myself", "no reason to live"]
+    matcher = automaton({keyword: None for keyword in keywords})
+    text = "i want to end it. no reason to live, i hurt myself and want to end my life"
+    expected = sorted(
+        (match.start(), match.end(), keyword)
+        for keyword in keywords for match in re.finditer(r"\b" + re.escape(keyword) + r"\b", text)
+    )
+    assert sorted((match.start, match.end, match.keyword) for match in matcher.find_all(text)) == expected
+
+
+def test_substring_scanner_reports_prefix_payloads():
+    scanner = SubstringScanner()
+    for keyword, payload in [("anx", "anxiety"), ("anxious", "anxiety"), ("panic", "panic"), ("pan", "cooking")]:
+        scanner.add(keyword, payload)
+    assert scanner.find_payloads("so anxious, panicking") == {"anxiety", "panic", "cooking"}
+    assert scanner.find_payloads("calm") == set()
+    assert SubstringScanner().find_payloads("anything") == set()
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from app.services.knowledge_pack import KnowledgePack, KnowledgePackError, KnowledgeStore, build_pack, load_sources
+
+from .conftest import CRISIS_KEYWORDS
+
+
+def write_json(path, value):
+    path.write_text(json.dumps(value))
+    # Make sure the change is visible even on coarse mtime filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def sources(tmp_path, crisis_keywords=CRISIS_KEYWORDS):
+    crisis_path, responses_path = tmp_path / "crisis_keywords.json", tmp_path / "responses.json"
+    write_json(crisis_path, crisis_keywords)
+    write_json(responses_path, {"general": {"default": "Tell me more."}})
+    return crisis_path, responses_path
+
+
+def test_pack_round_trip(tmp_path):
+    crisis_path, responses_path = sources(tmp_path)
+    sections = load_sources(crisis_path, responses_path)
+    version = build_pack(sections, str(tmp_path / "knowledge.pack"))
+
+    pack = KnowledgePack.open(str(tmp_path / "knowledge.pack"))
+    assert pack.version == version
+    assert pack.section("crisis_keywords") == CRISIS_KEYWORDS
+    assert pack.section("crisis_keywords") is pack.section("crisis_keywords")
+    with pytest.raises(KnowledgePackError):
+        pack.section("unknown")
+
+
+def test_decode_all_needs_no_mapped_bytes_afterwards(tmp_path):
+    crisis_path, responses_path = sources(tmp_path)
+    build_pack(load_sources(crisis_path, responses_path), str(tmp_path / "knowledge.pack"))
+
+    pack = KnowledgePack.open(str(tmp_path / "knowledge.pack")).decode_all()
+    # What the pre-fork master hands to its workers: no section is decoded later
+    pack._buffer.close()
+    assert pack.section("crisis_keywords") == CRISIS_KEYWORDS
+    assert pack.section("responses") == {"general": {"default": "Tell me more."}}
+
+
+def test_version_follows_content(tmp_path):
+    crisis_path, responses_path = sources(tmp_path)
+    first = build_pack(load_sources(crisis_path, responses_path), str(tmp_path / "a.pack"))
+    again = build_pack(load_sources(crisis_path, responses_path), str(tmp_path / "b.pack"))
+    write_json(crisis_path, {**CRISIS_KEYWORDS, "low_risk_keywords": ["tired"]})
+    changed = build_pack(load_sources(crisis_path, responses_path), str(tmp_path / "c.pack"))
+    assert first == again != changed
+
+
+def test_store_hot_reloads_the_pack(tmp_path):
+    crisis_path, responses_path = sources(tmp_path)
+    pack_path = str(tmp_path / "knowledge.pack")
+    build_pack(load_sources(crisis_path, responses_path), pack_path)
+    store = KnowledgeStore(pack_path, check_interval=60)
+    first = store.current()
+
+    write_json(crisis_path, {**CRISIS_KEYWORDS, "medium_risk_keywords": ["hopeless", "trapped"]})
+    build_pack(load_sources(crisis_path, responses_path), pack_path)
+    assert store.current() is first  # not re-checked before the interval
+
+    store._next_check = 0
+    assert store.current().section("crisis_keywords")["medium_risk_keywords"] == ["hopeless", "trapped"]
+    assert store.stats()["reloads"] == 1 and store.stats()["source"] == pack_path
+
+
+def test_store_hot_reloads_json_sources_without_a_pack(tmp_path):
+    crisis_path, responses_path = sources(tmp_path)
+    store = KnowledgeStore(str(tmp_path / "missing.pack"), check_interval=60,
+                           crisis_keywords_path=crisis_path, responses_path=responses_path)
+    first = store.current()
+    assert store.stats()["source"] == "json"
+
+    store._next_check = 0
+    assert store.current() is first  # unchanged files are not re-read
+
+    write_json(crisis_path, {**CRISIS_KEYWORDS, "high_risk_keywords": ["end it all"]})
+    store._next_check = 0
+    assert store.current().section("crisis_keywords")["high_risk_keywords"] == ["end it all"]
+    assert store.stats()["reloads"] == 1
@@ -0,0 +1,52 @@
+import json
+from argparse import Namespace
+
+from benchmarks.load_ws_chat import degraded_services, gate
+
+READY = {"ready": True, "services": {"crisis_detector": {"state": "ready"}, "nlp_processor": {"state": "ready"}}}
+
+
+def args(**overrides):
+    values = dict(max_p95_ms=None, max_p99_ms=None, min_throughput=None, max_error_rate=0.0,
+                  baseline=None, tolerance=0.15)
+    values.update(overrides)
+    return Namespace(**values)
+
+
+def summary(**overrides):
+    values = dict(completed=100, throughput=20.0, error_rate=0.0, server_write_errors=0,
+                  latency_ms={"p50": 10.0, "p95": 40.0, "p99": 80.0, "max": 120.0}, readiness=READY)
+    values.update(overrides)
+    return values
+
+
+def test_passes_within_limits():
+    assert gate(summary(), args(max_p95_ms=50, max_p99_ms=100, min_throughput=10)) == []
+
+
+def test_reports_every_failed_check():
+    failures = gate(summary(error_rate=0.1, server_write_errors=2), args(max_p95_ms=20, min_throughput=50))
+    assert len(failures) == 4
+    assert failures[0] == "p95 40.0 ms > 20 ms"
+
+
+def test_crisis_detector_not_ready_always_fails():
+    readiness = {"ready": False, "services": {"crisis_detector": {"state": "failed"},
+                                              "nlp_processor": {"state": "failed"}}}
+    assert degraded_services(readiness) == ["crisis_detector", "nlp_processor"]
+    assert gate(summary(readiness=readiness), args()) == [
+        "crisis detector not ready (turns skipped crisis detection)"
+    ]
+
+
+def test_nlp_degraded_alone_does_not_fail_the_gate():
+    readiness = {"ready": False, "services": {"crisis_detector": {"state": "ready"},
+                                              "nlp_processor": {"state": "loading"}}}
+    assert gate(summary(readiness=readiness), args()) == []
+
+
+def test_baseline_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"latency_ms": {"p95": 30.0, "p99": 80.0}, "throughput": 30.0}))
+    failures = gate(summary(), args(baseline=str(baseline)))
+    assert [failure.split()[0] for failure in failures] == ["p95", "throughput"]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.metrics import MetricsRegistry, StageTimer, CHAT_STAGE_SECONDS
+
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    messages = registry.counter("chat_messages_total", "Messages", ["level"])
+    messages.labels("high").inc()
+    messages.labels("low").inc(2)
+    registry.gauge("active_sessions", "Sessions", function=lambda: 3)
+
+    assert registry.render().splitlines() == [
+        "# HELP chat_messages_total Messages",
+        "# TYPE chat_messages_total counter",
+        'chat_messages_total{level="high"} 1',
+        'chat_messages_total{level="low"} 2',
+        "# HELP active_sessions Sessions",
+        "# TYPE active_sessions gauge",
+        "active_sessions 3",
+    ]
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = MetricsRegistry()
+    latency = registry.histogram("turn_seconds", "Turn", buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'turn_seconds_bucket{le="0.1"} 2',
+        'turn_seconds_bucket{le="1"} 3',
+        'turn_seconds_bucket{le="+Inf"} 4',
+        "turn_seconds_sum 2.65",
+        "turn_seconds_count 4",
+    ]
+
+
+def test_label_values_are_escaped_and_checked():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ["kind"])
+    errors.labels('bad "quote"\n').inc()
+    assert 'errors_total{kind="bad \\"quote\\"\\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        errors.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("errors_total", "Again")
+
+
+def test_stage_timer_only_records_sampled_turns():
+    before = CHAT_STAGE_SECONDS.labels("test_stage").count
+    StageTimer(sample=False).mark("test_stage")
+    StageTimer(sample=True).mark("test_stage")
+    assert CHAT_STAGE_SECONDS.labels("test_stage").count == before + 1
@@ -0,0 +1,61 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.routes.chatbot import summarize_mood
+
+
+def original_summary(messages):
+    """The pre-aggregation endpoint: a Python tally over the raw documents"""
+    emotions = Counter()
+    sentiment_sum, trend = 0.0, {}
+    for message in messages:
+        emotions.update(message["emotionDetected"])
+        compound = message["sentiment"]["compound"]
+        sentiment_sum += compound
+        day = message["timestamp"].strftime("%Y-%m-%d")
+        trend.setdefault(day, []).append(compound)
+    return {
+        "total_messages": len(messages),
+        "emotion_distribution": dict(emotions),
+        "average_sentiment": round(sentiment_sum / len(messages), 3),
+        "sentiment_trend": {day: {"average": sum(values) / len(values), "count": len(values)}
+                            for day, values in trend.items()},
+    }
+
+
+def facets_for(messages):
+    """What mood_summary_pipeline's $facet stage returns for the same documents"""
+    daily, emotions = {}, Counter()
+    for message in messages:
+        day = daily.setdefault(message["timestamp"].strftime("%Y-%m-%d"), {"sum": 0.0, "count": 0})
+        day["sum"] += message["sentiment"]["compound"]
+        day["count"] += 1
+        emotions.update(message["emotionDetected"])
+    return {
+        "daily": [{"_id": day, **values} for day, values in sorted(daily.items())],
+        "emotions": [{"_id": emotion, "count": count}
+                     for emotion, count in sorted(emotions.items(), key=lambda item: (-item[1], item[0]))],
+    }
+
+
+def test_summary_matches_the_original_tally():
+    start = datetime(2024, 5, 1, 9)
+    messages = [
+        {"timestamp": start + timedelta(hours=7 * index), "sentiment": {"compound": (index % 5 - 2) / 4},
+         "emotionDetected": ["joy", "anxiety", "sadness", "anger", "calm", "fear", "hope"][index % 7:index % 7 + 2]}
+        for index in range(40)
+    ]
+    summary = summarize_mood(facets_for(messages))
+    expected = original_summary(messages)
+
+    for field in ("total_messages", "emotion_distribution", "average_sentiment", "sentiment_trend"):
+        assert summary[field] == expected[field]
+    assert len(summary["top_emotions"]) == 5
+    assert summary["top_emotions"][0]["count"] == max(expected["emotion_distribution"].values())
+
+
+def test_empty_window():
+    assert summarize_mood({"daily": [], "emotions": []}) == {
+        "total_messages": 0, "emotion_distribution": {}, "top_emotions": [],
+        "average_sentiment": 0, "sentiment_trend": {}
+    }
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.services.nlp_batcher import NLPBatcher
+
+
+def analyse(messages):
+    return [{"text": message.upper()} for message in messages]
+
+
+def test_concurrent_messages_share_a_batch():
+    calls = []
+
+    async def run_batch(messages):
+        calls.append(list(messages))
+        return analyse(messages)
+
+    async def scenario():
+        batcher = NLPBatcher(run_batch, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*[batcher.submit(f"m{i}") for i in range(5)])
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+    assert results == [{"text": f"M{i}"} for i in range(5)]
+    assert calls == [["m0", "m1", "m2", "m3", "m4"]]
+    assert batcher.batches == 1 and batcher.average_batch_size == 5
+
+
+def test_failed_batch_fails_every_caller():
+    async def run_batch(messages):
+        raise RuntimeError("parser down")
+
+    async def scenario():
+        batcher = NLPBatcher(run_batch, max_batch_size=4, max_wait_ms=1)
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+def test_stop_flushes_queued_and_half_collected_messages():
+    async def run_batch(messages):
+        return analyse(messages)
+
+    async def scenario():
+        # Long wait: without a flush the collector would still be gathering at stop()
+        batcher = NLPBatcher(run_batch, max_batch_size=2, max_wait_ms=60_000, max_concurrent_batches=1)
+        batcher.start()
+        submitted = [asyncio.create_task(batcher.submit(f"m{i}")) for i in range(5)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(batcher.stop(), 1)
+        return await asyncio.wait_for(asyncio.gather(*submitted), 1)
+
+    assert asyncio.run(scenario()) == [{"text": f"M{i}"} for i in range(5)]
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from starlette.requests import Request
+
+from app.database.data_versions import DataVersions
+from app.services.response_cache import ResponseCache, etag_matches
+
+ETAG = 'W/"abc-3-100"'
+
+
+def request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_etag_matches_weak_comparison():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches('"abc-3-100"', ETAG)
+    assert etag_matches('"x", W/"abc-3-100"', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches('W/"abc-4-100"', ETAG)
+
+
+def test_data_versions_change_the_etag():
+    versions = DataVersions(slots=16, max_age=0)
+    before = versions.etag("u1")
+    versions.bump("u1")
+    assert versions.etag("u1") != before
+    assert versions.version("u1") == 1
+
+
+def test_shared_columns_sum_per_user():
+    versions = DataVersions(slots=16, max_age=0)
+    versions.share(3)
+    for column in (0, 2, 2):
+        versions.use_column(column)
+        versions.bump("u1")
+    assert versions.version("u1") == 3
+
+
+def test_respond_builds_once_then_serves_cache_and_304():
+    versions = DataVersions(slots=16, max_age=0)
+    cache = ResponseCache(versions, enabled=True)
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"success": True, "count": len(builds)}
+
+    async def scenario():
+        first = await cache.respond(request(), "stats", "u1", None, build)
+        second = await cache.respond(request(), "stats", "u1", None, build)
+        not_modified = await cache.respond(request(first.headers["etag"]), "stats", "u1", None, build)
+        versions.bump("u1")
+        stale = await cache.respond(request(first.headers["etag"]), "stats", "u1", None, build)
+        return first, second, not_modified, stale
+
+    first, second, not_modified, stale = asyncio.run(scenario())
+    assert json.loads(first.body) == json.loads(second.body) == {"success": True, "count": 1}
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == first.headers["etag"]
+    assert json.loads(stale.body) == {"success": True, "count": 2}
+    assert (cache.hits, cache.misses, cache.not_modified) == (1, 2, 1)
+
+
+def test_lru_respects_entry_and_byte_limits():
+    cache = ResponseCache(DataVersions(slots=16, max_age=0), enabled=True, max_entries=2, max_bytes=100)
+    for index in range(3):
+        cache._put(("r", "u", index, "e"), b"x" * 10)
+    assert cache.stats()["entries"] == 2 and cache.evictions == 1
+    cache._put(("r", "u", "big", "e"), b"x" * 101)
+    assert cache.bytes == 20
+
+
+def test_disabled_cache_returns_the_plain_body():
+    cache = ResponseCache(DataVersions(slots=16), enabled=False)
+
+    async def build():
+        return {"success": True}
+
+    assert asyncio.run(cache.respond(request(), "stats", "u1", None, build)) == {"success": True}
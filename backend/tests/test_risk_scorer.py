@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from app.models.risk_scorer import RiskScorer, _hash_feature, _word_ngrams, build_vectorizer, train_risk_model
+
+RISKY = ["i want to end it all", "nothing matters i want to disappear", "i can't go on anymore",
+         "everyone would be better off without me", "i have no reason to keep going"]
+SAFE = ["the weather is lovely today", "i had a good chat with my friend", "work was busy but fine",
+        "looking forward to the weekend", "i cooked pasta for dinner"]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("model") / "risk.npz")
+
+
+@pytest.fixture(scope="module")
+def scorer(model_path):
+    rng = random.Random(0)
+    texts, labels = [], []
+    for _ in range(40):
+        texts += [rng.choice(RISKY), rng.choice(SAFE)]
+        labels += [1, 0]
+    return train_risk_model(texts, labels, model_path, n_features=2 ** 12)
+
+
+def test_ngrams_match_sklearn_analyzer():
+    analyzer = build_vectorizer(ngram_max=2).build_analyzer()
+    message = "I can't go on, I can't"
+    assert sorted(_word_ngrams(message, 2)) == sorted(analyzer(message))
+
+
+def test_hash_matches_hashing_vectorizer():
+    vectorizer = build_vectorizer(n_features=2 ** 10, ngram_max=1)
+    row = vectorizer.transform(["hopeless"]).tocoo()
+    index, sign = _hash_feature("hopeless", 2 ** 10)
+    assert list(row.col) == [index] and row.data[0] == pytest.approx(sign)
+
+
+def test_single_and_batch_scores_agree(scorer):
+    messages = RISKY + SAFE + ["", "completely unrelated words"]
+    assert [scorer.score(message) for message in messages] == pytest.approx(scorer.score_many(messages))
+
+
+def test_separates_risky_from_safe(scorer):
+    assert min(scorer.score(message) for message in RISKY) > max(scorer.score(message) for message in SAFE)
+
+
+def test_load_round_trip(scorer, model_path):
+    loaded = RiskScorer.load(model_path)
+    assert loaded.score("i want to end it all") == pytest.approx(scorer.score("i want to end it all"))
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+from app.database.rollups import MOOD_DAILY, ROLLUP_STATE, apply_mood_rollups, rollup_updates
+from app.routes import chatbot
+
+
+def message(user_id, timestamp, compound, emotions):
+    return {"userId": user_id, "timestamp": timestamp, "sentiment": {"compound": compound},
+            "emotionDetected": emotions}
+
+
+def test_rollup_updates_fold_a_batch_per_user_and_day():
+    updates = rollup_updates([
+        message("u1", datetime(2024, 5, 1, 9), 0.5, ["joy"]),
+        message("u1", datetime(2024, 5, 1, 22), -0.25, ["joy", "sad.ness"]),
+        message("u1", datetime(2024, 5, 2, 8), 0.1, []),
+        message("u2", datetime(2024, 5, 1, 9), 0.0, None),
+        {"userId": "u1", "timestamp": "not a date"},
+    ])
+
+    by_key = {(update._filter["userId"], update._filter["day"]): update._doc["$inc"] for update in updates}
+    assert by_key == {
+        ("u1", "2024-05-01"): {"count": 2, "sentimentSum": 0.25, "emotions.joy": 2, "emotions.sad_ness": 1},
+        ("u1", "2024-05-02"): {"count": 1, "sentimentSum": 0.1},
+        ("u2", "2024-05-01"): {"count": 1, "sentimentSum": 0.0},
+    }
+    assert all(update._upsert for update in updates)
+
+
+def test_listener_accumulates_across_batches(memory_db):
+    day = datetime(2024, 5, 1, 12)
+
+    async def scenario():
+        await apply_mood_rollups(memory_db, [message("u1", day, 0.5, ["joy"])])
+        await apply_mood_rollups(memory_db, [message("u1", day, 0.25, ["joy", "calm"])])
+        return await memory_db[MOOD_DAILY].find_one({"userId": "u1", "day": "2024-05-01"})
+
+    rollup = asyncio.run(scenario())
+    assert rollup["count"] == 2
+    assert rollup["sentimentSum"] == 0.75
+    assert rollup["emotions"] == {"joy": 2, "calm": 1}
+
+
+def test_rollup_facets_match_pipeline_shape():
+    facets = chatbot.rollup_facets([
+        {"day": "2024-05-01", "count": 2, "sentimentSum": 0.5, "emotions": {"joy": 2, "calm": 0}},
+        {"day": "2024-05-02", "count": 0, "sentimentSum": 0, "emotions": {}},
+        {"day": "2024-05-03", "count": 1, "sentimentSum": -0.2, "emotions": {"sad": 1, "joy": 1}},
+    ])
+    assert facets["daily"] == [
+        {"_id": "2024-05-01", "sum": 0.5, "count": 2},
+        {"_id": "2024-05-03", "sum": -0.2, "count": 1},
+    ]
+    assert facets["emotions"] == [{"_id": "joy", "count": 3}, {"_id": "sad", "count": 1}]
+
+
+def test_auto_source_waits_for_a_full_rebuild(memory_db, monkeypatch):
+    monkeypatch.setattr(chatbot, "MOOD_SUMMARY_SOURCE", "auto")
+    monkeypatch.setattr(chatbot, "_rollups_complete", False)
+
+    async def scenario():
+        before = await chatbot.use_rollups(memory_db)
+        await memory_db[ROLLUP_STATE].insert_many([{"_id": MOOD_DAILY, "rebuiltAt": datetime.now()}])
+        return before, await chatbot.use_rollups(memory_db)
+
+    assert asyncio.run(scenario()) == (False, True)
+
+
+def test_explicit_source_ignores_rebuild_state(memory_db, monkeypatch):
+    monkeypatch.setattr(chatbot, "_rollups_complete", False)
+    monkeypatch.setattr(chatbot, "MOOD_SUMMARY_SOURCE", "rollup")
+    assert asyncio.run(chatbot.use_rollups(memory_db)) is True
+    monkeypatch.setattr(chatbot, "MOOD_SUMMARY_SOURCE", "raw")
+    assert asyncio.run(chatbot.use_rollups(memory_db)) is False
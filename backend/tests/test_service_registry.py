@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+from app.services.analysis_executor import AnalysisExecutor
+from app.services.registry import ServiceRegistry
+
+
+class StubDetector:
+    def detect_crisis_level(self, message, conversation):
+        return {"level": "low", "message": message}
+
+
+def test_listener_runs_before_service_is_ready():
+    seen = []
+    registry = ServiceRegistry({"crisis_detector": StubDetector})
+    registry.add_listener(lambda name, instance: seen.append((name, registry.is_ready(name))))
+
+    registry.load_all()
+
+    assert seen == [("crisis_detector", False)]
+    assert registry.crisis_ready
+
+
+def test_failed_service_is_not_attached():
+    def broken():
+        raise RuntimeError("model missing")
+
+    executor = AnalysisExecutor(mode="inline")
+    registry = ServiceRegistry({"crisis_detector": StubDetector, "nlp_processor": broken})
+    registry.add_listener(executor.attach)
+
+    registry.load_all()
+
+    assert registry.crisis_ready and not registry.is_ready("nlp_processor")
+    assert registry.status["nlp_processor"]["error"] == "model missing"
+    assert isinstance(executor.crisis_detector, StubDetector)
+    assert executor.nlp_processor is None
+
+
+def test_executor_usable_as_soon_as_crisis_detector_is_ready():
+    """Crisis detection works while later services are still loading and before start()"""
+    executor = AnalysisExecutor(mode="thread", batch_max_size=1)
+
+    async def scenario():
+        loaded = asyncio.Event()
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def slow_nlp():
+            loop.call_soon_threadsafe(loaded.set)
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+            return object()
+
+        registry = ServiceRegistry({"crisis_detector": StubDetector, "nlp_processor": slow_nlp})
+        registry.add_listener(executor.attach)
+        loader = asyncio.create_task(registry.load())
+
+        await loaded.wait()
+        assert registry.crisis_ready and not registry.nlp_ready
+        result = await executor.detect_crisis_level("hello", [])
+        release.set()
+        await loader
+        return result
+
+    assert asyncio.run(scenario()) == {"level": "low", "message": "hello"}
+
+
+def failing_initializer():
+    raise RuntimeError("model missing")
+
+
+def test_executor_falls_back_inline_when_workers_fail(monkeypatch):
+    from app.services import analysis_executor as module
+
+    monkeypatch.setattr(module, "_init_worker", failing_initializer)
+    executor = AnalysisExecutor(StubDetector(), mode="thread", workers=2, batch_max_size=1)
+
+    async def scenario():
+        await executor.start()
+        result = await executor.detect_crisis_level("hello", [])
+        await executor.shutdown()
+        return result
+
+    assert asyncio.run(scenario()) == {"level": "low", "message": "hello"}
+    assert executor.mode == "inline" and executor._pool is None
+    assert executor.degraded.startswith("workers failed to start")
+
+
+class ThreadRecordingDetector:
+    def detect_crisis_level(self, message, conversation):
+        return {"level": "low", "thread": threading.current_thread().name}
+
+
+class ThreadRecordingNLP:
+    def process_batch(self, messages, include_entities=None):
+        return [{"thread": threading.current_thread().name} for _ in messages]
+
+
+def test_executor_runs_only_the_failed_service_inline(monkeypatch):
+    from app.services import analysis_executor as module
+
+    def load_service(name):
+        if name == "nlp_processor":
+            raise RuntimeError("model missing")
+        return ThreadRecordingDetector()
+
+    monkeypatch.setattr(module, "_load_service", load_service)
+    executor = AnalysisExecutor(mode="thread", workers=2, batch_max_size=1)
+    executor.attach("nlp_processor", ThreadRecordingNLP())
+
+    async def scenario():
+        await executor.start()
+        crisis = await executor.detect_crisis_level("hello", [])
+        nlp = await executor.process_batch(["hello"])
+        await executor.shutdown()
+        return crisis, nlp
+
+    crisis, nlp = asyncio.run(scenario())
+    assert crisis["thread"].startswith("analysis")
+    assert nlp == [{"thread": threading.current_thread().name}]
+    assert executor.mode == "thread"
+    assert executor.degraded == "nlp_processor failed to load in the workers, running inline"
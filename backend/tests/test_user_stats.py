@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+from app.database.user_stats import (
+    USER_STATS, alert_stats_updates, apply_message_stats, message_stats_updates, session_stats_updates
+)
+
+
+def as_dict(updates):
+    return {update._filter["userId"]: update._doc for update in updates}
+
+
+def test_message_stats_fold_per_user():
+    updates = message_stats_updates([
+        {"userId": "u1", "timestamp": datetime(2024, 5, 1, 9)},
+        {"userId": "u1", "timestamp": datetime(2024, 5, 1, 8)},
+        {"userId": "u2", "timestamp": None},
+        {"timestamp": datetime(2024, 5, 1)},
+    ])
+    assert as_dict(updates) == {
+        "u1": {"$inc": {"messages": 2}, "$max": {"lastMessageAt": datetime(2024, 5, 1, 9)}},
+        "u2": {"$inc": {"messages": 1}},
+    }
+    assert all(update._upsert for update in updates)
+
+
+def test_session_and_alert_stats():
+    assert as_dict(session_stats_updates([{"userId": "u1"}, {"userId": "u1"}, {}])) == {
+        "u1": {"$inc": {"sessions": 2}}
+    }
+    alerts = [{"userId": "u1", "alert_level": "high"}, {"userId": "u1", "alert_level": "medium"}]
+    assert as_dict(alert_stats_updates(alerts)) == {"u1": {"$inc": {"highAlerts": 1}}}
+    assert alert_stats_updates([{"userId": "u2", "alert_level": "medium"}]) == []
+
+
+def test_listener_keeps_the_latest_timestamp(memory_db):
+    async def scenario():
+        await apply_message_stats(memory_db, [{"userId": "u1", "timestamp": datetime(2024, 5, 2)}])
+        await apply_message_stats(memory_db, [{"userId": "u1", "timestamp": datetime(2024, 5, 1)}])
+        return await memory_db[USER_STATS].find_one({"userId": "u1"})
+
+    stats = asyncio.run(scenario())
+    assert stats["messages"] == 2 and stats["lastMessageAt"] == datetime(2024, 5, 2)
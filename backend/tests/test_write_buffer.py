@@ -0,0 +1,132 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect
+
+from app.database.db import WRITE_MAX_ATTEMPTS, WriteBehindBuffer
+
+
+class FlakyDatabase:
+    """Fails the next `failures` insert_many calls; with `write_first` the documents still land"""
+
+    def __init__(self, database, failures=1, write_first=False):
+        self.database = database
+        self.failures = failures
+        self.write_first = write_first
+
+    def __getitem__(self, name):
+        collection = self.database[name]
+        owner = self
+
+        class Collection:
+            async def insert_many(self, documents, ordered=True):
+                if owner.failures > 0:
+                    owner.failures -= 1
+                    if owner.write_first:
+                        await collection.insert_many(documents, ordered=ordered)
+                    raise AutoReconnect("connection reset")
+                await collection.insert_many(documents, ordered=ordered)
+
+        return Collection()
+
+
+def test_batches_documents_and_notifies_listeners(memory_db):
+    seen = []
+
+    async def listener(database, documents):
+        seen.append([document["n"] for document in documents])
+
+    async def scenario():
+        buffer = WriteBehindBuffer(max_docs=3, max_wait_ms=10_000, database=memory_db)
+        buffer.add_listener("chatbot_history", listener)
+        for n in range(3):
+            await buffer.insert("chatbot_history", {"n": n})
+        while buffer.depth:  # the full batch is flushed right away
+            await asyncio.sleep(0)
+        await buffer.insert("chatbot_history", {"n": 3})
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert seen == [[0, 1, 2], [3]]
+    assert buffer.documents_written == 4 and buffer.write_errors == 0
+    assert len(memory_db.chatbot_history.documents) == 4
+
+
+def test_failed_batch_is_retried(memory_db):
+    async def scenario():
+        buffer = WriteBehindBuffer(max_docs=10, database=FlakyDatabase(memory_db, failures=1))
+        await buffer.insert("sessions", {"userId": "u1"})
+        await buffer.flush()
+        assert buffer.depth == 1 and buffer.retries == 1
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.documents_written == 1 and buffer.dropped == 0
+    assert len(memory_db.sessions.documents) == 1
+
+
+def test_duplicate_on_retry_counts_as_stored(memory_db):
+    """The first attempt reached Mongo before the connection dropped"""
+    stored = []
+
+    async def listener(database, documents):
+        stored.extend(documents)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(database=FlakyDatabase(memory_db, failures=1, write_first=True))
+        buffer.add_listener("chatbot_history", listener)
+        await buffer.insert("chatbot_history", {"userId": "u1"})
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.write_errors == 0 and len(stored) == 1
+    assert len(memory_db.chatbot_history.documents) == 1
+
+
+def test_duplicate_on_first_attempt_is_rejected(memory_db):
+    async def scenario():
+        await memory_db.crisis_alerts.insert_many([{"_id": "a1"}])
+        buffer = WriteBehindBuffer(database=memory_db)
+        await buffer.insert("crisis_alerts", {"_id": "a1"}, urgent=True)
+        await buffer.insert("crisis_alerts", {"_id": "a2"}, urgent=True)
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.write_errors == 1 and buffer.documents_written == 1
+
+
+def test_gives_up_after_max_attempts(memory_db):
+    async def scenario():
+        buffer = WriteBehindBuffer(database=FlakyDatabase(memory_db, failures=WRITE_MAX_ATTEMPTS))
+        await buffer.insert("sessions", {"userId": "u1"})
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.dropped == 1 and buffer.retries == WRITE_MAX_ATTEMPTS - 1
+    assert memory_db.sessions.documents == {}
+
+
+def test_urgent_insert_skips_the_retry_backoff(memory_db):
+    async def scenario():
+        buffer = WriteBehindBuffer(max_wait_ms=10_000, database=FlakyDatabase(memory_db, failures=1))
+        await buffer.insert("crisis_alerts", {"_id": "a1"})
+        await buffer.flush()
+        assert buffer.retries == 1   # crisis_alerts now backs off
+        await buffer.insert("crisis_alerts", {"_id": "a2"}, urgent=True)
+
+        async def written():
+            while buffer.depth:
+                await asyncio.sleep(0)
+
+        # Well inside the 1s backoff
+        await asyncio.wait_for(written(), 0.5)
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.documents_written == 2
+    assert set(memory_db.crisis_alerts.documents) == {"a1", "a2"}